@@ -42,7 +42,9 @@ def render_diagnostics_center(*, workspace_id: str | None) -> None:
     col1, col2 = st.columns(2)
     with col1:
         if st.button(t("rebuild_index", workspace_id), disabled=locked, help=lock_msg or None):
-            task_id = enqueue_index_task(workspace_id=workspace_id, reset=True)
+            task_id = enqueue_index_task(
+                workspace_id=workspace_id, reset=True, incremental=False
+            )
             run_task_in_background(task_id)
             st.success(t("rebuild_index_queued", workspace_id))
     with col2:
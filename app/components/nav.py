@@ -3,7 +3,12 @@ from __future__ import annotations
 import streamlit as st
 
 from app.components.dialogs import confirm_action
-from core.retrieval.vector_store import VectorStore, VectorStoreSettings
+from core.retrieval.bm25_index import bm25_index_exists
+from core.retrieval.vector_store import (
+    get_vector_store,
+    release_vector_stores,
+    workspace_store_settings,
+)
 from core.ui_state.storage import get_setting, set_setting
 from infra.db import get_connection, get_workspaces_dir
 from service.workspace_service import (
@@ -40,19 +45,14 @@ def _index_status(workspace_id: str) -> dict:
         ).fetchone()
     vector_count = 0
     try:
-        settings = VectorStoreSettings(
-            persist_directory=get_workspaces_dir() / workspace_id / "index" / "chroma",
-            collection_name=f"workspace_{workspace_id}",
-        )
-        vector_count = VectorStore(settings).count()
+        vector_count = get_vector_store(workspace_store_settings(workspace_id)).count()
     except Exception:
         vector_count = 0
-    bm25_path = get_workspaces_dir() / workspace_id / "index" / "bm25" / "index.pkl"
     return {
         "documents": int(doc_row["count"]) if doc_row else 0,
         "chunks": int(chunk_row["count"]) if chunk_row else 0,
         "vector_index": vector_count,
-        "bm25_index": bm25_path.exists(),
+        "bm25_index": bm25_index_exists(workspace_id),
     }
 
 
@@ -109,6 +109,7 @@ def render_nav() -> tuple[str | None, str]:
                 if ws_dir.exists():
                     import shutil
 
+                    release_vector_stores(ws_dir)
                     shutil.rmtree(ws_dir)
                 st.success("Project deleted. Refresh list.")
                 st.session_state.pop("workspace_id", None)
@@ -210,17 +210,14 @@ def _handle_question(
             workspace_id=workspace_id,
             course_id=course["id"],
             query=question,
-            doc_ids=course_docs_for_qa(course["id"]),
         )
         _display_result(result, workspace_id)
 
     elif scope == "project" and project:
-        doc_ids = [paper["doc_id"] for paper in list_project_papers(project["id"])]
         result = project_query(
             workspace_id=workspace_id,
             project_id=project["id"],
             query=question,
-            doc_ids=doc_ids,
         )
         _display_result(result, workspace_id)
 
@@ -792,15 +792,13 @@ def _render_qa_tab(workspace_id: str, course: dict, locked: bool) -> None:
 
     if st.button(L("🔍 提问", "🔍 Ask"), disabled=locked or not question.strip(), key="btn_course_qa_ask", type="primary"):
         with st.spinner(L("正在检索并生成回答...", "Retrieving and generating answer...")):
-            doc_ids = course_docs_for_qa(course["id"])
-            if not doc_ids:
+            if not course_docs_for_qa(course["id"]):
                 st.error(L("❌ 请先关联课程资料。", "❌ Please link course materials first."))
             else:
                 result = course_query(
                     workspace_id=workspace_id,
                     course_id=course["id"],
                     query=question,
-                    doc_ids=doc_ids,
                 )
                 st.session_state["qa_result"] = result
 
@@ -259,7 +259,6 @@ def _render_papers_tab(project: dict, workspace_id: str, locked: bool) -> None:
                     workspace_id=workspace_id,
                     project_id=project["id"],
                     query="Project related work",
-                    doc_ids=[paper["doc_id"] for paper in papers],
                 )
                 if result.get("query_type") == "global":
                     render_content_box(result["answer"], L("相关工作", "Related Work"))
@@ -504,7 +503,6 @@ def _render_decks_tab(project: dict, workspace_id: str, locked: bool) -> None:
                     workspace_id=workspace_id,
                     project_id=project["id"],
                     query=query or "Project summary deck",
-                    doc_ids=[paper["doc_id"] for paper in papers],
                 )
                 coverage = result.get("coverage")
                 deck = generate_deck(
@@ -4,10 +4,12 @@ import streamlit as st
 
 from core.storage.migrations import run_migrations
 from core.ui_state.storage import get_setting
+from service.warmup_service import start_warmup
 
 
 def init_app_state() -> None:
     run_migrations()
+    start_warmup()
     st.session_state.setdefault("workspace_id", get_setting(None, "last_workspace_id") or "")
     st.session_state.setdefault("llm_base_url", get_setting(None, "llm_base_url") or "")
     st.session_state.setdefault("llm_model", get_setting(None, "llm_model") or "")
@@ -52,6 +52,7 @@ from service.paper_generate_service import aggregate_papers, generate_paper_card
 from service.paper_service import get_paper, ingest_paper
 from service.presentation_service import generate_slides
 from service.retrieval_service import answer_with_retrieval
+from service.warmup_service import start_warmup, warmup_status
 from service.workspace_service import create_workspace, list_workspaces
 
 app = FastAPI(title="StudyFlow API", version=VERSION)
@@ -71,11 +72,18 @@ def _verify_token(authorization: str | None = Header(None)) -> None:
 @app.on_event("startup")
 def _init_db() -> None:
     run_migrations()
+    start_warmup()
 
 
 @app.get("/health", response_model=HealthResponse)
 def health() -> HealthResponse:
-    return HealthResponse(status="ok", version=VERSION)
+    warmup = warmup_status()
+    return HealthResponse(
+        status="ok",
+        version=VERSION,
+        ready=warmup["state"] in ("ready", "idle"),
+        warmup=warmup,
+    )
 
 
 @app.get("/ocr/status", response_model=OcrStatusResponse, dependencies=[Depends(_verify_token)])
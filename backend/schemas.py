@@ -8,6 +8,8 @@ from pydantic import BaseModel
 class HealthResponse(BaseModel):
     status: str
     version: str
+    ready: bool = True
+    warmup: dict | None = None
 
 
 class WorkspaceRequest(BaseModel):
@@ -46,6 +48,9 @@ class IngestResponse(BaseModel):
     image_pages_count: int | None = None
     ocr_mode: str | None = None
     warnings: list[str] | None = None
+    duplicate_chunks: int | None = None
+    dedup_ratio: float | None = None
+    ocr_pages_per_sec: float | None = None
     paper_id: str | None = None
     title: str | None = None
     authors: str | None = None
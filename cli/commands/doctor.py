@@ -9,8 +9,10 @@ from urllib.parse import urlparse
 import typer
 
 from core.config.loader import ConfigError, apply_profile, load_config
+from core.retrieval.embedding_cache import get_embedding_store
 from infra.db import get_connection, get_workspaces_dir
 from service.retrieval_service import index_status
+from service.warmup_service import run_warmup
 from service.workspace_service import list_workspaces
 
 
@@ -25,6 +27,11 @@ def _dir_size(path: str) -> int:
     return total
 
 
+def _describe_warmup(details: dict) -> str:
+    extras = " ".join(f"{key}={value}" for key, value in details.items() if key != "state")
+    return f"{details.get('state', 'unknown')} {extras}".strip()
+
+
 def doctor(
     deep: bool = typer.Option(False, "--deep"),
     workspace: str | None = typer.Option(None, "--workspace"),
@@ -59,6 +66,17 @@ def doctor(
         sock.settimeout(0.5)
         in_use = sock.connect_ex((host, port)) == 0
     typer.echo(f"API port {host}:{port} in use: {'yes' if in_use else 'no'}")
+    if in_use:
+        try:
+            import requests
+
+            health = requests.get(f"{base_url.rstrip('/')}/health", timeout=2).json()
+            warmup = health.get("warmup") or {}
+            typer.echo(f"API warm-up: {warmup.get('state', 'unknown')}")
+            for name, details in (warmup.get("components") or {}).items():
+                typer.echo(f"  {name}: {_describe_warmup(details)}")
+        except Exception as exc:
+            typer.echo(f"API warm-up: unavailable ({exc})")
 
     try:
         from core.ingest.ocr import OCRSettings, ocr_available
@@ -86,6 +104,19 @@ def doctor(
     if not deep:
         return
 
+    typer.echo("Warm-up (this process):")
+    for name, details in run_warmup()["components"].items():
+        typer.echo(f"  {name}: {_describe_warmup(details)}")
+
+    store = get_embedding_store()
+    if store is None:
+        typer.echo("Embedding cache: disabled")
+    else:
+        stats = store.stats()
+        typer.echo(
+            f"Embedding cache: {stats['entries']} entries, {stats['bytes']} bytes ({stats['path']})"
+        )
+
     workspaces = (
         [workspace]
         if workspace
@@ -119,18 +150,3 @@ def doctor(
         workspace_dir = get_workspaces_dir() / workspace_id
         size_bytes = _dir_size(str(workspace_dir))
         typer.echo(f"  disk usage: {size_bytes} bytes")
-        cache_path = workspace_dir / "cache" / "embeddings.sqlite"
-        if cache_path.exists():
-            try:
-                import sqlite3
-
-                conn = sqlite3.connect(cache_path)
-                row = conn.execute(
-                    "SELECT COUNT(*) as count FROM embeddings_cache"
-                ).fetchone()
-                conn.close()
-                typer.echo(f"  embedding cache: {row[0]} entries")
-            except Exception:
-                typer.echo("  embedding cache: unreadable")
-        else:
-            typer.echo("  embedding cache: missing")
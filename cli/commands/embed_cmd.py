@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import dataclasses
+
+import requests
+import typer
+
+from core.retrieval.embed_server import DEFAULT_PORT, create_server
+from core.retrieval.embedder import EmbeddingError, build_embedding_settings, embed_texts
+
+embed_app = typer.Typer(help="Shared embedding server")
+
+
+@embed_app.command("serve")
+def serve(
+    host: str = typer.Option("127.0.0.1", "--host", help="Bind host"),
+    port: int = typer.Option(DEFAULT_PORT, "--port", help="Bind port"),
+    model: str | None = typer.Option(None, "--model", help="Model to preload"),
+) -> None:
+    try:
+        settings = build_embedding_settings(model=model)
+    except EmbeddingError as exc:
+        typer.echo(str(exc))
+        raise typer.Exit(code=1)
+    # The server encodes in-process; never forward to another server.
+    settings = dataclasses.replace(settings, server_url=None)
+    try:
+        server = create_server(host, port, settings)
+    except OSError as exc:
+        typer.echo(f"Cannot bind {host}:{port}: {exc}")
+        raise typer.Exit(code=1)
+    try:
+        embed_texts(["warm up"], settings)
+    except EmbeddingError as exc:
+        server.server_close()
+        typer.echo(str(exc))
+        raise typer.Exit(code=1)
+    typer.echo(f"Embedding server for {settings.model} on http://{host}:{port}")
+    typer.echo(f"Point clients at it with STUDYFLOW_EMBED_SERVER_URL=http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+@embed_app.command("ping")
+def ping(
+    url: str = typer.Option(f"http://127.0.0.1:{DEFAULT_PORT}", "--url"),
+) -> None:
+    try:
+        resp = requests.get(f"{url.rstrip('/')}/health", timeout=5)
+        resp.raise_for_status()
+        typer.echo(f"Embedding server ok: {resp.json()}")
+    except requests.RequestException as exc:
+        typer.echo(f"Embedding server ping failed: {exc}")
+        raise typer.Exit(code=1)
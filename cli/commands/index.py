@@ -2,6 +2,10 @@ from __future__ import annotations
 
 import typer
 
+from core.retrieval.fts_index import LEXICAL_BACKENDS
+from core.retrieval.result_cache import bump_index_generation
+from core.retrieval.vector_store import VECTOR_BACKENDS
+from core.ui_state.storage import set_setting
 from service.retrieval_service import index_status, vacuum_index
 from service.tasks_service import enqueue_index_task, run_task_by_id
 
@@ -9,11 +13,25 @@ index_app = typer.Typer(help="Index management")
 
 
 @index_app.command("rebuild")
-def rebuild(workspace_id: str, doc_id: str | None = typer.Option(None, "--doc")) -> None:
+def rebuild(
+    workspace_id: str,
+    doc_id: str | None = typer.Option(None, "--doc"),
+    incremental: bool = typer.Option(
+        True, "--incremental/--full", help="Embed only new or changed chunks."
+    ),
+) -> None:
     doc_ids = [doc_id] if doc_id else None
-    task_id = enqueue_index_task(workspace_id=workspace_id, reset=doc_id is None, doc_ids=doc_ids)
+    task_id = enqueue_index_task(
+        workspace_id=workspace_id,
+        reset=doc_id is None,
+        doc_ids=doc_ids,
+        incremental=incremental,
+    )
     result = run_task_by_id(task_id)
-    typer.echo(f"{task_id} indexed={result['indexed_count']} chunks")
+    typer.echo(
+        f"{task_id} indexed={result['indexed_count']} chunks "
+        f"removed={result.get('removed_count', 0)}"
+    )
 
 
 @index_app.command("status")
@@ -22,10 +40,33 @@ def status(workspace_id: str) -> None:
     typer.echo(
         f"docs={info['doc_count']} chunks={info['chunk_count']} "
         f"vector={info['vector_count']} bm25={info['bm25_exists']} "
-        f"orphans={info['orphan_chunks']}"
+        f"orphans={info['orphan_chunks']} lexical={info['lexical_backend']} "
+        f"vector_backend={info['vector_backend']}"
     )
 
 
+@index_app.command("lexical")
+def lexical(workspace_id: str, backend: str = typer.Argument(..., help="bm25 | fts5")) -> None:
+    backend = backend.strip().lower()
+    if backend not in LEXICAL_BACKENDS:
+        raise typer.BadParameter(f"backend must be one of: {', '.join(LEXICAL_BACKENDS)}")
+    set_setting(workspace_id, "lexical_backend", backend)
+    bump_index_generation(workspace_id)
+    info = index_status(workspace_id)
+    typer.echo(f"lexical backend={info['lexical_backend']}")
+
+
+@index_app.command("vector")
+def vector(workspace_id: str, backend: str = typer.Argument(..., help="chroma | numpy")) -> None:
+    backend = backend.strip().lower()
+    if backend not in VECTOR_BACKENDS:
+        raise typer.BadParameter(f"backend must be one of: {', '.join(VECTOR_BACKENDS)}")
+    set_setting(workspace_id, "vector_backend", backend)
+    bump_index_generation(workspace_id)
+    info = index_status(workspace_id)
+    typer.echo(f"vector backend={info['vector_backend']} vectors={info['vector_count']}")
+
+
 @index_app.command("vacuum")
 def vacuum(workspace_id: str) -> None:
     info = vacuum_index(workspace_id)
@@ -4,6 +4,7 @@ import shutil
 
 import typer
 
+from core.retrieval.vector_store import release_vector_stores
 from infra.db import get_workspaces_dir
 from service.workspace_service import (
     create_workspace,
@@ -40,5 +41,6 @@ def delete(workspace_id: str, confirm: bool = typer.Option(False, "--confirm"))
     delete_workspace(workspace_id)
     ws_dir = get_workspaces_dir() / workspace_id
     if ws_dir.exists():
+        release_vector_stores(ws_dir)
         shutil.rmtree(ws_dir)
     typer.echo("deleted")
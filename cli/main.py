@@ -10,6 +10,7 @@ from cli.commands.coach import coach_app
 from cli.commands.concepts_cmd import concepts_app
 from cli.commands.doctor import doctor
 from cli.commands.document import document_app
+from cli.commands.embed_cmd import embed_app
 from cli.commands.gen import gen
 from cli.commands.import_cmd import import_app
 from cli.commands.index import index_app
@@ -60,6 +61,7 @@ app.add_typer(related_app, name="related")
 app.add_typer(bundle_app, name="bundle")
 app.add_typer(pack_app, name="pack")
 app.add_typer(tasks_app, name="tasks")
+app.add_typer(embed_app, name="embed")
 app.command()(ingest)
 app.command()(query)
 app.command()(gen)
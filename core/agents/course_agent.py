@@ -5,8 +5,23 @@ from dataclasses import dataclass
 from core.formatting.citations import build_citation_bundle
 from core.prompts.registry import build_prompt
 from core.retrieval.retriever import Hit
+from core.retrieval.scopes import course_scope
 from service.chat_service import ChatConfigError, chat
-from service.retrieval_service import retrieve_hits_mode
+from service.retrieval_service import collect_hit_batches, retrieve_hits_batch, retrieve_hits_mode
+
+OVERVIEW_TOPICS = [
+    "课程总览与学习目标",
+    "核心概念与基础术语",
+    "关键模型与算法",
+    "训练/优化与评估",
+    "应用场景与案例",
+]
+CHEATSHEET_SECTIONS = [
+    "Definitions",
+    "Key Formulas",
+    "Typical Question Types",
+    "Common Pitfalls",
+]
 
 
 class CourseAgentError(RuntimeError):
@@ -47,7 +62,7 @@ class CourseAgent:
             query=query,
             mode=self.retrieval_mode,
             top_k=top_k,
-            doc_ids=self.doc_ids,
+            scope_tag=course_scope(self.course_id),
             max_per_doc=max_per_doc,
             min_docs=min_docs,
         )
@@ -55,6 +70,22 @@ class CourseAgent:
             raise CourseAgentError("No retrieval hits found for this course.")
         return hits, used_mode
 
+    def _retrieve_batch(self, queries: list[str], top_k: int = 8) -> list[tuple[list[Hit], str]]:
+        max_per_doc = 2 if len(self.doc_ids) > 1 else None
+        min_docs = min(4, len(self.doc_ids)) if len(self.doc_ids) > 1 else None
+        outcomes = retrieve_hits_batch(
+            workspace_id=self.workspace_id,
+            queries=queries,
+            mode=self.retrieval_mode,
+            top_k=top_k,
+            scope_tag=course_scope(self.course_id),
+            max_per_doc=max_per_doc,
+            min_docs=min_docs,
+        )
+        if any(not hits for hits, _ in outcomes):
+            raise CourseAgentError("No retrieval hits found for this course.")
+        return outcomes
+
     def _merge_hits(self, batches: list[list[Hit]]) -> list[Hit]:
         seen = set()
         merged = []
@@ -89,22 +120,11 @@ class CourseAgent:
         return merged
 
     def generate_overview(self, progress_cb: callable | None = None) -> AgentOutput:
-        topics = [
-            "课程总览与学习目标",
-            "核心概念与基础术语",
-            "关键模型与算法",
-            "训练/优化与评估",
-            "应用场景与案例",
-        ]
-        # Retrieval rounds: 1 per topic (5 rounds)
-        total = len(topics)
-        batches = []
-        used_mode = self.retrieval_mode
-        for idx, topic in enumerate(topics, start=1):
-            hits, used_mode = self._retrieve_hits(topic, top_k=8)
-            batches.append(hits)
-            if progress_cb:
-                progress_cb(idx, total)
+        topics = list(OVERVIEW_TOPICS)
+        # Retrieval: 1 query per topic (5 queries, one batch)
+        batches, used_mode = collect_hit_batches(
+            self._retrieve_batch(topics, top_k=8), self.retrieval_mode, progress_cb
+        )
 
         merged_hits = self._merge_hits(batches)
         bundle = build_citation_bundle(merged_hits)
@@ -127,20 +147,10 @@ class CourseAgent:
         )
 
     def generate_cheatsheet(self, progress_cb: callable | None = None) -> AgentOutput:
-        sections = [
-            "Definitions",
-            "Key Formulas",
-            "Typical Question Types",
-            "Common Pitfalls",
-        ]
-        total = len(sections)
-        batches = []
-        used_mode = self.retrieval_mode
-        for idx, section in enumerate(sections, start=1):
-            hits, used_mode = self._retrieve_hits(section, top_k=8)
-            batches.append(hits)
-            if progress_cb:
-                progress_cb(idx, total)
+        sections = list(CHEATSHEET_SECTIONS)
+        batches, used_mode = collect_hit_batches(
+            self._retrieve_batch(sections, top_k=8), self.retrieval_mode, progress_cb
+        )
 
         merged_hits = self._merge_hits(batches)
         bundle = build_citation_bundle(merged_hits)
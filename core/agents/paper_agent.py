@@ -9,6 +9,13 @@ from core.retrieval.retriever import Hit
 from service.chat_service import ChatConfigError, chat
 from service.retrieval_service import retrieve_hits_mode
 
+PAPER_CARD_QUERIES = [
+    "paper summary",
+    "key contributions",
+    "strengths weaknesses",
+    "extension ideas",
+]
+
 
 class PaperAgentError(RuntimeError):
     pass
@@ -35,12 +42,7 @@ class PaperAgent:
         self.retrieval_mode = retrieval_mode
 
     def generate_paper_card(self, progress_cb: callable | None = None) -> PaperCardOutput:
-        queries = [
-            "paper summary",
-            "key contributions",
-            "strengths weaknesses",
-            "extension ideas",
-        ]
+        queries = list(PAPER_CARD_QUERIES)
         batches: list[list[Hit]] = []
         total = len(queries)
         used_mode = self.retrieval_mode
@@ -6,7 +6,9 @@ from core.formatting.citations import build_citation_bundle
 from core.prompts.registry import build_prompt
 from core.retrieval.retriever import Hit
 from service.chat_service import ChatConfigError, chat
-from service.retrieval_service import retrieve_hits_mode
+from service.retrieval_service import collect_hit_batches, retrieve_hits_batch
+
+AGGREGATE_QUERIES = ["related work"]
 
 
 class PaperAggregatorError(RuntimeError):
@@ -37,24 +39,17 @@ class PaperAggregator:
             raise PaperAggregatorError("No papers selected.")
 
         # Retrieval: 2 rounds per paper to control cost
-        batches: list[list[Hit]] = []
-        total = len(self.doc_ids) * 2
-        current = 0
-        used_mode = self.retrieval_mode
-        for doc_id in self.doc_ids:
-            for query in [question, "related work"]:
-                hits, used_mode = retrieve_hits_mode(
-                    workspace_id=self.workspace_id,
-                    query=query,
-                    mode=self.retrieval_mode,
-                    top_k=8,
-                    doc_ids=[doc_id],
-                )
-                if hits:
-                    batches.append(hits)
-                current += 1
-                if progress_cb:
-                    progress_cb(current, total)
+        per_doc = [question, *AGGREGATE_QUERIES]
+        queries = per_doc * len(self.doc_ids)
+        scopes = [[doc_id] for doc_id in self.doc_ids for _ in per_doc]
+        outcomes = retrieve_hits_batch(
+            workspace_id=self.workspace_id,
+            queries=queries,
+            mode=self.retrieval_mode,
+            top_k=8,
+            scopes=scopes,
+        )
+        batches, used_mode = collect_hit_batches(outcomes, self.retrieval_mode, progress_cb)
 
         merged_hits = _merge_hits(batches)
         if not merged_hits:
@@ -9,7 +9,9 @@ from core.prompts.registry import build_prompt
 from core.quality.validators import validate_slides_deck
 from core.retrieval.retriever import Hit
 from service.chat_service import ChatConfigError, chat
-from service.retrieval_service import retrieve_hits_mode
+from service.retrieval_service import collect_hit_batches, retrieve_hits_batch
+
+SLIDES_QUERIES = ["summary", "methods", "results", "discussion"]
 
 
 class SlidesAgentError(RuntimeError):
@@ -77,20 +79,16 @@ class SlidesAgent:
             raise SlidesAgentError("Unsupported duration.")
 
         page_count = _DURATION_TO_PAGES[duration]
-        # Retrieval rounds: summary + methods + results + discussion (4 rounds)
-        queries = ["summary", "methods", "results", "discussion"]
-        batches: list[list[Hit]] = []
-        used_mode = self.retrieval_mode
-        for query in queries:
-            hits, used_mode = retrieve_hits_mode(
-                workspace_id=self.workspace_id,
-                query=query,
-                mode=self.retrieval_mode,
-                top_k=8,
-                doc_ids=[self.doc_id],
-            )
-            if hits:
-                batches.append(hits)
+        # Retrieval: summary + methods + results + discussion (4 queries, one batch)
+        queries = list(SLIDES_QUERIES)
+        outcomes = retrieve_hits_batch(
+            workspace_id=self.workspace_id,
+            queries=queries,
+            mode=self.retrieval_mode,
+            top_k=8,
+            doc_ids=[self.doc_id],
+        )
+        batches, used_mode = collect_hit_batches(outcomes, self.retrieval_mode)
         merged_hits = _merge_hits(batches)
         if not merged_hits:
             raise SlidesAgentError("No retrieval hits found for slides.")
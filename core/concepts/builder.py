@@ -7,7 +7,16 @@ from core.formatting.citations import build_citation_bundle
 from core.prompts.registry import build_prompt
 from core.retrieval.retriever import Hit
 from service.chat_service import ChatConfigError, chat
-from service.retrieval_service import retrieve_hits_mode
+from service.retrieval_service import collect_hit_batches, retrieve_hits_batch
+
+CONCEPT_QUERIES = [
+    "definition",
+    "formula",
+    "method",
+    "assumption",
+    "limitation",
+    "metric",
+]
 
 
 class ConceptsBuildError(RuntimeError):
@@ -41,26 +50,15 @@ def build_concepts(
     doc_ids: list[str],
     retrieval_mode: str,
 ) -> ConceptsBuildResult:
-    queries = [
-        "definition",
-        "formula",
-        "method",
-        "assumption",
-        "limitation",
-        "metric",
-    ]
-    batches: list[list[Hit]] = []
-    used_mode = retrieval_mode
-    for query in queries:
-        hits, used_mode = retrieve_hits_mode(
-            workspace_id=workspace_id,
-            query=query,
-            mode=retrieval_mode,
-            top_k=8,
-            doc_ids=doc_ids,
-        )
-        if hits:
-            batches.append(hits)
+    queries = list(CONCEPT_QUERIES)
+    outcomes = retrieve_hits_batch(
+        workspace_id=workspace_id,
+        queries=queries,
+        mode=retrieval_mode,
+        top_k=8,
+        doc_ids=doc_ids,
+    )
+    batches, used_mode = collect_hit_batches(outcomes, retrieval_mode)
     merged_hits = _merge_hits(batches)
     if not merged_hits:
         raise ConceptsBuildError("No retrieval hits found for concept extraction.")
@@ -1,21 +1,31 @@
 from __future__ import annotations
 
-from core.retrieval.vector_store import VectorStore, VectorStoreSettings
-from infra.db import get_connection, get_workspaces_dir
+from core.retrieval.result_cache import bump_index_generation
+from core.retrieval.vector_store import get_vector_store, workspace_store_settings
+from infra.db import get_connection
 
 
-def delete_document(workspace_id: str, doc_id: str) -> None:
+def delete_document(workspace_id: str, doc_id: str) -> list[str]:
+    """Delete the document's rows; returns the other documents holding
+    near-duplicates of its chunks, which are promoted or re-pointed to a new
+    canonical chunk and so need re-embedding."""
     with get_connection() as connection:
+        rows = connection.execute(
+            """
+            SELECT DISTINCT members.doc_id as doc_id
+            FROM chunks AS canonical
+            JOIN chunks AS members ON members.dup_of = canonical.id
+            WHERE canonical.doc_id = ? AND members.doc_id != ?
+            """,
+            (doc_id, doc_id),
+        ).fetchall()
         connection.execute("DELETE FROM chunks WHERE doc_id = ?", (doc_id,))
         connection.execute("DELETE FROM document_pages WHERE doc_id = ?", (doc_id,))
         connection.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
         connection.commit()
+    bump_index_generation(workspace_id)
+    return [row["doc_id"] for row in rows]
 
 
 def delete_document_vectors(workspace_id: str, doc_id: str) -> None:
-    settings = VectorStoreSettings(
-        persist_directory=get_workspaces_dir() / workspace_id / "index" / "chroma",
-        collection_name=f"workspace_{workspace_id}",
-    )
-    store = VectorStore(settings)
-    store.collection.delete(where={"doc_id": doc_id})
+    get_vector_store(workspace_store_settings(workspace_id)).delete(where={"doc_id": doc_id})
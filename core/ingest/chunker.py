@@ -17,6 +17,8 @@ class Chunk:
     text: str
     text_source: str
     metadata_json: str | None = None
+    minhash: bytes | None = None
+    dup_of: str | None = None
 
 
 def _split_paragraphs(text: str) -> list[str]:
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+
+import numpy as np
+
+from core.ingest.chunker import Chunk
+from infra.db import get_connection
+
+_PERMUTATIONS = 64
+# 16 bands of 4 rows: pairs at Jaccard 0.7 share a band ~99% of the time.
+_BANDS = 16
+_ROWS = _PERMUTATIONS // _BANDS
+_SHINGLE = 3
+_PRIME = (1 << 31) - 1
+_TOKEN = re.compile(r"\w+")
+
+_rng = np.random.default_rng(0x5F1D)
+_A = _rng.integers(1, _PRIME, _PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, _PERMUTATIONS, dtype=np.uint64)
+
+
+def dedup_enabled() -> bool:
+    return os.getenv("STUDYFLOW_DEDUP", "on").lower() not in ("0", "false", "off", "no")
+
+
+def _threshold() -> float:
+    return float(os.getenv("STUDYFLOW_DEDUP_THRESHOLD", "0.7"))
+
+
+def minhash(text: str) -> bytes | None:
+    """MinHash signature over word 3-shingles; None for text without words."""
+    tokens = _TOKEN.findall(text.lower())
+    if not tokens:
+        return None
+    count = max(len(tokens) - _SHINGLE + 1, 1)
+    shingles = dict.fromkeys(" ".join(tokens[i : i + _SHINGLE]) for i in range(count))
+    hashes = np.array(
+        [
+            int.from_bytes(hashlib.blake2b(item.encode(), digest_size=4).digest(), "little")
+            for item in shingles
+        ],
+        dtype=np.uint64,
+    )
+    values = (hashes[:, None] * _A + _B) % _PRIME
+    return values.min(axis=0).astype("<u4").tobytes()
+
+
+def similarity(left: bytes, right: bytes) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(np.frombuffer(left, "<u4") == np.frombuffer(right, "<u4")))
+
+
+class MinHashIndex:
+    """Canonical chunk signatures bucketed by LSH band."""
+
+    def __init__(self, threshold: float | None = None) -> None:
+        self.threshold = _threshold() if threshold is None else threshold
+        self._buckets: dict[tuple[int, bytes], list[tuple[bytes, str]]] = {}
+
+    @staticmethod
+    def _keys(signature: bytes) -> list[tuple[int, bytes]]:
+        width = _ROWS * 4
+        return [(band, signature[band * width : (band + 1) * width]) for band in range(_BANDS)]
+
+    def add(self, signature: bytes, chunk_id: str) -> None:
+        for key in self._keys(signature):
+            self._buckets.setdefault(key, []).append((signature, chunk_id))
+
+    def match(self, signature: bytes) -> str | None:
+        checked: set[str] = set()
+        for key in self._keys(signature):
+            for other, chunk_id in self._buckets.get(key, ()):
+                if chunk_id in checked:
+                    continue
+                checked.add(chunk_id)
+                if similarity(signature, other) >= self.threshold:
+                    return chunk_id
+        return None
+
+
+def band_keys(signature: bytes) -> list[tuple[int, bytes]]:
+    return MinHashIndex._keys(signature)
+
+
+def _stored_candidates(workspace_id: str, keys: list[tuple[int, bytes]]) -> list[tuple[bytes, str]]:
+    """Canonical chunks of the workspace sharing at least one of ``keys``."""
+    unique = list(dict.fromkeys(keys))
+    found: dict[str, tuple[int, bytes]] = {}
+    with get_connection() as connection:
+        # Two variables per key; stay well under SQLITE_MAX_VARIABLE_NUMBER.
+        for start in range(0, len(unique), 400):
+            part = unique[start : start + 400]
+            rows = connection.execute(
+                f"""
+                SELECT chunks.rowid as position, chunks.id as id, chunks.minhash as minhash
+                FROM chunk_lsh
+                JOIN chunks ON chunks.id = chunk_lsh.chunk_id
+                WHERE chunk_lsh.workspace_id = ?
+                  AND (chunk_lsh.band, chunk_lsh.key) IN (VALUES {",".join(["(?, ?)"] * len(part))})
+                """,
+                (workspace_id, *[value for key in part for value in key]),
+            ).fetchall()
+            for row in rows:
+                found[row["id"]] = (row["position"], bytes(row["minhash"]))
+    ordered = sorted(found.items(), key=lambda item: item[1][0])
+    return [(signature, chunk_id) for chunk_id, (_, signature) in ordered]
+
+
+def mark_near_duplicates(workspace_id: str, doc_id: str, chunks: list[Chunk]) -> int:
+    """Set ``minhash`` on every chunk and ``dup_of`` on near-duplicates.
+
+    A chunk matches the first earlier chunk of the workspace (or of this
+    document) whose estimated Jaccard similarity reaches
+    ``STUDYFLOW_DEDUP_THRESHOLD``. Only canonical chunks sharing an LSH band
+    with the new ones are read from ``chunk_lsh``. Returns the number of
+    duplicates found.
+    """
+    for chunk in chunks:
+        chunk.minhash = minhash(chunk.text)
+    if not dedup_enabled():
+        return 0
+    signatures = [chunk.minhash for chunk in chunks if chunk.minhash is not None]
+    index = MinHashIndex()
+    keys = [key for signature in signatures for key in band_keys(signature)]
+    for signature, chunk_id in _stored_candidates(workspace_id, keys):
+        index.add(signature, chunk_id)
+    duplicates = 0
+    for chunk in chunks:
+        if chunk.minhash is None:
+            continue
+        chunk.dup_of = index.match(chunk.minhash)
+        if chunk.dup_of is None:
+            index.add(chunk.minhash, f"{doc_id}:{chunk.chunk_index}")
+        else:
+            duplicates += 1
+    return duplicates
+
+
+def lsh_rows(workspace_id: str, doc_id: str, chunks: list[Chunk]) -> list[tuple[str, int, bytes, str]]:
+    """``chunk_lsh`` rows for the canonical chunks among ``chunks``."""
+    return [
+        (workspace_id, band, key, f"{doc_id}:{chunk.chunk_index}")
+        for chunk in chunks
+        if chunk.minhash is not None and chunk.dup_of is None
+        for band, key in band_keys(chunk.minhash)
+    ]
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any
 
 import numpy as np
@@ -13,6 +14,8 @@ class OCRSettings:
     engine: str = "auto"  # auto | pytesseract | easyocr
 
 
+# Probing tesseract spawns a process; the answer does not change while we run.
+@lru_cache(maxsize=1)
 def _pytesseract_available() -> tuple[bool, str]:
     try:
         import pytesseract
@@ -26,6 +29,7 @@ def _pytesseract_available() -> tuple[bool, str]:
         return False, f"pytesseract not installed ({exc})"
 
 
+@lru_cache(maxsize=1)
 def _easyocr_available() -> tuple[bool, str]:
     try:
         import easyocr  # noqa: F401
@@ -52,6 +56,38 @@ def ocr_available(settings: OCRSettings | None = None) -> tuple[bool, str]:
 _EASYOCR_READER: Any | None = None
 
 
+def _easyocr_reader(settings: OCRSettings) -> Any:
+    global _EASYOCR_READER
+    if _EASYOCR_READER is None:
+        import easyocr
+
+        lang = settings.language
+        if lang == "eng":
+            lang = "en"
+        _EASYOCR_READER = easyocr.Reader([lang], gpu=False)
+    return _EASYOCR_READER
+
+
+def resolve_ocr_engine(settings: OCRSettings | None = None) -> str:
+    """The engine ``run_ocr`` would use: "pytesseract", "easyocr" or "none"."""
+    settings = settings or OCRSettings()
+    if settings.engine in ["auto", "pytesseract"] and _pytesseract_available()[0]:
+        return "pytesseract"
+    if settings.engine in ["auto", "easyocr"] and _easyocr_available()[0]:
+        return "easyocr"
+    return "none"
+
+
+def preload_ocr(settings: OCRSettings | None = None) -> str:
+    """Load the OCR engine ``run_ocr`` would use; returns its name or "none"."""
+    settings = settings or OCRSettings()
+    engine = resolve_ocr_engine(settings)
+    if engine == "easyocr":
+        reader = _easyocr_reader(settings)
+        reader.readtext(np.zeros((32, 32, 3), dtype=np.uint8))
+    return engine
+
+
 def run_ocr(image: Image.Image, *, settings: OCRSettings | None = None) -> str:
     settings = settings or OCRSettings()
     if settings.engine in ["auto", "pytesseract"]:
@@ -67,15 +103,7 @@ def run_ocr(image: Image.Image, *, settings: OCRSettings | None = None) -> str:
     if settings.engine in ["auto", "easyocr"]:
         ok, _ = _easyocr_available()
         if ok:
-            global _EASYOCR_READER
-            if _EASYOCR_READER is None:
-                import easyocr
-
-                lang = settings.language
-                if lang == "eng":
-                    lang = "en"
-                _EASYOCR_READER = easyocr.Reader([lang], gpu=False)
             image_np = np.array(image)
-            results = _EASYOCR_READER.readtext(image_np)
+            results = _easyocr_reader(settings).readtext(image_np)
             return "\n".join([item[1] for item in results]).strip()
     return ""
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+from core.ingest.ocr import OCRSettings, preload_ocr, resolve_ocr_engine, run_ocr
+from core.ingest.pdf_render import render_page_image
+from infra.cpu import process_count
+
+_POOL: ProcessPoolExecutor | None = None
+_POOL_KEY: tuple | None = None
+_LOCK = threading.Lock()
+_WORKER_SETTINGS: OCRSettings | None = None
+_WORKER_DOCUMENT: tuple[tuple, fitz.Document] | None = None
+
+
+def ocr_processes() -> int:
+    """``STUDYFLOW_OCR_PROCESSES``: auto = one per physical core, 0 = OCR in-process."""
+    return process_count("STUDYFLOW_OCR_PROCESSES")
+
+
+def ocr_parallel_min_pages() -> int:
+    """``STUDYFLOW_OCR_PARALLEL_MIN_PAGES``: shorter PDFs are recognized in-process."""
+    try:
+        return max(int(os.getenv("STUDYFLOW_OCR_PARALLEL_MIN_PAGES", "8")), 1)
+    except ValueError:
+        return 8
+
+
+def _worker_init(settings: OCRSettings, threads: int) -> None:
+    global _WORKER_SETTINGS
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    # tesseract itself parallelizes with OpenMP; the pool already fills the cores.
+    os.environ["OMP_THREAD_LIMIT"] = str(threads)
+    if settings.engine == "easyocr":
+        import torch
+
+        torch.set_num_threads(threads)
+    _WORKER_SETTINGS = settings
+    # The easyocr reader is loaded once here and reused for every page.
+    preload_ocr(settings)
+
+
+def _worker_document(path: str) -> fitz.Document:
+    global _WORKER_DOCUMENT
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    if _WORKER_DOCUMENT is None or _WORKER_DOCUMENT[0] != key:
+        if _WORKER_DOCUMENT is not None:
+            _WORKER_DOCUMENT[1].close()
+        _WORKER_DOCUMENT = (key, fitz.open(path))
+    return _WORKER_DOCUMENT[1]
+
+
+def _worker_ocr(path: str, page_index: int, dpi: int) -> str:
+    page = _worker_document(path).load_page(page_index)
+    image = render_page_image(page, zoom=dpi / 72, grayscale=True)
+    return run_ocr(image, settings=_WORKER_SETTINGS)
+
+
+def get_ocr_pool(settings: OCRSettings, processes: int) -> ProcessPoolExecutor:
+    """Return the OCR pool for this engine, replacing one built for another."""
+    global _POOL, _POOL_KEY
+    settings = replace(settings, engine=resolve_ocr_engine(settings))
+    key = (settings.engine, settings.language, processes)
+    with _LOCK:
+        if _POOL is not None and _POOL_KEY == key:
+            return _POOL
+        previous = _POOL
+        threads = max((os.cpu_count() or processes) // processes, 1)
+        _POOL = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_worker_init,
+            initargs=(settings, threads),
+        )
+        _POOL_KEY = key
+    if previous is not None:
+        previous.shutdown(wait=False, cancel_futures=True)
+    return _POOL
+
+
+def submit_page_ocr(
+    path: Path,
+    page_index: int,
+    dpi: int,
+    settings: OCRSettings,
+    processes: int,
+) -> Future:
+    """Render ``page_index`` in grayscale at ``dpi`` and OCR it on a pool worker."""
+    return get_ocr_pool(settings, processes).submit(_worker_ocr, str(path), page_index, dpi)
+
+
+def shutdown_ocr_pool(wait: bool = True) -> None:
+    global _POOL, _POOL_KEY
+    with _LOCK:
+        pool = _POOL
+        _POOL = None
+        _POOL_KEY = None
+    if pool is not None:
+        try:
+            pool.shutdown(wait=wait, cancel_futures=True)
+        except Exception:
+            pass
+
+
+atexit.register(shutdown_ocr_pool)
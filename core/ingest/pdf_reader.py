@@ -1,13 +1,36 @@
 from __future__ import annotations
 
+import atexit
 import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass, field
 from pathlib import Path
 
 import fitz  # PyMuPDF
 
 from core.ingest.ocr import OCRSettings, ocr_available, run_ocr
-from core.ingest.pdf_render import render_page_image
+from core.ingest.ocr_pool import (
+    ocr_parallel_min_pages,
+    ocr_processes,
+    shutdown_ocr_pool,
+    submit_page_ocr,
+)
+from core.ingest.pdf_render import ocr_dpi, render_page_image
+from infra.cpu import process_count
+
+# Pages per task handed to an extraction worker.
+_RANGE_PAGES = 16
+_POOL: ProcessPoolExecutor | None = None
+_POOL_SIZE = 0
+_POOL_LOCK = threading.Lock()
 
 
 class PDFReadError(RuntimeError):
@@ -29,11 +52,128 @@ class PDFPage:
 class PDFParseResult:
     pages: list[PDFPage]
     warnings: list[str] = field(default_factory=list)
+    ocr_pages: int = 0
+    ocr_seconds: float = 0.0
 
     @property
     def page_count(self) -> int:
         return len(self.pages)
 
+    @property
+    def ocr_pages_per_sec(self) -> float:
+        return round(self.ocr_pages / self.ocr_seconds, 2) if self.ocr_seconds > 0 else 0.0
+
+
+def _extract_processes() -> int:
+    return process_count("STUDYFLOW_PDF_PROCESSES")
+
+
+def _parallel_min_pages() -> int:
+    try:
+        return max(int(os.getenv("STUDYFLOW_PDF_PARALLEL_MIN_PAGES", "200")), 1)
+    except ValueError:
+        return 200
+
+
+def _page_payload(page) -> tuple[str, int, list[dict]]:
+    blocks = page.get_text("blocks")
+    return (
+        page.get_text().strip(),
+        len(page.get_images(full=True)),
+        [
+            {
+                "x0": float(block[0]),
+                "y0": float(block[1]),
+                "x1": float(block[2]),
+                "y1": float(block[3]),
+                "text": str(block[4]).strip(),
+            }
+            for block in blocks
+            if len(block) >= 5
+        ],
+    )
+
+
+def _extract_range(path: str, start: int, stop: int) -> list[tuple[str, int, list[dict]]]:
+    with fitz.open(path) as document:
+        return [_page_payload(document.load_page(index)) for index in range(start, stop)]
+
+
+def _extract_pool(processes: int) -> ProcessPoolExecutor:
+    global _POOL, _POOL_SIZE
+    with _POOL_LOCK:
+        if _POOL is not None and _POOL_SIZE == processes:
+            return _POOL
+        previous = _POOL
+        _POOL = ProcessPoolExecutor(
+            max_workers=processes, mp_context=multiprocessing.get_context("spawn")
+        )
+        _POOL_SIZE = processes
+    if previous is not None:
+        previous.shutdown(wait=False, cancel_futures=True)
+    return _POOL
+
+
+def shutdown_extract_pool(wait: bool = True) -> None:
+    global _POOL, _POOL_SIZE
+    with _POOL_LOCK:
+        pool = _POOL
+        _POOL = None
+        _POOL_SIZE = 0
+    if pool is not None:
+        try:
+            pool.shutdown(wait=wait, cancel_futures=True)
+        except Exception:
+            pass
+
+
+atexit.register(shutdown_extract_pool)
+
+
+def _iter_page_payloads(document, path: Path) -> Iterator[tuple[str, int, list[dict]]]:
+    """Text, image count and blocks per page, in page order.
+
+    Documents of ``STUDYFLOW_PDF_PARALLEL_MIN_PAGES`` or more are split into
+    page ranges extracted by worker processes, each opening its own copy; a
+    broken pool falls back to this process for the remaining pages.
+    """
+    page_count = document.page_count
+    processes = _extract_processes()
+    done = 0
+    if processes > 1 and page_count >= _parallel_min_pages():
+        pool = _extract_pool(processes)
+        futures = [
+            pool.submit(_extract_range, str(path), start, min(start + _RANGE_PAGES, page_count))
+            for start in range(0, page_count, _RANGE_PAGES)
+        ]
+        try:
+            for future in futures:
+                for payload in future.result():
+                    yield payload
+                    done += 1
+        except BrokenProcessPool:
+            shutdown_extract_pool(wait=False)
+        finally:
+            for future in futures:
+                future.cancel()
+    for page_index in range(done, page_count):
+        yield _page_payload(document.load_page(page_index))
+
+
+def _ocr_inline(document, page_index: int, text_chars: int, settings: OCRSettings) -> str:
+    page = document.load_page(page_index)
+    image = render_page_image(page, zoom=ocr_dpi(page, text_chars) / 72, grayscale=True)
+    return run_ocr(image, settings=settings)
+
+
+def _await_ocr(future: Future, stop_check: callable | None) -> str:
+    while True:
+        try:
+            return future.result(timeout=0.2)
+        except FutureTimeoutError:
+            if stop_check and stop_check():
+                raise PDFReadError("Ingest stopped by user.")
+
 
 def read_pdf(
     path: Path,
@@ -65,51 +205,46 @@ def read_pdf(
         warnings.append(
             f"OCR unavailable: {ocr_reason}. Proceeding with extracted text only."
         )
-    try:
-        for page_index in range(document.page_count):
-            if stop_check and stop_check():
-                raise PDFReadError("Ingest stopped by user.")
-            page = document.load_page(page_index)
-            text = page.get_text().strip()
-            image_list = page.get_images(full=True)
-            image_count = len(image_list)
-            has_images = image_count > 0
-
-            blocks = page.get_text("blocks")
-            blocks_payload = [
-                {
-                    "x0": float(block[0]),
-                    "y0": float(block[1]),
-                    "x1": float(block[2]),
-                    "y1": float(block[3]),
-                    "text": str(block[4]).strip(),
-                }
-                for block in blocks
-                if len(block) >= 5
-            ]
+    # OCR runs on a process pool (STUDYFLOW_OCR_PROCESSES) while extraction
+    # continues; pages are finished in order as their recognition completes.
+    # Short PDFs do not pay for spawning workers and loading the engine.
+    processes = 0
+    if ocr_mode != "off" and ocr_ready and document.page_count >= ocr_parallel_min_pages():
+        processes = ocr_processes()
+    pending: deque[tuple[int, str, int, list[dict], Future | str | None]] = deque()
+    ocr_pages = 0
+    ocr_started: float | None = None
+    ocr_finished = 0.0
 
+    def _finish(block: bool, drain: bool = False) -> None:
+        nonlocal processes, ocr_finished
+        while pending:
+            page_index, text, image_count, blocks_payload, job = pending[0]
+            if isinstance(job, Future):
+                if not block and not job.done():
+                    return
+                try:
+                    job = _await_ocr(job, stop_check)
+                except BrokenProcessPool:
+                    shutdown_ocr_pool(wait=False)
+                    processes = 0
+                    job = _ocr_inline(document, page_index, len(text), ocr_settings)
+                ocr_finished = time.perf_counter()
+            pending.popleft()
+            block = drain
             text_source = "extract"
-            ocr_text = None
             extracted_text = text
-            should_ocr = ocr_mode == "on" or (
-                ocr_mode == "auto" and len(text) < ocr_threshold
-            )
-            if should_ocr and ocr_ready:
-                image = render_page_image(page)
-                ocr_text = run_ocr(image, settings=ocr_settings)
-                if ocr_text:
-                    text = f"{text}\n\n{ocr_text}".strip() if text else ocr_text
-                    text_source = "ocr" if not extracted_text else "mixed"
-                else:
-                    text_source = text_source
+            if job:
+                text = f"{text}\n\n{job}".strip() if text else job
+                text_source = "ocr" if not extracted_text else "mixed"
             pages.append(
                 PDFPage(
                     number=page_index + 1,
                     text=text,
                     text_source=text_source,
-                    ocr_text=ocr_text,
+                    ocr_text=job,
                     image_count=image_count,
-                    has_images=has_images,
+                    has_images=image_count > 0,
                     blocks_json=json.dumps(blocks_payload, ensure_ascii=False)
                     if blocks_payload
                     else None,
@@ -117,10 +252,46 @@ def read_pdf(
             )
             if progress_cb:
                 progress_cb(page_index + 1, document.page_count)
+
+    payloads = _iter_page_payloads(document, path)
+    try:
+        for page_index in range(document.page_count):
+            if stop_check and stop_check():
+                raise PDFReadError("Ingest stopped by user.")
+            text, image_count, blocks_payload = next(payloads)
+            job: Future | str | None = None
+            should_ocr = ocr_mode == "on" or (
+                ocr_mode == "auto" and len(text) < ocr_threshold
+            )
+            if should_ocr and ocr_ready:
+                ocr_pages += 1
+                if ocr_started is None:
+                    ocr_started = time.perf_counter()
+                if processes:
+                    page = document.load_page(page_index)
+                    job = submit_page_ocr(
+                        path, page_index, ocr_dpi(page, len(text)), ocr_settings, processes
+                    )
+                else:
+                    job = _ocr_inline(document, page_index, len(text), ocr_settings)
+                    ocr_finished = time.perf_counter()
+            pending.append((page_index, text, image_count, blocks_payload, job))
+            # Bound the pages waiting on recognition.
+            _finish(block=len(pending) >= max(processes, 1) * 4)
+        _finish(block=True, drain=True)
     finally:
+        for *_, job in pending:
+            if isinstance(job, Future):
+                job.cancel()
+        payloads.close()
         document.close()
 
     if not pages:
         raise PDFReadError("PDF has no pages.")
 
-    return PDFParseResult(pages=pages, warnings=warnings)
+    return PDFParseResult(
+        pages=pages,
+        warnings=warnings,
+        ocr_pages=ocr_pages,
+        ocr_seconds=ocr_finished - ocr_started if ocr_started is not None else 0.0,
+    )
@@ -1,11 +1,40 @@
 from __future__ import annotations
 
+import os
+
 import fitz  # PyMuPDF
 from PIL import Image
 
+# Longest rendered side for OCR; keeps posters and oversized scans bounded.
+_OCR_MAX_SIDE_PX = 4000
+
 
-def render_page_image(page: fitz.Page, zoom: float = 2.0) -> Image.Image:
+def render_page_image(page: fitz.Page, zoom: float = 2.0, grayscale: bool = False) -> Image.Image:
     matrix = fitz.Matrix(zoom, zoom)
+    if grayscale:
+        pix = page.get_pixmap(matrix=matrix, colorspace=fitz.csGRAY, alpha=False)
+        return Image.frombytes("L", [pix.width, pix.height], pix.samples)
     pix = page.get_pixmap(matrix=matrix, alpha=False)
     mode = "RGB"
     return Image.frombytes(mode, [pix.width, pix.height], pix.samples)
+
+
+def ocr_dpi(page: fitz.Page, text_chars: int = 0) -> int:
+    """Render resolution for OCR from page size and extracted-text density.
+
+    Dense small print gets 300 dpi and sparse slide-like pages 150. Pages
+    without a text layer (scans) get 300 when portrait and 200 when
+    landscape. ``STUDYFLOW_OCR_DPI`` overrides the choice.
+    """
+    width_in = page.rect.width / 72
+    height_in = page.rect.height / 72
+    override = os.getenv("STUDYFLOW_OCR_DPI", "auto").strip().lower()
+    if override != "auto":
+        dpi = int(override)
+    elif text_chars:
+        density = text_chars / max(width_in * height_in, 1.0)
+        dpi = 300 if density >= 40 else 200 if density >= 10 else 150
+    else:
+        dpi = 300 if height_in >= width_in else 200
+    longest = max(width_in, height_in, 1.0)
+    return max(min(dpi, int(_OCR_MAX_SIDE_PX / longest)), 72)
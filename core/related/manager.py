@@ -8,7 +8,9 @@ from core.prompts.registry import build_prompt
 from core.quality.validators import validate_related_payload_safe
 from core.retrieval.retriever import Hit
 from service.chat_service import ChatConfigError, chat
-from service.retrieval_service import retrieve_hits_mode
+from service.retrieval_service import collect_hit_batches, retrieve_hits_batch, retrieve_hits_mode
+
+RELATED_QUERIES = ["related work", "comparison"]
 
 
 class RelatedManagerError(RuntimeError):
@@ -47,18 +49,14 @@ def build_related(
     topic: str,
     retrieval_mode: str,
 ) -> RelatedResult:
-    batches: list[list[Hit]] = []
-    used_mode = retrieval_mode
-    for query in [topic, "related work", "comparison"]:
-        hits, used_mode = retrieve_hits_mode(
-            workspace_id=workspace_id,
-            query=query,
-            mode=retrieval_mode,
-            top_k=8,
-            doc_ids=doc_ids,
-        )
-        if hits:
-            batches.append(hits)
+    outcomes = retrieve_hits_batch(
+        workspace_id=workspace_id,
+        queries=[topic, *RELATED_QUERIES],
+        mode=retrieval_mode,
+        top_k=8,
+        doc_ids=doc_ids,
+    )
+    batches, used_mode = collect_hit_batches(outcomes, retrieval_mode)
     merged_hits = _merge_hits(batches)
     if not merged_hits:
         raise RelatedManagerError("No retrieval hits found for related work.")
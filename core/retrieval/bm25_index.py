@@ -1,90 +1,659 @@
 from __future__ import annotations
 
-import pickle
+import json
+import os
 import re
-from dataclasses import dataclass
+import shutil
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
 from pathlib import Path
 
-from rank_bm25 import BM25Okapi
+import numpy as np
 
+from core.retrieval.hydrate import hydrate_chunks
+from core.retrieval.result_cache import bump_index_generation
+from core.retrieval.scopes import scope_doc_ids
 from infra.db import get_connection, get_workspaces_dir
 
+BM25_K1 = 1.5
+BM25_B = 0.75
+# Okapi floor for negative IDF (terms in over half the rows), as in rank_bm25.
+BM25_EPSILON = 0.25
+FORMAT_VERSION = 2
+
+_WRITE_LOCK = threading.Lock()
+_CACHE_LOCK = threading.Lock()
+_CACHE: OrderedDict[str, _CachedIndex] = OrderedDict()
+
+
+@dataclass
+class BM25Segment:
+    """Immutable on-disk postings for the compacted part of the index.
+
+    Rows are grouped by document; array files are opened with ``mmap_mode="r"``
+    so only the postings touched by a query are paged in.
+    """
+
+    directory: Path
+    terms: dict[str, list[int]]
+    postings_rows: np.ndarray
+    postings_tfs: np.ndarray
+    doc_lens: np.ndarray
+    chunk_ids: np.ndarray
+    row_docs: np.ndarray
+    doc_ids: list[str]
+    doc_offsets: np.ndarray
+    total_len: int
+
+    @property
+    def row_count(self) -> int:
+        return int(self.doc_lens.shape[0])
+
+    def postings(self, term: str) -> tuple[np.ndarray, np.ndarray]:
+        entry = self.terms.get(term)
+        if not entry:
+            return _EMPTY_ROWS, _EMPTY_TFS
+        offset, count = entry
+        return (
+            self.postings_rows[offset : offset + count],
+            self.postings_tfs[offset : offset + count],
+        )
+
+
+_EMPTY_ROWS = np.zeros(0, dtype=np.int32)
+_EMPTY_TFS = np.zeros(0, dtype=np.uint16)
+
 
 @dataclass
 class BM25Index:
-    bm25: BM25Okapi
-    chunk_ids: list[str]
-    metadatas: list[dict]
+    base: BM25Segment | None = None
+    base_dead: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=bool))
+    base_doc_index: dict[str, int] = field(default_factory=dict)
+    extra_chunk_ids: list[str] = field(default_factory=list)
+    extra_doc_ids: list[str] = field(default_factory=list)
+    extra_lens: list[int] = field(default_factory=list)
+    extra_live: list[bool] = field(default_factory=list)
+    extra_postings: dict[str, list[tuple[int, int]]] = field(default_factory=dict)
+    extra_doc_rows: dict[str, list[int]] = field(default_factory=dict)
+    live_count: int = 0
+    total_len: int = 0
+    applied_deltas: list[str] = field(default_factory=list)
+    _average_idf: float | None = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def base_count(self) -> int:
+        return self.base.row_count if self.base is not None else 0
+
+    @property
+    def row_count(self) -> int:
+        return self.base_count + len(self.extra_chunk_ids)
+
+    @property
+    def dead_count(self) -> int:
+        return self.row_count - self.live_count
+
+    @property
+    def chunk_ids(self) -> list[str]:
+        return [self.row_chunk_id(row) for row in range(self.row_count)]
+
+    def row_chunk_id(self, row: int) -> str:
+        if row < self.base_count:
+            return self.base.chunk_ids[row].decode("utf-8")
+        return self.extra_chunk_ids[row - self.base_count]
+
+    def row_doc_id(self, row: int) -> str:
+        if row < self.base_count:
+            return self.base.doc_ids[int(self.base.row_docs[row])]
+        return self.extra_doc_ids[row - self.base_count]
+
+    def live_mask(self) -> np.ndarray:
+        return np.concatenate([~self.base_dead, np.array(self.extra_live, dtype=bool)])
+
+    def add_document(self, doc_id: str, rows: list[dict]) -> None:
+        self.remove_document(doc_id)
+        self._average_idf = None
+        for row in rows:
+            local = len(self.extra_chunk_ids)
+            self.extra_chunk_ids.append(row["chunk_id"])
+            self.extra_doc_ids.append(doc_id)
+            self.extra_lens.append(row["length"])
+            self.extra_live.append(True)
+            self.extra_doc_rows.setdefault(doc_id, []).append(local)
+            for term, tf in row["terms"].items():
+                self.extra_postings.setdefault(term, []).append((local, tf))
+            self.live_count += 1
+            self.total_len += row["length"]
+
+    def remove_document(self, doc_id: str) -> int:
+        self._average_idf = None
+        removed = 0
+        doc_index = self.base_doc_index.pop(doc_id, None)
+        if doc_index is not None and self.base is not None:
+            start = int(self.base.doc_offsets[doc_index])
+            end = int(self.base.doc_offsets[doc_index + 1])
+            alive = ~self.base_dead[start:end]
+            removed += int(alive.sum())
+            self.total_len -= int(self.base.doc_lens[start:end][alive].sum())
+            self.base_dead[start:end] = True
+        for local in self.extra_doc_rows.pop(doc_id, []):
+            if not self.extra_live[local]:
+                continue
+            self.extra_live[local] = False
+            self.total_len -= self.extra_lens[local]
+            removed += 1
+        self.live_count -= removed
+        return removed
+
+    def scope_mask(self, doc_ids: set[str] | None = None) -> np.ndarray:
+        """Live rows, optionally restricted to ``doc_ids`` via their contiguous row ranges."""
+        if doc_ids is None:
+            return self.live_mask()
+        mask = np.zeros(self.row_count, dtype=bool)
+        for doc_id in doc_ids:
+            doc_index = self.base_doc_index.get(doc_id)
+            if doc_index is not None:
+                start = int(self.base.doc_offsets[doc_index])
+                end = int(self.base.doc_offsets[doc_index + 1])
+                mask[start:end] = True
+            for local in self.extra_doc_rows.get(doc_id, []):
+                mask[self.base_count + local] = True
+        return mask & self.live_mask()
+
+    def average_idf(self) -> float:
+        """Mean Okapi IDF over every term with a live posting."""
+        if self._average_idf is None:
+            dfs: dict[str, int] = {}
+            if self.base is not None and self.base.terms:
+                entries = list(self.base.terms.items())
+                starts = np.array([offset for _, (offset, _count) in entries], dtype=np.int64)
+                live = ~self.base_dead[np.asarray(self.base.postings_rows)]
+                counts = np.add.reduceat(live.astype(np.int64), starts)
+                dfs = {term: int(count) for (term, _), count in zip(entries, counts)}
+            for term, postings in self.extra_postings.items():
+                alive = sum(1 for local, _ in postings if self.extra_live[local])
+                if alive:
+                    dfs[term] = dfs.get(term, 0) + alive
+            df = np.array([count for count in dfs.values() if count], dtype=np.float64)
+            self._average_idf = float(_okapi_idf(self.live_count, df).mean()) if df.size else 0.0
+        return self._average_idf
+
+    def _term_weights(
+        self, term: str, avgdl: float, extra_lens: np.ndarray, extra_live: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray] | None:
+        base_rows, base_tfs = (
+            self.base.postings(term) if self.base is not None else (_EMPTY_ROWS, _EMPTY_TFS)
+        )
+        extra = self.extra_postings.get(term, [])
+        extra_rows = np.fromiter((row for row, _ in extra), dtype=np.int64, count=len(extra))
+        extra_tfs = np.fromiter((tf for _, tf in extra), dtype=np.float64, count=len(extra))
+        # Document frequency is corpus-wide so scoped queries rank like unscoped ones.
+        df = int(np.count_nonzero(~self.base_dead[base_rows]))
+        df += int(np.count_nonzero(extra_live[extra_rows]))
+        if not df:
+            return None
+        idf = float(_okapi_idf(self.live_count, np.float64(df)))
+        if idf < 0:
+            idf = BM25_EPSILON * self.average_idf()
+        tf = base_tfs.astype(np.float64)
+        lens = self.base.doc_lens[base_rows].astype(np.float64) if base_rows.size else tf
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lens / avgdl)
+        base_weights = idf * tf * (BM25_K1 + 1) / (tf + norm)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * extra_lens[extra_rows] / avgdl)
+        extra_weights = idf * extra_tfs * (BM25_K1 + 1) / (extra_tfs + norm)
+        return (
+            np.concatenate([base_rows.astype(np.int64), extra_rows + self.base_count]),
+            np.concatenate([base_weights, extra_weights]),
+        )
+
+    def get_scores(self, tokens: list[str], mask: np.ndarray | None = None) -> np.ndarray:
+        """Score rows touched by the query terms' postings; rows outside ``mask`` stay 0."""
+        scores = self.get_scores_batch([tokens])[0]
+        if mask is not None:
+            scores[~mask] = 0.0
+        return scores
+
+    def get_scores_batch(self, token_lists: list[list[str]]) -> np.ndarray:
+        """One row of scores per query; each distinct term's postings are weighted once.
+
+        A term repeated in a query counts once per occurrence, as in rank_bm25.
+        """
+        scores = np.zeros((len(token_lists), self.row_count), dtype=np.float64)
+        if not self.live_count:
+            return scores
+        avgdl = self.total_len / self.live_count or 1.0
+        extra_lens = np.asarray(self.extra_lens, dtype=np.float64)
+        extra_live = np.asarray(self.extra_live, dtype=bool)
+        weights: dict[str, tuple[np.ndarray, np.ndarray] | None] = {}
+        for position, tokens in enumerate(token_lists):
+            for term, repeats in Counter(tokens).items():
+                if term not in weights:
+                    weights[term] = self._term_weights(term, avgdl, extra_lens, extra_live)
+                entry = weights[term]
+                if entry is not None:
+                    scores[position, entry[0]] += entry[1] * repeats
+        return scores
+
+
+def _okapi_idf(count: int, df: np.ndarray) -> np.ndarray:
+    return np.log(count - df + 0.5) - np.log(df + 0.5)
+
+
+def select_top_k(scores: np.ndarray, mask: np.ndarray, top_k: int) -> np.ndarray:
+    """Rows in ``mask`` ordered by descending score, ties broken by row order.
 
+    Matching rows are selected with ``argpartition``; if fewer than ``top_k``
+    rows match, the remainder is padded with unmatched rows in row order.
+    """
+    if top_k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    matched = np.flatnonzero(mask & (scores > 0))
+    if matched.size > top_k:
+        matched_scores = scores[matched]
+        kth = matched.size - top_k
+        part = np.argpartition(matched_scores, kth)[kth:]
+        # Keep every row tied with the cut-off so tie-breaking stays deterministic.
+        threshold = matched_scores[part].min()
+        matched = matched[matched_scores >= threshold]
+    order = np.lexsort((matched, -scores[matched]))
+    picked = matched[order][:top_k]
+    if picked.size < top_k:
+        padding = np.flatnonzero(mask & ~(scores > 0))[: top_k - picked.size]
+        picked = np.concatenate([picked, padding])
+    return picked
 
-def _tokenize(text: str) -> list[str]:
+
+@dataclass
+class _CachedIndex:
+    index: BM25Index
+    stamp: tuple
+    checked_at: float
+
+
+def tokenize(text: str) -> list[str]:
     return re.findall(r"\w+", text.lower())
 
 
-def _index_path(workspace_id: str) -> Path:
-    return get_workspaces_dir() / workspace_id / "index" / "bm25" / "index.pkl"
+def _analyze(chunk_id: str, text: str) -> dict:
+    tokens = tokenize(text)
+    return {"chunk_id": chunk_id, "length": len(tokens), "terms": dict(Counter(tokens))}
 
 
-def build_bm25_index(workspace_id: str) -> Path:
+def _index_dir(workspace_id: str) -> Path:
+    return get_workspaces_dir() / workspace_id / "index" / "bm25"
+
+
+def _current_path(workspace_id: str) -> Path:
+    return _index_dir(workspace_id) / "CURRENT"
+
+
+def _current_segment(workspace_id: str) -> Path | None:
+    try:
+        name = _current_path(workspace_id).read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+    return _index_dir(workspace_id) / name if name else None
+
+
+def bm25_index_exists(workspace_id: str) -> bool:
+    segment = _current_segment(workspace_id)
+    return segment is not None and segment.exists()
+
+
+def _delta_paths(workspace_id: str) -> list[Path]:
+    directory = _index_dir(workspace_id)
+    if not directory.exists():
+        return []
+    return sorted(directory.glob("delta-*.json"))
+
+
+def _cache_size() -> int:
+    return max(int(os.getenv("STUDYFLOW_BM25_CACHE_SIZE", "4")), 0)
+
+
+def _cache_recheck_seconds() -> float:
+    return float(os.getenv("STUDYFLOW_BM25_CACHE_RECHECK", "5"))
+
+
+def _index_stamp(workspace_id: str) -> tuple | None:
+    segment = _current_segment(workspace_id)
+    if segment is None:
+        return None
+    return (segment.name, tuple(p.name for p in _delta_paths(workspace_id)))
+
+
+def invalidate_bm25_cache(workspace_id: str | None = None) -> None:
+    with _CACHE_LOCK:
+        if workspace_id is None:
+            _CACHE.clear()
+        else:
+            _CACHE.pop(workspace_id, None)
+
+
+def _cache_put(workspace_id: str, index: BM25Index, stamp: tuple | None) -> None:
+    limit = _cache_size()
+    if stamp is None or limit == 0:
+        return
+    with _CACHE_LOCK:
+        _CACHE[workspace_id] = _CachedIndex(
+            index=index, stamp=stamp, checked_at=time.monotonic()
+        )
+        _CACHE.move_to_end(workspace_id)
+        while len(_CACHE) > limit:
+            _CACHE.popitem(last=False)
+
+
+def _cache_get(workspace_id: str) -> BM25Index | None:
+    with _CACHE_LOCK:
+        entry = _CACHE.get(workspace_id)
+        if entry is None:
+            return None
+        _CACHE.move_to_end(workspace_id)
+        now = time.monotonic()
+        if now - entry.checked_at < _cache_recheck_seconds():
+            return entry.index
+    # Another process may have rewritten the index; revalidate outside the lock.
+    stamp = _index_stamp(workspace_id)
+    with _CACHE_LOCK:
+        current = _CACHE.get(workspace_id)
+        if current is not entry:
+            return current.index if current else None
+        if stamp != entry.stamp:
+            _CACHE.pop(workspace_id, None)
+            return None
+        entry.checked_at = now
+        return entry.index
+
+
+def _compact_every() -> int:
+    return max(int(os.getenv("STUDYFLOW_BM25_COMPACT_EVERY", "32")), 1)
+
+
+def _compact_dead_ratio() -> float:
+    return float(os.getenv("STUDYFLOW_BM25_COMPACT_DEAD_RATIO", "0.25"))
+
+
+def _fetch_chunk_texts(workspace_id: str, doc_id: str | None = None) -> list[dict]:
+    query = """
+        SELECT chunks.id as chunk_id,
+               chunks.doc_id as doc_id,
+               chunks.text as text
+        FROM chunks
+        JOIN documents ON documents.id = chunks.doc_id
+        WHERE chunks.workspace_id = ?
+        """
+    params: tuple = (workspace_id,)
+    if doc_id:
+        query += " AND chunks.doc_id = ?"
+        params = (workspace_id, doc_id)
+    query += " ORDER BY chunks.doc_id, chunks.chunk_index"
     with get_connection() as connection:
-        rows = connection.execute(
-            """
-            SELECT chunks.id as chunk_id,
-                   chunks.doc_id as doc_id,
-                   chunks.workspace_id as workspace_id,
-                   chunks.page_start as page_start,
-                   chunks.page_end as page_end,
-                   chunks.text as text,
-                   documents.filename as filename,
-                   documents.file_type as file_type,
-                   documents.doc_type as doc_type
-            FROM chunks
-            JOIN documents ON documents.id = chunks.doc_id
-            WHERE chunks.workspace_id = ?
-            ORDER BY chunks.doc_id, chunks.chunk_index
-            """,
-            (workspace_id,),
-        ).fetchall()
-    chunks = [dict(row) for row in rows]
-    if not chunks:
-        raise RuntimeError("No chunks available for BM25 index.")
+        rows = connection.execute(query, params).fetchall()
+    return [dict(row) for row in rows]
+
+
+def _open_segment(directory: Path) -> BM25Segment | None:
+    try:
+        meta = json.loads((directory / "meta.json").read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    if meta.get("format") != FORMAT_VERSION:
+        return None
+
+    def _array(name: str) -> np.ndarray:
+        return np.load(directory / f"{name}.npy", mmap_mode="r")
+
+    return BM25Segment(
+        directory=directory,
+        terms=json.loads((directory / "terms.json").read_text(encoding="utf-8")),
+        postings_rows=_array("postings_rows"),
+        postings_tfs=_array("postings_tfs"),
+        doc_lens=_array("doc_lens"),
+        chunk_ids=_array("chunk_ids"),
+        row_docs=_array("row_docs"),
+        doc_ids=json.loads((directory / "doc_ids.json").read_text(encoding="utf-8")),
+        doc_offsets=np.load(directory / "doc_offsets.npy"),
+        total_len=int(meta["total_len"]),
+    )
+
+
+def _write_segment(workspace_id: str, index: BM25Index) -> Path:
+    """Fold live base rows and delta rows into a fresh segment directory."""
+    base_count = index.base_count
+    base_live = np.flatnonzero(~index.base_dead)
+    base_remap = np.full(base_count, -1, dtype=np.int64)
+    base_remap[base_live] = np.arange(base_live.size)
+    extra_live = [local for local, alive in enumerate(index.extra_live) if alive]
+    extra_remap = {local: base_live.size + offset for offset, local in enumerate(extra_live)}
+
+    chunk_ids: list[str] = [index.row_chunk_id(int(row)) for row in base_live]
+    chunk_ids.extend(index.extra_chunk_ids[local] for local in extra_live)
+    row_doc_names: list[str] = [index.row_doc_id(int(row)) for row in base_live]
+    row_doc_names.extend(index.extra_doc_ids[local] for local in extra_live)
+    doc_lens = np.concatenate(
+        [
+            index.base.doc_lens[base_live].astype(np.int32)
+            if index.base is not None
+            else np.zeros(0, dtype=np.int32),
+            np.array([index.extra_lens[local] for local in extra_live], dtype=np.int32),
+        ]
+    )
 
-    corpus = [chunk["text"] for chunk in chunks]
-    tokenized = [_tokenize(text) for text in corpus]
-    bm25 = BM25Okapi(tokenized)
+    doc_ids: list[str] = []
+    doc_offsets: list[int] = []
+    row_docs = np.zeros(len(row_doc_names), dtype=np.int32)
+    for row, doc_id in enumerate(row_doc_names):
+        if not doc_ids or doc_ids[-1] != doc_id:
+            doc_ids.append(doc_id)
+            doc_offsets.append(row)
+        row_docs[row] = len(doc_ids) - 1
+    doc_offsets.append(len(row_doc_names))
 
-    index = BM25Index(
-        bm25=bm25,
-        chunk_ids=[chunk["chunk_id"] for chunk in chunks],
-        metadatas=[
+    terms: dict[str, list[int]] = {}
+    row_parts: list[np.ndarray] = []
+    tf_parts: list[np.ndarray] = []
+    offset = 0
+    base_terms = index.base.terms if index.base is not None else {}
+    for term in sorted(set(base_terms) | set(index.extra_postings)):
+        parts_rows: list[np.ndarray] = []
+        parts_tfs: list[np.ndarray] = []
+        if term in base_terms:
+            rows, tfs = index.base.postings(term)
+            mapped = base_remap[rows]
+            keep = mapped >= 0
+            parts_rows.append(mapped[keep])
+            parts_tfs.append(np.asarray(tfs)[keep])
+        extra = [
+            (extra_remap[local], tf)
+            for local, tf in index.extra_postings.get(term, [])
+            if local in extra_remap
+        ]
+        if extra:
+            parts_rows.append(np.array([row for row, _ in extra], dtype=np.int64))
+            parts_tfs.append(np.array([min(tf, 65535) for _, tf in extra], dtype=np.uint16))
+        count = sum(part.size for part in parts_rows)
+        if not count:
+            continue
+        terms[term] = [offset, count]
+        row_parts.extend(parts_rows)
+        tf_parts.extend(parts_tfs)
+        offset += count
+
+    directory = _index_dir(workspace_id)
+    segment = directory / f"seg-{time.time_ns():020d}"
+    segment.mkdir(parents=True, exist_ok=True)
+    np.save(
+        segment / "postings_rows.npy",
+        np.concatenate(row_parts).astype(np.int32) if row_parts else _EMPTY_ROWS,
+    )
+    np.save(
+        segment / "postings_tfs.npy",
+        np.concatenate(tf_parts).astype(np.uint16) if tf_parts else _EMPTY_TFS,
+    )
+    np.save(segment / "doc_lens.npy", doc_lens)
+    np.save(segment / "chunk_ids.npy", np.array([cid.encode("utf-8") for cid in chunk_ids], dtype="S"))
+    np.save(segment / "row_docs.npy", row_docs)
+    np.save(segment / "doc_offsets.npy", np.array(doc_offsets, dtype=np.int64))
+    (segment / "terms.json").write_text(json.dumps(terms, ensure_ascii=False), encoding="utf-8")
+    (segment / "doc_ids.json").write_text(json.dumps(doc_ids), encoding="utf-8")
+    (segment / "meta.json").write_text(
+        json.dumps(
             {
-                "chunk_id": chunk["chunk_id"],
-                "doc_id": chunk["doc_id"],
-                "workspace_id": chunk["workspace_id"],
-                "filename": chunk["filename"],
-                "file_type": chunk.get("file_type"),
-                "doc_type": chunk.get("doc_type") or "other",
-                "page_start": chunk["page_start"],
-                "page_end": chunk["page_end"],
-                "text": chunk["text"],
+                "format": FORMAT_VERSION,
+                "row_count": len(chunk_ids),
+                "total_len": int(doc_lens.sum()),
+                "k1": BM25_K1,
+                "b": BM25_B,
             }
-            for chunk in chunks
-        ],
+        ),
+        encoding="utf-8",
     )
 
-    path = _index_path(workspace_id)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("wb") as handle:
-        pickle.dump(index, handle)
-    return path
+    current = _current_path(workspace_id)
+    tmp_current = current.with_suffix(".tmp")
+    tmp_current.write_text(segment.name, encoding="utf-8")
+    tmp_current.replace(current)
+    for delta_name in index.applied_deltas:
+        (directory / delta_name).unlink(missing_ok=True)
+    for stale in directory.glob("seg-*"):
+        if stale.name != segment.name:
+            shutil.rmtree(stale, ignore_errors=True)
+    # Files left behind by the pickle-based format.
+    (directory / "index.pkl").unlink(missing_ok=True)
+    for legacy_delta in directory.glob("delta-*.pkl"):
+        legacy_delta.unlink(missing_ok=True)
+    return segment
+
+
+def _apply_delta(index: BM25Index, delta: dict) -> None:
+    if delta["op"] == "remove":
+        index.remove_document(delta["doc_id"])
+    elif delta["op"] == "add":
+        index.add_document(delta["doc_id"], delta["rows"])
+
+
+def _index_from_segment(segment: BM25Segment) -> BM25Index:
+    return BM25Index(
+        base=segment,
+        base_dead=np.zeros(segment.row_count, dtype=bool),
+        base_doc_index={doc_id: position for position, doc_id in enumerate(segment.doc_ids)},
+        live_count=segment.row_count,
+        total_len=segment.total_len,
+    )
+
+
+def build_bm25_index(workspace_id: str) -> Path:
+    chunks = _fetch_chunk_texts(workspace_id)
+    if not chunks:
+        raise RuntimeError("No chunks available for BM25 index.")
+    index = BM25Index()
+    rows_by_doc: dict[str, list[dict]] = {}
+    for chunk in chunks:
+        rows_by_doc.setdefault(chunk["doc_id"], []).append(
+            _analyze(chunk["chunk_id"], chunk["text"])
+        )
+    for doc_id, rows in rows_by_doc.items():
+        index.add_document(doc_id, rows)
+    index.applied_deltas = [path.name for path in _delta_paths(workspace_id)]
+    with _WRITE_LOCK:
+        segment = _write_segment(workspace_id, index)
+        invalidate_bm25_cache(workspace_id)
+    bump_index_generation(workspace_id)
+    return segment
+
+
+def _read_index(workspace_id: str, *, cache: bool = True) -> BM25Index | None:
+    stamp = _index_stamp(workspace_id)
+    segment_dir = _current_segment(workspace_id)
+    if segment_dir is None:
+        return None
+    segment = _open_segment(segment_dir)
+    if segment is None:
+        return None
+    index = _index_from_segment(segment)
+    for delta_path in _delta_paths(workspace_id):
+        try:
+            delta = json.loads(delta_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            # Folded into a newer segment by a concurrent compaction.
+            return _read_index(workspace_id, cache=cache)
+        _apply_delta(index, delta)
+        index.applied_deltas.append(delta_path.name)
+    if cache:
+        _cache_put(workspace_id, index, stamp)
+    return index
 
 
 def load_bm25_index(workspace_id: str) -> BM25Index | None:
-    path = _index_path(workspace_id)
-    if not path.exists():
+    cached = _cache_get(workspace_id)
+    if cached is not None:
+        return cached
+    return _read_index(workspace_id)
+
+
+def compact_bm25_index(workspace_id: str) -> Path | None:
+    with _WRITE_LOCK:
+        # Compact a private copy so cached readers never see rows shift underneath them.
+        index = _read_index(workspace_id, cache=False)
+        if index is None:
+            return None
+        segment = _write_segment(workspace_id, index)
+        invalidate_bm25_cache(workspace_id)
+        return segment
+
+
+def _append_delta(workspace_id: str, delta: dict) -> Path:
+    with _WRITE_LOCK:
+        directory = _index_dir(workspace_id)
+        delta_path = directory / f"delta-{time.time_ns():020d}.json"
+        tmp_path = delta_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(delta, ensure_ascii=False), encoding="utf-8")
+        tmp_path.replace(delta_path)
+        invalidate_bm25_cache(workspace_id)
+        delta_count = len(_delta_paths(workspace_id))
+    if delta_count >= _compact_every():
+        compact_bm25_index(workspace_id)
+    return delta_path
+
+
+def _maybe_compact_dead(workspace_id: str) -> None:
+    index = load_bm25_index(workspace_id)
+    if index is None or not index.row_count:
+        return
+    if index.dead_count / index.row_count > _compact_dead_ratio():
+        compact_bm25_index(workspace_id)
+
+
+def add_document_to_bm25_index(workspace_id: str, doc_id: str) -> Path:
+    if not bm25_index_exists(workspace_id):
+        return build_bm25_index(workspace_id)
+    rows = [
+        _analyze(chunk["chunk_id"], chunk["text"])
+        for chunk in _fetch_chunk_texts(workspace_id, doc_id)
+    ]
+    return _append_delta(workspace_id, {"op": "add", "doc_id": doc_id, "rows": rows})
+
+
+def remove_document_from_bm25_index(workspace_id: str, doc_id: str) -> Path | None:
+    if not bm25_index_exists(workspace_id):
         return None
-    with path.open("rb") as handle:
-        return pickle.load(handle)
+    path = _append_delta(workspace_id, {"op": "remove", "doc_id": doc_id})
+    _maybe_compact_dead(workspace_id)
+    return path
+
+
+def _doc_ids_for_types(workspace_id: str, doc_types: list[str]) -> set[str]:
+    placeholders = ",".join(["?"] * len(doc_types))
+    with get_connection() as connection:
+        rows = connection.execute(
+            f"""
+            SELECT id FROM documents
+            WHERE workspace_id = ? AND doc_type IN ({placeholders})
+            """,
+            (workspace_id, *doc_types),
+        ).fetchall()
+    return {row["id"] for row in rows}
 
 
 def query_bm25(
@@ -95,6 +664,30 @@ def query_bm25(
     doc_ids: list[str] | None = None,
     doc_types: list[str] | None = None,
 ) -> list[dict]:
+    return query_bm25_batch(
+        workspace_id=workspace_id,
+        queries=[query],
+        top_k=top_k,
+        scopes=[doc_ids],
+        doc_types=doc_types,
+    )[0]
+
+
+def query_bm25_batch(
+    *,
+    workspace_id: str,
+    queries: list[str],
+    top_k: int = 20,
+    scopes: list[list[str] | None],
+    doc_types: list[str] | None = None,
+    hydrate: bool = True,
+    scope_tag: str | None = None,
+) -> list[list[dict]]:
+    """BM25 results per query; ``scopes[i]`` restricts query ``i`` to those doc_ids.
+
+    With ``hydrate=False`` only ids, doc ids and scores are filled in; the
+    caller hydrates whichever results it keeps.
+    """
     index = load_bm25_index(workspace_id)
     if index is None:
         build_bm25_index(workspace_id)
@@ -102,25 +695,60 @@ def query_bm25(
         if index is None:
             raise RuntimeError("Failed to load BM25 index.")
 
-    scores = index.bm25.get_scores(_tokenize(query))
-    scored = list(zip(index.metadatas, scores))
-    if doc_ids:
-        scored = [item for item in scored if item[0]["doc_id"] in doc_ids]
-    if doc_types:
-        scored = [item for item in scored if item[0].get("doc_type") in doc_types]
-    scored.sort(key=lambda x: x[1], reverse=True)
-    results = []
-    for metadata, score in scored[:top_k]:
-        results.append(
-            {
-                "chunk_id": metadata["chunk_id"],
-                "doc_id": metadata["doc_id"],
-                "workspace_id": metadata["workspace_id"],
-                "filename": metadata["filename"],
-                "page_start": metadata["page_start"],
-                "page_end": metadata["page_end"],
-                "text": metadata["text"],
-                "score": float(score),
-            }
+    # doc_type can change after indexing (course/paper linking), so resolve it from SQLite.
+    typed = _doc_ids_for_types(workspace_id, doc_types) if doc_types else None
+    if scope_tag:
+        members = set(scope_doc_ids(scope_tag))
+        typed = members if typed is None else typed & members
+    texts = list(dict.fromkeys(queries))
+    scores = index.get_scores_batch([tokenize(text) for text in texts])
+    masks: dict[tuple, np.ndarray] = {}
+    picks: list[tuple[np.ndarray, list[int]]] = []
+    for query, scope in zip(queries, scopes):
+        key = tuple(scope) if scope else ()
+        if key not in masks:
+            allowed: set[str] | None = set(scope) if scope else None
+            if typed is not None:
+                allowed = typed if allowed is None else allowed & typed
+            masks[key] = index.scope_mask(allowed)
+        row_scores = scores[texts.index(query)]
+        picks.append((row_scores, [int(row) for row in select_top_k(row_scores, masks[key], top_k)]))
+
+    hydrated = None
+    if hydrate:
+        hydrated = hydrate_chunks(
+            [index.row_chunk_id(row) for _, picked in picks for row in picked]
         )
-    return results
+    batches: list[list[dict]] = []
+    for row_scores, picked in picks:
+        results = []
+        for row in picked:
+            chunk_id = index.row_chunk_id(row)
+            if hydrated is None:
+                chunk = {
+                    "doc_id": index.row_doc_id(row),
+                    "workspace_id": workspace_id,
+                    "filename": "",
+                    "page_start": 0,
+                    "page_end": 0,
+                    "text": "",
+                }
+            else:
+                chunk = hydrated.get(chunk_id)
+                if chunk is None:
+                    continue
+            results.append(
+                {
+                    "chunk_id": chunk_id,
+                    "doc_id": chunk["doc_id"],
+                    "workspace_id": chunk["workspace_id"],
+                    "filename": chunk["filename"],
+                    "file_type": chunk.get("file_type"),
+                    "page_start": chunk["page_start"],
+                    "page_end": chunk["page_end"],
+                    "text": chunk["text"],
+                    "score": float(row_scores[row]),
+                }
+            )
+        batches.append(results)
+    return batches
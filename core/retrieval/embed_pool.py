@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+_POOL: ProcessPoolExecutor | None = None
+_POOL_KEY: tuple | None = None
+_LOCK = threading.Lock()
+_WORKER_MODEL = None
+
+
+def _worker_init(model_name: str, cache_dir: str | None, threads: int) -> None:
+    global _WORKER_MODEL
+    # Pin intra-op parallelism before torch spins up its pools.
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(threads)
+    _WORKER_MODEL = SentenceTransformer(model_name, cache_folder=cache_dir)
+
+
+def _worker_encode(texts: list[str]) -> list[list[float]]:
+    embeddings = _WORKER_MODEL.encode(
+        texts,
+        show_progress_bar=False,
+        normalize_embeddings=True,
+        batch_size=len(texts),
+    )
+    return [emb.tolist() for emb in embeddings]
+
+
+def get_embed_pool(model_name: str, cache_dir: str | None, processes: int) -> ProcessPoolExecutor:
+    """Return the process pool for this model, replacing one built for another."""
+    global _POOL, _POOL_KEY
+    key = (model_name, cache_dir, processes)
+    with _LOCK:
+        if _POOL is not None and _POOL_KEY == key:
+            return _POOL
+        previous = _POOL
+        threads = max((os.cpu_count() or processes) // processes, 1)
+        _POOL = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_worker_init,
+            initargs=(model_name, cache_dir, threads),
+        )
+        _POOL_KEY = key
+    if previous is not None:
+        previous.shutdown(wait=False, cancel_futures=True)
+    return _POOL
+
+
+def encode_with_pool(
+    batches: list[list[str]],
+    model_name: str,
+    cache_dir: str | None,
+    processes: int,
+) -> list[list[list[float]]]:
+    """Encode each batch on the pool; returns one list of vectors per batch."""
+    pool = get_embed_pool(model_name, cache_dir, processes)
+    try:
+        return list(pool.map(_worker_encode, batches))
+    except BrokenProcessPool:
+        shutdown_embed_pool(wait=False)
+        raise
+
+
+def shutdown_embed_pool(wait: bool = True) -> None:
+    global _POOL, _POOL_KEY
+    with _LOCK:
+        pool = _POOL
+        _POOL = None
+        _POOL_KEY = None
+    if pool is not None:
+        try:
+            pool.shutdown(wait=wait, cancel_futures=True)
+        except Exception:
+            pass
+
+
+atexit.register(shutdown_embed_pool)
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from core.telemetry.metrics import incr
+
+DEFAULT_PORT = 8765
+# After a failed call, go straight to in-process encoding for this long.
+_RETRY_AFTER_S = 30.0
+_unavailable_until = 0.0
+
+
+def _wait_s() -> float:
+    return max(float(os.getenv("STUDYFLOW_EMBED_SERVER_WAIT_MS", "5")), 0.0) / 1000
+
+
+def _max_batch() -> int:
+    return max(int(os.getenv("STUDYFLOW_EMBED_SERVER_MAX_BATCH", "256")), 1)
+
+
+@dataclass
+class _Request:
+    texts: list[str]
+    done: threading.Event = field(default_factory=threading.Event)
+    vectors: list[list[float]] | None = None
+    error: str | None = None
+
+
+class MicroBatcher:
+    """Merge concurrent embed requests into one encoder call.
+
+    The first request opens a window of ``STUDYFLOW_EMBED_SERVER_WAIT_MS``;
+    everything that arrives before it closes (up to the max batch) is encoded
+    together and the vectors are handed back per request.
+    """
+
+    def __init__(self, settings) -> None:
+        self.settings = settings
+        self._pending: list[_Request] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self.batches = 0
+        self.requests = 0
+        self._thread = threading.Thread(target=self._loop, name="sf-embed-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, texts: list[str]) -> list[list[float]]:
+        request = _Request(texts=texts)
+        with self._cond:
+            self._pending.append(request)
+            self._cond.notify()
+        request.done.wait()
+        if request.error is not None:
+            raise RuntimeError(request.error)
+        return request.vectors or []
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _take(self) -> list[_Request]:
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                return []
+            deadline = time.monotonic() + _wait_s()
+            limit = _max_batch()
+            while sum(len(item.texts) for item in self._pending) < limit:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            taken: list[_Request] = []
+            kept: list[_Request] = []
+            size = 0
+            for item in self._pending:
+                if not taken or size + len(item.texts) <= limit:
+                    taken.append(item)
+                    size += len(item.texts)
+                else:
+                    kept.append(item)
+            self._pending = kept
+            return taken
+
+    def _loop(self) -> None:
+        from core.retrieval.embedder import embed_texts
+
+        while True:
+            taken = self._take()
+            if not taken:
+                return
+            texts = [text for item in taken for text in item.texts]
+            try:
+                vectors = embed_texts(texts, self.settings)
+            except Exception as exc:
+                for item in taken:
+                    item.error = str(exc)
+                    item.done.set()
+                continue
+            self.batches += 1
+            self.requests += len(taken)
+            offset = 0
+            for item in taken:
+                item.vectors = vectors[offset : offset + len(item.texts)]
+                offset += len(item.texts)
+                item.done.set()
+
+
+def _handler(batcher: MicroBatcher):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status: int, payload: dict) -> None:
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            if self.path != "/health":
+                self._reply(404, {"error": "not found"})
+                return
+            self._reply(
+                200,
+                {
+                    "status": "ok",
+                    "model": batcher.settings.model,
+                    "batches": batcher.batches,
+                    "requests": batcher.requests,
+                },
+            )
+
+        def do_POST(self) -> None:
+            if self.path != "/embed":
+                self._reply(404, {"error": "not found"})
+                return
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                # Only the model the server started with is served; clients never
+                # get to make it download or load another one.
+                if payload["model"] != batcher.settings.model:
+                    raise ValueError(f"model {payload['model']!r} is not served here")
+                vectors = batcher.submit(list(payload["texts"]))
+            except (KeyError, TypeError, ValueError) as exc:
+                self._reply(400, {"error": str(exc)})
+                return
+            except RuntimeError as exc:
+                self._reply(500, {"error": str(exc)})
+                return
+            self._reply(200, {"vectors": vectors})
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+    return Handler
+
+
+def create_server(host: str, port: int, settings) -> ThreadingHTTPServer:
+    """Build (but do not start) an embedding server encoding in this process."""
+    server = ThreadingHTTPServer((host, port), _handler(MicroBatcher(settings)))
+    server.daemon_threads = True
+    return server
+
+
+def remote_embed(texts: list[str], model: str, url: str) -> list[list[float]] | None:
+    """Embed through the server at ``url``; None when it cannot be reached."""
+    global _unavailable_until
+    if time.monotonic() < _unavailable_until:
+        return None
+    try:
+        response = requests.post(
+            f"{url.rstrip('/')}/embed",
+            json={"model": model, "texts": texts},
+            timeout=(0.5, float(os.getenv("STUDYFLOW_EMBED_SERVER_TIMEOUT", "120"))),
+        )
+    except requests.RequestException:
+        _unavailable_until = time.monotonic() + _RETRY_AFTER_S
+        incr("embed_server.fallbacks")
+        return None
+    if response.status_code != 200:
+        incr("embed_server.fallbacks")
+        return None
+    try:
+        vectors = response.json()["vectors"]
+    except (ValueError, KeyError, TypeError):
+        vectors = None
+    if not isinstance(vectors, list) or len(vectors) != len(texts):
+        incr("embed_server.fallbacks")
+        return None
+    incr("embed_server.requests")
+    return vectors
@@ -8,6 +8,10 @@ from functools import lru_cache
 
 from sentence_transformers import SentenceTransformer
 
+from core.retrieval.embed_pool import encode_with_pool
+from core.retrieval.embed_server import remote_embed
+from infra.cpu import physical_cores
+
 
 class EmbeddingError(RuntimeError):
     pass
@@ -19,6 +23,9 @@ class EmbeddingSettings:
     cache_dir: str | None = None
     batch_size: int = 32
     workers: int = 1
+    processes: int = 0
+    token_budget: int = 0
+    server_url: str | None = None
     max_retries: int = 2
     retry_base: float = 0.5
 
@@ -26,7 +33,9 @@ class EmbeddingSettings:
 def build_embedding_settings(
     *,
     model: str | None = None,
+    bulk: bool = False,
 ) -> EmbeddingSettings:
+    """Resolve embedding settings; ``bulk`` (index builds) enables the process pool."""
     resolved_model = (
         model
         if model is not None
@@ -41,7 +50,13 @@ def build_embedding_settings(
         )
 
     batch_size = int(os.getenv("STUDYFLOW_EMBED_BATCH_SIZE", "32"))
+    token_budget = int(os.getenv("STUDYFLOW_EMBED_TOKEN_BUDGET", "8192"))
+    server_url = os.getenv("STUDYFLOW_EMBED_SERVER_URL", "").strip() or None
     workers = int(os.getenv("STUDYFLOW_EMBED_WORKERS", "1"))
+    processes = 0
+    if bulk:
+        value = os.getenv("STUDYFLOW_EMBED_PROCESSES", "0").strip().lower()
+        processes = physical_cores() if value == "auto" else int(value or 0)
     max_retries = int(os.getenv("STUDYFLOW_EMBED_MAX_RETRIES", "2"))
     retry_base = float(os.getenv("STUDYFLOW_EMBED_RETRY_BASE", "0.5"))
     return EmbeddingSettings(
@@ -49,6 +64,9 @@ def build_embedding_settings(
         cache_dir=cache_dir,
         batch_size=max(batch_size, 1),
         workers=max(workers, 1),
+        processes=max(processes, 0),
+        token_budget=max(token_budget, 0),
+        server_url=server_url,
         max_retries=max(max_retries, 0),
         retry_base=max(retry_base, 0.1),
     )
@@ -71,7 +89,7 @@ def _encode_batch(texts: list[str], settings: EmbeddingSettings) -> list[list[fl
                 texts,
                 show_progress_bar=False,
                 normalize_embeddings=True,
-                batch_size=settings.batch_size,
+                batch_size=len(texts),
             )
             return [emb.tolist() for emb in embeddings]
         except Exception as exc:
@@ -81,21 +99,75 @@ def _encode_batch(texts: list[str], settings: EmbeddingSettings) -> list[list[fl
     return []
 
 
+# Rough word-piece estimate; only used to group texts of similar length.
+_CHARS_PER_TOKEN = 4
+_MAX_TOKENS_PER_TEXT = 512
+_MAX_BATCH = 256
+
+
+def _estimate_tokens(text: str) -> int:
+    return min(max(len(text) // _CHARS_PER_TOKEN, 1), _MAX_TOKENS_PER_TEXT)
+
+
+def plan_batches(texts: list[str], batch_size: int, token_budget: int) -> list[list[int]]:
+    """Group text positions into encoder batches.
+
+    With a ``token_budget`` texts are sorted longest first and each batch is
+    grown while ``len(batch) * longest`` (the padded size) stays within the
+    budget, so short slide lines are not padded to paragraph length. Without
+    one, fixed ``batch_size`` slices in input order are returned.
+    """
+    if token_budget <= 0:
+        return [
+            list(range(start, min(start + batch_size, len(texts))))
+            for start in range(0, len(texts), batch_size)
+        ]
+    order = sorted(range(len(texts)), key=lambda index: -_estimate_tokens(texts[index]))
+    batches: list[list[int]] = []
+    current: list[int] = []
+    longest = 0
+    for index in order:
+        tokens = _estimate_tokens(texts[index])
+        if current and (
+            max(longest, tokens) * (len(current) + 1) > token_budget
+            or len(current) >= _MAX_BATCH
+        ):
+            batches.append(current)
+            current = []
+            longest = 0
+        current.append(index)
+        longest = max(longest, tokens)
+    if current:
+        batches.append(current)
+    return batches
+
+
 def embed_texts(
     texts: list[str],
     settings: EmbeddingSettings,
 ) -> list[list[float]]:
     if not texts:
         return []
-    batch_size = settings.batch_size
-    batches = [texts[i : i + batch_size] for i in range(0, len(texts), batch_size)]
-    if settings.workers <= 1 or len(batches) == 1:
-        results: list[list[list[float]]] = []
-        for batch in batches:
-            results.append(_encode_batch(batch, settings))
-        return [item for batch in results for item in batch]
-    embeddings: list[list[float]] = []
-    with ThreadPoolExecutor(max_workers=settings.workers) as executor:
-        for batch in executor.map(lambda b: _encode_batch(b, settings), batches):
-            embeddings.extend(batch)
+    if settings.server_url:
+        vectors = remote_embed(texts, settings.model, settings.server_url)
+        if vectors is not None:
+            return vectors
+    plan = plan_batches(texts, settings.batch_size, settings.token_budget)
+    batches = [[texts[index] for index in positions] for positions in plan]
+    if settings.processes > 1 and len(batches) > 1:
+        try:
+            encoded = encode_with_pool(
+                batches, settings.model, settings.cache_dir, settings.processes
+            )
+        except Exception as exc:
+            raise EmbeddingError(f"Embedding worker pool failed: {exc}") from exc
+    elif settings.workers <= 1 or len(batches) == 1:
+        encoded = [_encode_batch(batch, settings) for batch in batches]
+    else:
+        with ThreadPoolExecutor(max_workers=settings.workers) as executor:
+            encoded = list(executor.map(lambda b: _encode_batch(b, settings), batches))
+    embeddings: list[list[float]] = [[] for _ in texts]
+    for positions, vectors in zip(plan, encoded):
+        for position, vector in zip(positions, vectors):
+            embeddings[position] = vector
     return embeddings
@@ -1,67 +1,235 @@
 from __future__ import annotations
 
-import json
+import hashlib
+import os
 import sqlite3
-from dataclasses import dataclass
-from datetime import datetime, timezone
+import threading
+import time
 from pathlib import Path
 
+import numpy as np
 
-@dataclass
-class CacheEntry:
-    key: str
-    vector: list[float]
-    model: str
-    created_at: str
+from core.telemetry.metrics import incr
+from infra.db import get_workspaces_dir
 
+# Stay well under SQLITE_MAX_VARIABLE_NUMBER (999 on older builds).
+_IN_CHUNK = 500
+_DTYPES = ("float32", "float16")
+# Cache hits only record last_used in memory; it reaches SQLite with the next
+# write, or once this many hits (or seconds) have piled up.
+_TOUCH_BATCH = 4096
+_TOUCH_INTERVAL_S = 60.0
 
-def _now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
 
+def embedding_cache_enabled() -> bool:
+    return os.getenv("STUDYFLOW_EMBED_CACHE", "on").lower() in ("1", "true", "on", "yes")
 
-def _ensure_db(path: Path) -> sqlite3.Connection:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    connection = sqlite3.connect(path)
-    connection.execute(
-        """
-        CREATE TABLE IF NOT EXISTS embeddings_cache (
-            key TEXT PRIMARY KEY,
-            vector_json TEXT NOT NULL,
-            model TEXT NOT NULL,
-            created_at TEXT NOT NULL
+
+def _max_bytes() -> int:
+    return max(int(float(os.getenv("STUDYFLOW_EMBED_CACHE_MAX_MB", "1024")) * 1024 * 1024), 0)
+
+
+def _dtype() -> str:
+    value = os.getenv("STUDYFLOW_EMBED_CACHE_DTYPE", "float32").strip().lower()
+    return value if value in _DTYPES else "float32"
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class EmbeddingStore:
+    """Content-addressed embedding vectors keyed by (model, sha256(text)).
+
+    One SQLite file (WAL mode) shared by every workspace; vectors are stored
+    as raw float32/float16 blobs and the least recently used rows are evicted
+    once the blobs exceed ``STUDYFLOW_EMBED_CACHE_MAX_MB``. The blob total is
+    kept in ``cache_size`` by triggers, so every process sees the same size.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._touched: dict[tuple[str, str], int] = {}
+        self._flushed_at = time.monotonic()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("BEGIN IMMEDIATE")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                dtype TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used INTEGER NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            ) WITHOUT ROWID
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)"
+        )
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache_size (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                bytes INTEGER NOT NULL
+            )
+            """
+        )
+        # Caches created before the counter existed are summed once here.
+        self._connection.execute(
+            """
+            INSERT OR IGNORE INTO cache_size (id, bytes)
+            SELECT 0, COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings
+            """
         )
-        """
-    )
-    connection.commit()
-    return connection
-
-
-def get_cached_embeddings(path: Path, keys: list[str]) -> dict[str, list[float]]:
-    if not keys or not path.exists():
-        return {}
-    connection = _ensure_db(path)
-    placeholders = ",".join(["?"] * len(keys))
-    rows = connection.execute(
-        f"SELECT key, vector_json FROM embeddings_cache WHERE key IN ({placeholders})",
-        tuple(keys),
-    ).fetchall()
-    connection.close()
-    return {row[0]: json.loads(row[1]) for row in rows}
-
-
-def put_cached_embeddings(path: Path, entries: list[CacheEntry]) -> None:
-    if not entries:
-        return
-    connection = _ensure_db(path)
-    connection.executemany(
-        """
-        INSERT OR REPLACE INTO embeddings_cache (key, vector_json, model, created_at)
-        VALUES (?, ?, ?, ?)
-        """,
-        [
-            (entry.key, json.dumps(entry.vector), entry.model, entry.created_at)
-            for entry in entries
-        ],
-    )
-    connection.commit()
-    connection.close()
+        for name, event, change in (
+            ("ai", "INSERT", "+ LENGTH(new.vector)"),
+            ("ad", "DELETE", "- LENGTH(old.vector)"),
+            ("au", "UPDATE OF vector", "+ LENGTH(new.vector) - LENGTH(old.vector)"),
+        ):
+            self._connection.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS embeddings_size_{name} AFTER {event} ON embeddings
+                BEGIN
+                    UPDATE cache_size SET bytes = bytes {change} WHERE id = 0;
+                END
+                """
+            )
+        self._connection.commit()
+
+    def get(self, model: str, hashes: list[str]) -> dict[str, list[float]]:
+        unique = list(dict.fromkeys(hashes))
+        found: dict[str, list[float]] = {}
+        if not unique:
+            return found
+        now = time.time_ns()
+        with self._lock:
+            for start in range(0, len(unique), _IN_CHUNK):
+                part = unique[start : start + _IN_CHUNK]
+                placeholders = ",".join(["?"] * len(part))
+                rows = self._connection.execute(
+                    f"""
+                    SELECT text_hash, dtype, vector FROM embeddings
+                    WHERE model = ? AND text_hash IN ({placeholders})
+                    """,
+                    (model, *part),
+                ).fetchall()
+                for text_hash, dtype, blob in rows:
+                    found[text_hash] = np.frombuffer(blob, dtype=dtype).astype(np.float32).tolist()
+            for text_hash in found:
+                self._touched[(model, text_hash)] = now
+            if len(self._touched) >= _TOUCH_BATCH or (
+                self._touched and time.monotonic() - self._flushed_at >= _TOUCH_INTERVAL_S
+            ):
+                self._flush_touches()
+                self._connection.commit()
+        incr("embed_cache.hits", len(found))
+        incr("embed_cache.misses", len(unique) - len(found))
+        return found
+
+    def put(self, model: str, items: dict[str, list[float]]) -> None:
+        if not items:
+            return
+        dtype = _dtype()
+        now = time.time_ns()
+        rows = [
+            (model, text_hash, dtype, np.asarray(vector, dtype=dtype).tobytes(), now)
+            for text_hash, vector in items.items()
+        ]
+        with self._lock:
+            self._connection.executemany(
+                """
+                INSERT INTO embeddings (model, text_hash, dtype, vector, last_used)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (model, text_hash) DO UPDATE SET
+                    dtype = excluded.dtype,
+                    vector = excluded.vector,
+                    last_used = excluded.last_used
+                """,
+                rows,
+            )
+            self._flush_touches()
+            self._evict()
+            self._connection.commit()
+
+    def _flush_touches(self) -> None:
+        if self._touched:
+            self._connection.executemany(
+                "UPDATE embeddings SET last_used = MAX(last_used, ?) WHERE model = ? AND text_hash = ?",
+                [(used, model, text_hash) for (model, text_hash), used in self._touched.items()],
+            )
+            self._touched.clear()
+        self._flushed_at = time.monotonic()
+
+    def _size(self) -> int:
+        row = self._connection.execute("SELECT bytes FROM cache_size WHERE id = 0").fetchone()
+        return int(row[0]) if row else 0
+
+    def _evict(self) -> None:
+        # Runs inside put()'s write transaction, so the size includes other processes' rows.
+        limit = _max_bytes()
+        size = self._size()
+        if size <= limit:
+            return
+        # Trim to 90% so a full cache does not evict on every write.
+        target = int(limit * 0.9)
+        cursor = self._connection.execute(
+            "SELECT model, text_hash, LENGTH(vector) FROM embeddings ORDER BY last_used"
+        )
+        victims: list[tuple[str, str]] = []
+        for model, text_hash, length in cursor:
+            if size <= target:
+                break
+            victims.append((model, text_hash))
+            size -= int(length)
+        cursor.close()
+        self._connection.executemany(
+            "DELETE FROM embeddings WHERE model = ? AND text_hash = ?", victims
+        )
+        incr("embed_cache.evictions", len(victims))
+
+    def stats(self) -> dict:
+        with self._lock:
+            row = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            size = self._size()
+        return {"path": str(self.path), "entries": int(row[0]), "bytes": size}
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_touches()
+            self._connection.commit()
+            self._connection.close()
+
+
+_STORES: dict[Path, EmbeddingStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def embedding_cache_path() -> Path:
+    return get_workspaces_dir() / "cache" / "embeddings.sqlite"
+
+
+def get_embedding_store() -> EmbeddingStore | None:
+    """Return the shared embedding cache, or None when it is disabled."""
+    if not embedding_cache_enabled():
+        return None
+    path = embedding_cache_path().resolve()
+    with _STORES_LOCK:
+        store = _STORES.get(path)
+        if store is None:
+            store = EmbeddingStore(path)
+            _STORES[path] = store
+        return store
+
+
+def close_embedding_stores() -> None:
+    with _STORES_LOCK:
+        stores = list(_STORES.values())
+        _STORES.clear()
+    for store in stores:
+        store.close()
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import os
+
+from core.retrieval.bm25_index import tokenize
+from core.retrieval.scopes import scope_doc_ids_sql
+from core.ui_state.storage import get_setting
+from infra.db import get_connection
+
+LEXICAL_BACKENDS = ("bm25", "fts5")
+
+
+def fts_available() -> bool:
+    with get_connection() as connection:
+        row = connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chunks_fts'"
+        ).fetchone()
+    return row is not None
+
+
+def rebuild_fts_index() -> None:
+    if not fts_available():
+        return
+    with get_connection() as connection:
+        connection.execute("INSERT INTO chunks_fts(chunks_fts) VALUES ('rebuild')")
+        connection.commit()
+
+
+def resolve_lexical_backend(workspace_id: str | None) -> str:
+    value = (
+        get_setting(workspace_id, "lexical_backend")
+        or get_setting(None, "lexical_backend")
+        or os.getenv("STUDYFLOW_LEXICAL_BACKEND", "bm25")
+    )
+    value = value.strip().lower()
+    if value == "fts5" and not fts_available():
+        return "bm25"
+    return value if value in LEXICAL_BACKENDS else "bm25"
+
+
+def _match_expression(query: str) -> str:
+    terms = dict.fromkeys(tokenize(query))
+    return " OR ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def _scope_clause(
+    doc_ids: list[str] | None, doc_types: list[str] | None, scope_tag: str | None = None
+) -> tuple[str, tuple]:
+    clause = ""
+    params: tuple = ()
+    if scope_tag:
+        members, params = scope_doc_ids_sql(scope_tag)
+        clause += f" AND chunks.doc_id IN ({members})"
+    if doc_ids:
+        clause += f" AND chunks.doc_id IN ({','.join(['?'] * len(doc_ids))})"
+        params += tuple(doc_ids)
+    if doc_types:
+        clause += f" AND documents.doc_type IN ({','.join(['?'] * len(doc_types))})"
+        params += tuple(doc_types)
+    return clause, params
+
+
+_SELECT_COLUMNS = """
+    chunks.id as chunk_id,
+    chunks.doc_id as doc_id,
+    chunks.workspace_id as workspace_id,
+    chunks.page_start as page_start,
+    chunks.page_end as page_end,
+    chunks.text as text,
+    documents.filename as filename,
+    documents.file_type as file_type
+"""
+
+
+def query_fts(
+    *,
+    workspace_id: str,
+    query: str,
+    top_k: int = 20,
+    doc_ids: list[str] | None = None,
+    doc_types: list[str] | None = None,
+    scope_tag: str | None = None,
+) -> list[dict]:
+    """BM25-ranked lexical search over ``chunks_fts``, shaped like ``query_bm25`` results.
+
+    Scope filters are applied in SQL. FTS5 ``bm25()`` is lower-is-better, so it
+    is negated to keep "higher score wins" for fusion. Term statistics come from
+    the whole table rather than one workspace.
+    """
+    scope, scope_params = _scope_clause(doc_ids, doc_types, scope_tag)
+    results: list[dict] = []
+    match = _match_expression(query)
+    with get_connection() as connection:
+        if match:
+            rows = connection.execute(
+                f"""
+                SELECT {_SELECT_COLUMNS}, -bm25(chunks_fts) as score
+                FROM chunks_fts
+                JOIN chunks ON chunks.rowid = chunks_fts.rowid
+                JOIN documents ON documents.id = chunks.doc_id
+                WHERE chunks_fts MATCH ? AND chunks.workspace_id = ?{scope}
+                ORDER BY bm25(chunks_fts), chunks.doc_id, chunks.chunk_index
+                LIMIT ?
+                """,
+                (match, workspace_id, *scope_params, top_k),
+            ).fetchall()
+            results = [dict(row) for row in rows]
+        if len(results) < top_k:
+            # Same as the BM25 index: pad with unmatched in-scope chunks in corpus order.
+            seen = [item["chunk_id"] for item in results]
+            exclude = ""
+            if seen:
+                exclude = f" AND chunks.id NOT IN ({','.join(['?'] * len(seen))})"
+            rows = connection.execute(
+                f"""
+                SELECT {_SELECT_COLUMNS}, 0.0 as score
+                FROM chunks
+                JOIN documents ON documents.id = chunks.doc_id
+                WHERE chunks.workspace_id = ?{scope}{exclude}
+                ORDER BY chunks.doc_id, chunks.chunk_index
+                LIMIT ?
+                """,
+                (workspace_id, *scope_params, *seen, top_k - len(results)),
+            ).fetchall()
+            results.extend(dict(row) for row in rows)
+    for item in results:
+        item["score"] = float(item["score"])
+    return results
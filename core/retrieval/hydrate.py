@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from infra.db import get_connection
+
+# Stay well under SQLITE_MAX_VARIABLE_NUMBER (999 on older builds).
+_IN_CHUNK = 500
+
+
+def hydrate_chunks(chunk_ids: list[str]) -> dict[str, dict]:
+    """Text, pages and document fields for ``chunk_ids``, read from SQLite.
+
+    SQLite is the only copy of chunk text; the vector and lexical indexes keep
+    ids and filter fields, and callers fetch the rest for their final hits.
+    """
+    unique = list(dict.fromkeys(chunk_ids))
+    found: dict[str, dict] = {}
+    if not unique:
+        return found
+    with get_connection() as connection:
+        for start in range(0, len(unique), _IN_CHUNK):
+            part = unique[start : start + _IN_CHUNK]
+            placeholders = ",".join(["?"] * len(part))
+            rows = connection.execute(
+                f"""
+                SELECT chunks.id as chunk_id,
+                       chunks.doc_id as doc_id,
+                       chunks.workspace_id as workspace_id,
+                       chunks.page_start as page_start,
+                       chunks.page_end as page_end,
+                       chunks.text as text,
+                       documents.filename as filename,
+                       documents.file_type as file_type
+                FROM chunks
+                JOIN documents ON documents.id = chunks.doc_id
+                WHERE chunks.id IN ({placeholders})
+                """,
+                tuple(part),
+            ).fetchall()
+            found.update((row["chunk_id"], dict(row)) for row in rows)
+    return found
+
+
+def canonical_chunk_ids(chunk_ids: list[str]) -> dict[str, str]:
+    """Map each of ``chunk_ids`` to the canonical chunk of its near-duplicate group."""
+    unique = list(dict.fromkeys(chunk_ids))
+    found: dict[str, str] = {}
+    if not unique:
+        return found
+    with get_connection() as connection:
+        for start in range(0, len(unique), _IN_CHUNK):
+            part = unique[start : start + _IN_CHUNK]
+            rows = connection.execute(
+                f"""
+                SELECT id, dup_of FROM chunks
+                WHERE id IN ({','.join(['?'] * len(part))}) AND dup_of IS NOT NULL
+                """,
+                tuple(part),
+            ).fetchall()
+            found.update((row["id"], row["dup_of"]) for row in rows)
+    return {chunk_id: found.get(chunk_id, chunk_id) for chunk_id in unique}
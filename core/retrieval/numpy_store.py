@@ -0,0 +1,856 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from core.retrieval.scopes import is_scope_key
+
+_FORMAT_VERSION = 1
+_INDEXED_FIELDS = ("doc_id", "doc_type")
+_SCAN_BLOCK = 65536
+# Rows per block when scores need a float32 copy of float16/int8 rows; keeps it cache-sized.
+_DECODE_BLOCK = 2048
+_CODEC_SAMPLE = 20000
+
+
+class VectorIndexError(RuntimeError):
+    pass
+
+
+def _is_indexed(key: str) -> bool:
+    return key in _INDEXED_FIELDS or is_scope_key(key)
+
+
+def _indexed_items(meta: dict) -> list[tuple[str, object]]:
+    return [(key, value) for key, value in meta.items() if value is not None and _is_indexed(key)]
+
+
+def _dtype() -> str:
+    value = os.getenv("STUDYFLOW_VECTOR_DTYPE", "float32").strip().lower()
+    return value if value in ("float16", "float32") else "float32"
+
+
+def _compress_config() -> tuple[str, int, bool, bool] | None:
+    """``(reduce, dims, int8, keep_full)`` requested by the environment, or None."""
+    reduce = os.getenv("STUDYFLOW_VECTOR_REDUCE", "none").strip().lower()
+    if reduce not in ("pca", "truncate"):
+        reduce = "none"
+    quantize = os.getenv("STUDYFLOW_VECTOR_DTYPE", "float32").strip().lower() == "int8"
+    if reduce == "none" and not quantize:
+        return None
+    dims = max(int(os.getenv("STUDYFLOW_VECTOR_DIMS", "128")), 1) if reduce != "none" else 0
+    keep_full = os.getenv("STUDYFLOW_VECTOR_KEEP_FULL", "on").lower() not in ("0", "false", "off", "no")
+    return (reduce, dims, quantize, keep_full)
+
+
+def _compress_min_rows() -> int:
+    return max(int(os.getenv("STUDYFLOW_VECTOR_COMPRESS_MIN_ROWS", "20000")), 1)
+
+
+def _rescore_factor() -> int:
+    return max(int(os.getenv("STUDYFLOW_VECTOR_RESCORE", "4")), 0)
+
+
+def _compact_dead_ratio() -> float:
+    return float(os.getenv("STUDYFLOW_VECTOR_COMPACT_DEAD_RATIO", "0.25"))
+
+
+def _ivf_min_rows() -> int:
+    return max(int(os.getenv("STUDYFLOW_VECTOR_IVF_MIN_ROWS", "50000")), 0)
+
+
+def _ivf_nprobe() -> int:
+    return max(int(os.getenv("STUDYFLOW_VECTOR_IVF_NPROBE", "16")), 1)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _write_json(path: Path, payload) -> None:
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.write_text(json.dumps(payload), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def _write_at(path: Path, offset: int, payload: bytes) -> None:
+    mode = "r+b" if path.exists() else "wb"
+    with path.open(mode) as handle:
+        handle.seek(offset)
+        handle.write(payload)
+        handle.truncate()
+
+
+@contextmanager
+def _file_lock(path: Path):
+    """Exclusive advisory lock on ``path``, held across processes."""
+    with path.open("a+b") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _as_float(stored: np.ndarray) -> np.ndarray:
+    return np.asarray(stored, dtype=np.float32)
+
+
+def _train_ivf(matrix: np.ndarray, rows: np.ndarray, nlist: int, decode=_as_float) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    if len(rows) > nlist * 64:
+        rows = np.sort(rng.choice(rows, nlist * 64, replace=False))
+    sample = decode(matrix[rows])
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+    for _ in range(10):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        counts = np.bincount(assign, minlength=nlist)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+        centroids = _normalize(centroids)
+    return centroids.astype(np.float32)
+
+
+def _assign_ivf(
+    matrix: np.ndarray,
+    start: int,
+    stop: int,
+    centroids: np.ndarray,
+    decode=_as_float,
+) -> np.ndarray:
+    assign = np.empty(stop - start, dtype=np.int32)
+    for block in range(start, stop, _SCAN_BLOCK):
+        end = min(block + _SCAN_BLOCK, stop)
+        scores = decode(matrix[block:end]) @ centroids.T
+        assign[block - start : end - start] = np.argmax(scores, axis=1)
+    return assign
+
+
+@dataclass
+class _Codec:
+    """Reduction to ``dims`` (PCA or prefix truncation) and optional int8 storage.
+
+    PCA is fitted uncentered so inner products, not variance, are preserved;
+    int8 codes carry one scale per dimension.
+    """
+
+    reduce: str
+    dims: int
+    quantize: bool
+    keep_full: bool
+    requested: tuple
+    projection: np.ndarray | None = None
+    scales: np.ndarray | None = None
+
+    @property
+    def dtype(self) -> str:
+        return "int8" if self.quantize else "float32"
+
+    @classmethod
+    def fit(cls, sample: np.ndarray, config: tuple) -> _Codec:
+        reduce, dims, quantize, keep_full = config
+        dims = min(dims, *sample.shape) if reduce != "none" else sample.shape[1]
+        codec = cls(reduce, dims, quantize, keep_full, tuple(config))
+        if reduce == "pca":
+            codec.projection = np.linalg.svd(sample, full_matrices=False)[2][:dims].astype(np.float32)
+        if quantize:
+            peak = np.abs(codec.project(sample)).max(axis=0)
+            codec.scales = (np.where(peak > 0, peak, 1.0) / 127).astype(np.float32)
+        return codec
+
+    def project(self, vectors: np.ndarray) -> np.ndarray:
+        if self.reduce == "pca":
+            return vectors @ self.projection.T
+        if self.reduce == "truncate":
+            return _normalize(vectors[:, : self.dims])
+        return vectors
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        reduced = self.project(vectors)
+        if not self.quantize:
+            return reduced.astype(np.float32)
+        return np.clip(np.rint(reduced / self.scales), -127, 127).astype(np.int8)
+
+    def decode(self, stored: np.ndarray) -> np.ndarray:
+        values = np.asarray(stored, dtype=np.float32)
+        return values * self.scales if self.quantize else values
+
+    def save(self, directory: Path) -> None:
+        arrays = {
+            name: value
+            for name, value in (("projection", self.projection), ("scales", self.scales))
+            if value is not None
+        }
+        if arrays:
+            np.savez(directory / "codec.npz", **arrays)
+
+    def to_meta(self) -> dict:
+        return {
+            "reduce": self.reduce,
+            "dims": self.dims,
+            "quantize": self.quantize,
+            "keep_full": self.keep_full,
+            "requested": list(self.requested),
+        }
+
+    @classmethod
+    def load(cls, directory: Path, meta: dict) -> _Codec:
+        codec = cls(
+            meta["reduce"],
+            int(meta["dims"]),
+            bool(meta["quantize"]),
+            bool(meta["keep_full"]),
+            tuple(meta["requested"]),
+        )
+        if (directory / "codec.npz").exists():
+            with np.load(directory / "codec.npz") as arrays:
+                codec.projection = arrays["projection"] if "projection" in arrays else None
+                codec.scales = arrays["scales"] if "scales" in arrays else None
+        return codec
+
+
+@dataclass
+class _State:
+    directory: Path
+    dim: int
+    dtype: str
+    rows: int
+    rows_bytes: int
+    matrix: np.ndarray | None
+    ids: list[str]
+    metadatas: list[dict]
+    live: np.ndarray
+    id_rows: dict[str, int]
+    field_rows: dict[str, dict[str, list[int]]]
+    centroids: np.ndarray | None = None
+    ivf_rows: int = 0
+    assign: np.ndarray | None = None
+    _lists: list[np.ndarray] | None = None
+    _masks: dict[tuple[str, str], np.ndarray] = field(default_factory=dict)
+    input_dim: int = 0
+    codec: _Codec | None = None
+    full: np.ndarray | None = None
+
+    @property
+    def live_count(self) -> int:
+        return int(self.live.sum())
+
+    def value_rows(self, key: str, value) -> np.ndarray:
+        cached = self._masks.get((key, value))
+        if cached is not None:
+            return cached
+        if _is_indexed(key):
+            rows = np.asarray(self.field_rows.get(key, {}).get(value, []), dtype=np.int64)
+        else:
+            rows = np.asarray(
+                [row for row, meta in enumerate(self.metadatas) if meta.get(key) == value],
+                dtype=np.int64,
+            )
+        self._masks[(key, value)] = rows
+        return rows
+
+    def where_mask(self, where: dict) -> np.ndarray:
+        if "$and" in where:
+            mask = np.ones(self.rows, dtype=bool)
+            for clause in where["$and"]:
+                mask &= self.where_mask(clause)
+            return mask
+        if "$or" in where:
+            mask = np.zeros(self.rows, dtype=bool)
+            for clause in where["$or"]:
+                mask |= self.where_mask(clause)
+            return mask
+        mask = np.ones(self.rows, dtype=bool)
+        for key, condition in where.items():
+            if isinstance(condition, dict):
+                if "$in" in condition:
+                    values = condition["$in"]
+                elif "$eq" in condition:
+                    values = [condition["$eq"]]
+                else:
+                    raise VectorIndexError(f"Unsupported filter: {condition}")
+            else:
+                values = [condition]
+            matched = np.zeros(self.rows, dtype=bool)
+            for value in values:
+                rows = self.value_rows(key, value)
+                matched[rows[rows < self.rows]] = True
+            mask &= matched
+        return mask
+
+    def decode(self, stored: np.ndarray) -> np.ndarray:
+        return self.codec.decode(stored) if self.codec else _as_float(stored)
+
+    def full_rows(self, rows: np.ndarray) -> np.ndarray | None:
+        """Full-precision vectors for ``rows``; None when only compressed codes exist."""
+        if self.codec is None:
+            return _as_float(self.matrix[rows])
+        if self.full is not None:
+            return _as_float(self.full[rows])
+        return None
+
+    def append(
+        self,
+        vectors: np.ndarray,
+        ids: list[str],
+        metadatas: list[dict],
+        rows_bytes: int,
+    ) -> None:
+        start = self.rows
+        self.rows += len(ids)
+        self.rows_bytes = rows_bytes
+        self.matrix = np.memmap(
+            self.directory / "vectors.bin",
+            dtype=self.dtype,
+            mode="r",
+            shape=(self.rows, self.dim),
+        )
+        if self.codec is not None and self.codec.keep_full:
+            self.full = np.memmap(
+                self.directory / "full.bin",
+                dtype=np.float32,
+                mode="r",
+                shape=(self.rows, self.input_dim),
+            )
+        self.ids.extend(ids)
+        self.metadatas.extend(metadatas)
+        self.live = np.concatenate([self.live, np.ones(len(ids), dtype=bool)])
+        for offset, (chunk_id, meta) in enumerate(zip(ids, metadatas)):
+            row = start + offset
+            self.id_rows[chunk_id] = row
+            for key, value in _indexed_items(meta):
+                self.field_rows.setdefault(key, {}).setdefault(value, []).append(row)
+                self._masks.pop((key, value), None)
+        self._masks = {k: v for k, v in self._masks.items() if _is_indexed(k[0])}
+        if self.centroids is not None:
+            extra = _assign_ivf(vectors, 0, len(vectors), self.centroids)
+            self.assign = np.concatenate([self.assign, extra])
+            self._lists = None
+
+    def ivf_lists(self) -> list[np.ndarray]:
+        if self._lists is None:
+            order = np.argsort(self.assign, kind="stable")
+            bounds = np.cumsum(np.bincount(self.assign, minlength=len(self.centroids)))
+            self._lists = np.split(order, bounds[:-1])
+        return self._lists
+
+
+class NumpyVectorStore:
+    """Exact (or IVF, once large enough) cosine search over a memory-mapped matrix.
+
+    Layout under ``<persist_directory>/<collection_name>/``: ``meta.json`` points
+    at the live ``data-<ns>`` directory, which holds ``vectors.bin`` (normalized
+    rows), ``rows.jsonl`` (id and filter metadata per row; chunk text stays in
+    SQLite), ``deleted.json`` and optional IVF centroids/assignments. Upserts
+    append; deleted rows are tombstoned until compaction rewrites a fresh data
+    directory. Distances are squared L2 between unit vectors, matching Chroma's
+    default space.
+
+    With ``STUDYFLOW_VECTOR_REDUCE`` / ``STUDYFLOW_VECTOR_DTYPE=int8`` set,
+    compaction past ``STUDYFLOW_VECTOR_COMPRESS_MIN_ROWS`` fits a codec
+    (``codec.npz``, recorded in ``meta.json``) and ``vectors.bin`` holds the
+    compressed codes; ``full.bin`` optionally keeps float32 rows for exact
+    re-scoring of the shortlist.
+
+    Writers in any process serialize on ``<collection_name>.lock`` next to the
+    collection directory and publish through an atomic ``meta.json`` rename;
+    readers never lock and pick up the new state from the ``meta.json`` stamp.
+    """
+
+    def __init__(self, settings) -> None:
+        self.settings = settings
+        self.root = Path(settings.persist_directory) / settings.collection_name
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._state: _State | None = None
+        self._stamp: tuple | None = None
+
+    def _meta_path(self) -> Path:
+        return self.root / "meta.json"
+
+    @contextmanager
+    def _writing(self):
+        # The lock file sits outside the collection so reset() can remove it.
+        with self._lock, _file_lock(self.root.parent / f"{self.root.name}.lock"):
+            yield
+
+    def _read_stamp(self) -> tuple | None:
+        try:
+            stat = self._meta_path().stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _load(self) -> _State | None:
+        try:
+            meta = json.loads(self._meta_path().read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        directory = self.root / meta["data"]
+        rows = int(meta["rows"])
+        dim = int(meta["dim"])
+        input_dim = int(meta.get("input_dim") or dim)
+        codec = _Codec.load(directory, meta["codec"]) if meta.get("codec") else None
+        matrix = None
+        full = None
+        if rows:
+            matrix = np.memmap(
+                directory / "vectors.bin", dtype=meta["dtype"], mode="r", shape=(rows, dim)
+            )
+            if codec is not None and codec.keep_full:
+                full = np.memmap(
+                    directory / "full.bin", dtype=np.float32, mode="r", shape=(rows, input_dim)
+                )
+        ids: list[str] = []
+        metadatas: list[dict] = []
+        with (directory / "rows.jsonl").open("rb") as handle:
+            payload = handle.read(int(meta["rows_bytes"]))
+        # JSON never contains raw newlines, so the rows can be parsed as one array.
+        text = payload.decode("utf-8").rstrip("\n").replace("\n", ",")
+        for record in json.loads(f"[{text}]"):
+            ids.append(record["id"])
+            metadatas.append(record["metadata"])
+        live = np.ones(rows, dtype=bool)
+        deleted_path = directory / "deleted.json"
+        if deleted_path.exists():
+            deleted = np.asarray(json.loads(deleted_path.read_text(encoding="utf-8")), dtype=np.int64)
+            live[deleted[deleted < rows]] = False
+        id_rows: dict[str, int] = {}
+        field_rows: dict[str, dict[str, list[int]]] = {key: {} for key in _INDEXED_FIELDS}
+        for row, (chunk_id, row_meta) in enumerate(zip(ids, metadatas)):
+            if not live[row]:
+                continue
+            id_rows[chunk_id] = row
+            for key, value in _indexed_items(row_meta):
+                field_rows.setdefault(key, {}).setdefault(value, []).append(row)
+        state = _State(
+            directory=directory,
+            dim=dim,
+            dtype=meta["dtype"],
+            rows=rows,
+            rows_bytes=int(meta["rows_bytes"]),
+            matrix=matrix,
+            ids=ids,
+            metadatas=metadatas,
+            live=live,
+            id_rows=id_rows,
+            field_rows=field_rows,
+            input_dim=input_dim,
+            codec=codec,
+            full=full,
+        )
+        ivf_rows = int(meta.get("ivf_rows") or 0)
+        if ivf_rows and matrix is not None:
+            state.centroids = np.load(directory / "ivf_centroids.npy")
+            assign = np.load(directory / "ivf_assign.npy")[:ivf_rows]
+            extra = _assign_ivf(matrix, ivf_rows, rows, state.centroids, state.decode)
+            state.assign = np.concatenate([assign, extra]).astype(np.int32)
+            state.ivf_rows = ivf_rows
+        return state
+
+    def _current(self) -> _State | None:
+        stamp = self._read_stamp()
+        if stamp != self._stamp:
+            try:
+                self._state = self._load()
+            except FileNotFoundError:
+                # Another process compacted into a new data directory mid-load.
+                stamp = self._read_stamp()
+                self._state = self._load()
+            self._stamp = stamp
+        return self._state
+
+    def _write_meta(self, state: _State, *, deleted_changed: bool = False) -> None:
+        if deleted_changed:
+            _write_json(
+                state.directory / "deleted.json",
+                np.flatnonzero(~state.live).tolist(),
+            )
+        _write_json(
+            self._meta_path(),
+            {
+                "format": _FORMAT_VERSION,
+                "data": state.directory.name,
+                "dim": state.dim,
+                "input_dim": state.input_dim,
+                "dtype": state.dtype,
+                "rows": state.rows,
+                "rows_bytes": state.rows_bytes,
+                "ivf_rows": state.ivf_rows,
+                "codec": state.codec.to_meta() if state.codec else None,
+            },
+        )
+        self._stamp = self._read_stamp()
+
+    def _new_state(self, input_dim: int, codec: _Codec | None = None) -> _State:
+        directory = self.root / f"data-{time.time_ns()}"
+        directory.mkdir(parents=True)
+        (directory / "rows.jsonl").write_bytes(b"")
+        if codec is not None:
+            codec.save(directory)
+        return _State(
+            directory=directory,
+            dim=codec.dims if codec else input_dim,
+            dtype=codec.dtype if codec else _dtype(),
+            rows=0,
+            rows_bytes=0,
+            matrix=None,
+            ids=[],
+            metadatas=[],
+            live=np.zeros(0, dtype=bool),
+            id_rows={},
+            field_rows={key: {} for key in _INDEXED_FIELDS},
+            input_dim=input_dim,
+            codec=codec,
+        )
+
+    def _append(
+        self,
+        state: _State,
+        vectors: np.ndarray,
+        ids: list[str],
+        metadatas: list[dict],
+    ) -> None:
+        codec = state.codec
+        if codec is None:
+            self._append_rows(state, vectors.astype(state.dtype), ids, metadatas)
+        else:
+            full = vectors if codec.keep_full else None
+            self._append_rows(state, codec.encode(vectors), ids, metadatas, full)
+
+    def _append_rows(
+        self,
+        state: _State,
+        stored: np.ndarray,
+        ids: list[str],
+        metadatas: list[dict],
+        full: np.ndarray | None = None,
+    ) -> None:
+        itemsize = np.dtype(state.dtype).itemsize
+        _write_at(
+            state.directory / "vectors.bin",
+            state.rows * state.dim * itemsize,
+            stored.tobytes(),
+        )
+        if full is not None:
+            _write_at(
+                state.directory / "full.bin",
+                state.rows * state.input_dim * 4,
+                full.astype(np.float32).tobytes(),
+            )
+        lines = b"".join(
+            json.dumps(
+                {"id": chunk_id, "metadata": meta},
+                ensure_ascii=False,
+            ).encode("utf-8")
+            + b"\n"
+            for chunk_id, meta in zip(ids, metadatas)
+        )
+        _write_at(state.directory / "rows.jsonl", state.rows_bytes, lines)
+        state.append(state.decode(stored), ids, metadatas, state.rows_bytes + len(lines))
+
+    def _tombstone(self, state: _State, rows: np.ndarray) -> None:
+        if len(rows) == 0:
+            return
+        live = state.live.copy()
+        live[rows] = False
+        state.live = live
+        touched: dict[tuple[str, str], set[int]] = {}
+        for row in rows.tolist():
+            chunk_id = state.ids[row]
+            if state.id_rows.get(chunk_id) == row:
+                state.id_rows.pop(chunk_id, None)
+            for key, value in _indexed_items(state.metadatas[row]):
+                touched.setdefault((key, value), set()).add(row)
+        for (key, value), removed in touched.items():
+            remaining = [item for item in state.field_rows[key].get(value, []) if item not in removed]
+            if remaining:
+                state.field_rows[key][value] = remaining
+            else:
+                state.field_rows[key].pop(value, None)
+            state._masks.pop((key, value), None)
+        state._masks = {k: v for k, v in state._masks.items() if _is_indexed(k[0])}
+
+    def _plan_codec(self, state: _State, live_rows: np.ndarray) -> _Codec | None:
+        """Codec for the next compaction: keep the current one unless a different
+        one is requested, the index is large enough and full vectors exist to
+        re-encode from."""
+        config = _compress_config()
+        current = state.codec
+        if current is not None and (
+            config is None or current.requested == config or state.full is None
+        ):
+            return current
+        if config is None or len(live_rows) < max(_compress_min_rows(), config[1]):
+            return current
+        rows = live_rows
+        if len(rows) > _CODEC_SAMPLE:
+            rng = np.random.default_rng(0)
+            rows = np.sort(rng.choice(rows, _CODEC_SAMPLE, replace=False))
+        return _Codec.fit(state.full_rows(rows), config)
+
+    def _needs_compaction(self, state: _State) -> bool:
+        live = state.live_count
+        if state.rows and (state.rows - live) / state.rows > _compact_dead_ratio():
+            return True
+        config = _compress_config()
+        if config is not None and live >= max(_compress_min_rows(), config[1]):
+            codec = state.codec
+            if codec is None or (codec.requested != config and state.full is not None):
+                return True
+        min_rows = _ivf_min_rows()
+        if not min_rows or live < min_rows:
+            return False
+        return state.centroids is None or state.rows - state.ivf_rows > state.ivf_rows
+
+    def _compact(self, state: _State) -> None:
+        live_rows = np.flatnonzero(state.live)
+        codec = self._plan_codec(state, live_rows)
+        fresh = self._new_state(state.input_dim, codec)
+        if codec is None:
+            fresh.dtype = state.dtype
+        for start in range(0, len(live_rows), _SCAN_BLOCK):
+            rows = live_rows[start : start + _SCAN_BLOCK]
+            ids = [state.ids[row] for row in rows]
+            metadatas = [state.metadatas[row] for row in rows]
+            if codec is not None and codec is state.codec:
+                # Same codec: copy the codes rather than re-encoding.
+                full = _as_float(state.full[rows]) if state.full is not None else None
+                self._append_rows(fresh, np.asarray(state.matrix[rows]), ids, metadatas, full)
+            else:
+                self._append(fresh, state.full_rows(rows), ids, metadatas)
+        min_rows = _ivf_min_rows()
+        if min_rows and fresh.rows >= min_rows:
+            nlist = int(min(max(np.sqrt(fresh.rows), 16), 4096))
+            fresh.centroids = _train_ivf(fresh.matrix, np.arange(fresh.rows), nlist, fresh.decode)
+            fresh.assign = _assign_ivf(fresh.matrix, 0, fresh.rows, fresh.centroids, fresh.decode)
+            fresh.ivf_rows = fresh.rows
+            fresh._lists = None
+            np.save(fresh.directory / "ivf_centroids.npy", fresh.centroids)
+            np.save(fresh.directory / "ivf_assign.npy", fresh.assign)
+        self._write_meta(fresh, deleted_changed=True)
+        self._state = fresh
+        for stale in self.root.glob("data-*"):
+            if stale != fresh.directory:
+                shutil.rmtree(stale, ignore_errors=True)
+
+    def count(self) -> int:
+        with self._lock:
+            state = self._current()
+            return state.live_count if state else 0
+
+    def is_empty(self) -> bool:
+        return self.count() == 0
+
+    def upsert(
+        self,
+        *,
+        ids: list[str],
+        embeddings: list[list[float]],
+        metadatas: list[dict],
+    ) -> None:
+        if not ids:
+            return
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+        with self._writing():
+            state = self._current()
+            if state is None:
+                state = self._new_state(vectors.shape[1])
+            if vectors.shape[1] != state.input_dim:
+                raise VectorIndexError(
+                    f"Embedding dimension {vectors.shape[1]} does not match index dimension {state.input_dim}."
+                )
+            replaced = [state.id_rows[item] for item in ids if item in state.id_rows]
+            self._tombstone(state, np.asarray(replaced, dtype=np.int64))
+            self._append(state, vectors, list(ids), list(metadatas))
+            self._write_meta(state, deleted_changed=bool(replaced))
+            self._state = state
+            if self._needs_compaction(state):
+                self._compact(state)
+
+    def delete(self, *, where: dict | None = None, ids: list[str] | None = None) -> None:
+        with self._writing():
+            state = self._current()
+            if state is None or not state.rows:
+                return
+            mask = state.live.copy()
+            if where is not None:
+                mask &= state.where_mask(where)
+            if ids is not None:
+                selected = np.zeros(state.rows, dtype=bool)
+                selected[[state.id_rows[item] for item in ids if item in state.id_rows]] = True
+                mask &= selected
+            rows = np.flatnonzero(mask)
+            if len(rows) == 0:
+                return
+            self._tombstone(state, rows)
+            self._write_meta(state, deleted_changed=True)
+            if self._needs_compaction(state):
+                self._compact(state)
+
+    def set_tags(self, *, doc_id: str, tags: dict) -> None:
+        with self._writing():
+            state = self._current()
+            if state is None or not state.rows:
+                return
+            rows = np.flatnonzero(state.live & state.where_mask({"doc_id": doc_id}))
+            if len(rows) == 0:
+                return
+            # Rows are append-only: re-append the same vectors with the new tags.
+            vectors = state.full_rows(rows)
+            ids = [state.ids[row] for row in rows]
+            metadatas = [
+                {
+                    **{
+                        key: value
+                        for key, value in state.metadatas[row].items()
+                        if not is_scope_key(key)
+                    },
+                    **tags,
+                }
+                for row in rows
+            ]
+            stored = np.asarray(state.matrix[rows])
+            self._tombstone(state, rows)
+            if vectors is None:
+                self._append_rows(state, stored, ids, metadatas)
+            else:
+                self._append(state, vectors, ids, metadatas)
+            self._write_meta(state, deleted_changed=True)
+            if self._needs_compaction(state):
+                self._compact(state)
+
+    def fingerprints(self, *, where: dict | None = None) -> dict[str, str | None]:
+        with self._lock:
+            state = self._current()
+            if state is None or not state.rows:
+                return {}
+            mask = state.live if where is None else state.live & state.where_mask(where)
+            return {
+                state.ids[row]: state.metadatas[row].get("text_hash")
+                for row in np.flatnonzero(mask)
+            }
+
+    def query(
+        self,
+        *,
+        embedding: list[float],
+        top_k: int,
+        where: dict | None = None,
+    ) -> dict:
+        return self.query_many(embeddings=[embedding], top_k=top_k, where=where)
+
+    def query_many(
+        self,
+        *,
+        embeddings: list[list[float]],
+        top_k: int,
+        where: dict | None = None,
+    ) -> dict:
+        empty = {
+            key: [[] for _ in embeddings]
+            for key in ("ids", "metadatas", "distances")
+        }
+        with self._lock:
+            state = self._current()
+            if state is None or not state.rows or top_k <= 0 or not embeddings:
+                return empty
+            rows = state.rows
+            matrix = state.matrix
+            mask = state.live[:rows]
+            if where:
+                mask = mask & state.where_mask(where)
+            queries = self._query_vectors(embeddings, state)
+            codec = state.codec
+            full = state.full
+            reduced = codec.project(queries) if codec else queries
+            # Scoring int8 codes against scale-weighted queries skips decoding the matrix.
+            scan = reduced * codec.scales if codec and codec.quantize else reduced
+            candidates: np.ndarray | None = None
+            if state.centroids is not None:
+                probes = np.argsort(-(reduced @ state.centroids.T), axis=1)[:, : _ivf_nprobe()]
+                lists = state.ivf_lists()
+                picked = np.concatenate([lists[c] for c in np.unique(probes)])
+                picked = np.sort(picked[mask[picked]])
+                if len(picked) >= top_k:
+                    candidates = picked
+        if candidates is None:
+            candidates = np.flatnonzero(mask)
+        if len(candidates) == 0:
+            return empty
+        step = _SCAN_BLOCK if matrix.dtype == np.float32 else _DECODE_BLOCK
+        if len(candidates) > rows // 4:
+            scores = np.empty((rows, len(queries)), dtype=np.float32)
+            for start in range(0, rows, step):
+                stop = min(start + step, rows)
+                scores[start:stop] = _as_float(matrix[start:stop]) @ scan.T
+            scores = scores[candidates]
+        else:
+            scores = np.empty((len(candidates), len(queries)), dtype=np.float32)
+            for start in range(0, len(candidates), step):
+                block = candidates[start : start + step]
+                scores[start : start + len(block)] = _as_float(matrix[block]) @ scan.T
+        k = min(top_k, len(candidates))
+        factor = _rescore_factor() if codec is not None and full is not None else 0
+        size = min(k * factor, len(candidates)) if factor else k
+        result: dict = {"ids": [], "metadatas": [], "distances": []}
+        for position, column in enumerate(scores.T):
+            if size < len(candidates):
+                keep = np.argpartition(-column, size - 1)[:size]
+            else:
+                keep = np.arange(len(candidates))
+            values = column[keep]
+            if factor:
+                # Re-rank the approximate shortlist with the full-precision rows.
+                values = _as_float(full[candidates[keep]]) @ queries[position]
+                if k < len(keep):
+                    top = np.argpartition(-values, k - 1)[:k]
+                    keep, values = keep[top], values[top]
+            order = np.lexsort((candidates[keep], -values))
+            selected = candidates[keep[order]].tolist()
+            result["ids"].append([state.ids[row] for row in selected])
+            result["metadatas"].append([state.metadatas[row] for row in selected])
+            result["distances"].append(np.clip(2.0 - 2.0 * values[order], 0.0, None).tolist())
+        return result
+
+    @staticmethod
+    def _query_vectors(embeddings: list[list[float]], state: _State) -> np.ndarray:
+        queries = _normalize(np.asarray(embeddings, dtype=np.float32))
+        if queries.shape[1] != state.input_dim:
+            raise VectorIndexError(
+                f"Query dimension {queries.shape[1]} does not match index dimension {state.input_dim}."
+            )
+        return queries
+
+    def reset(self) -> None:
+        with self._writing():
+            shutil.rmtree(self.root, ignore_errors=True)
+            self.root.mkdir(parents=True, exist_ok=True)
+            self._state = None
+            self._stamp = None
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+
+from core.retrieval.embedder import EmbeddingSettings, embed_texts
+from core.retrieval.embedding_cache import EmbeddingStore, content_hash, get_embedding_store
+from core.telemetry.metrics import counters, incr, reset_counters
+
+_LOCK = threading.Lock()
+_CACHE: OrderedDict[tuple[str, str], list[float]] = OrderedDict()
+
+
+def _cache_size() -> int:
+    return max(int(os.getenv("STUDYFLOW_QUERY_EMBED_CACHE_SIZE", "512")), 0)
+
+
+def _persistent_store() -> EmbeddingStore | None:
+    enabled = os.getenv("STUDYFLOW_QUERY_EMBED_CACHE", "off").lower() in (
+        "1",
+        "true",
+        "on",
+        "yes",
+    )
+    if not enabled:
+        return None
+    return get_embedding_store()
+
+
+def normalize_query(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _remember(model: str, query: str, vector: list[float]) -> None:
+    limit = _cache_size()
+    if limit == 0:
+        return
+    with _LOCK:
+        _CACHE[(model, query)] = vector
+        _CACHE.move_to_end((model, query))
+        while len(_CACHE) > limit:
+            _CACHE.popitem(last=False)
+
+
+def embed_queries(queries: list[str], settings: EmbeddingSettings) -> list[list[float]]:
+    """Embed retrieval queries, reusing vectors cached per (model, normalized query)."""
+    normalized = [normalize_query(query) for query in queries]
+    found: dict[str, list[float]] = {}
+    with _LOCK:
+        for query in normalized:
+            vector = _CACHE.get((settings.model, query))
+            if vector is not None:
+                _CACHE.move_to_end((settings.model, query))
+                found[query] = vector
+    missing = [query for query in dict.fromkeys(normalized) if query not in found]
+
+    store = _persistent_store()
+    if missing and store is not None:
+        keys = {query: content_hash(query) for query in missing}
+        stored = store.get(settings.model, list(keys.values()))
+        for query, key in keys.items():
+            if key in stored:
+                found[query] = stored[key]
+                _remember(settings.model, query, stored[key])
+        missing = [query for query in missing if query not in found]
+
+    incr("query_embed_cache.hits", len(normalized) - len(missing))
+    incr("query_embed_cache.misses", len(missing))
+    if missing:
+        vectors = embed_texts(missing, settings)
+        for query, vector in zip(missing, vectors):
+            found[query] = vector
+            _remember(settings.model, query, vector)
+        if store is not None:
+            store.put(
+                settings.model,
+                {content_hash(query): vector for query, vector in zip(missing, vectors)},
+            )
+    return [found[query] for query in normalized]
+
+
+def warm_query_cache(queries: list[str], settings: EmbeddingSettings) -> int:
+    """Embed ``queries`` ahead of time; returns how many were not already in memory."""
+    unique = list(dict.fromkeys(normalize_query(query) for query in queries))
+    with _LOCK:
+        missing = sum(1 for query in unique if (settings.model, query) not in _CACHE)
+    embed_queries(unique, settings)
+    return missing
+
+
+def query_cache_stats() -> dict:
+    with _LOCK:
+        size = len(_CACHE)
+    stats = {key.split(".", 1)[1]: value for key, value in counters("query_embed_cache.").items()}
+    return {"hits": 0, "misses": 0, **stats, "size": size}
+
+
+def clear_query_cache() -> None:
+    with _LOCK:
+        _CACHE.clear()
+    reset_counters("query_embed_cache.")
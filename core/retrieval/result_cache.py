@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from core.telemetry.metrics import counters, incr, reset_counters
+from core.ui_state.storage import get_setting, set_setting
+
+_LOCK = threading.Lock()
+_CACHE: OrderedDict[tuple, tuple] = OrderedDict()
+
+
+def _cache_size() -> int:
+    return max(int(os.getenv("STUDYFLOW_RETRIEVAL_CACHE_SIZE", "256")), 0)
+
+
+def index_generation(workspace_id: str) -> str:
+    return get_setting(workspace_id, "index_generation") or "0"
+
+
+def bump_index_generation(workspace_id: str) -> None:
+    """Mark the workspace corpus as changed; cached retrievals for it become unreachable."""
+    set_setting(workspace_id, "index_generation", str(time.time_ns()))
+    with _LOCK:
+        for key in [key for key in _CACHE if key[0] == workspace_id]:
+            del _CACHE[key]
+
+
+def get_cached_result(key: tuple):
+    with _LOCK:
+        value = _CACHE.get(key)
+        if value is not None:
+            _CACHE.move_to_end(key)
+    incr("retrieval_cache.hits" if value is not None else "retrieval_cache.misses")
+    return value
+
+
+def put_cached_result(key: tuple, value: tuple) -> None:
+    limit = _cache_size()
+    if limit == 0:
+        return
+    with _LOCK:
+        _CACHE[key] = value
+        _CACHE.move_to_end(key)
+        while len(_CACHE) > limit:
+            _CACHE.popitem(last=False)
+            incr("retrieval_cache.evictions")
+
+
+def result_cache_stats() -> dict:
+    with _LOCK:
+        size = len(_CACHE)
+    stats = {key.split(".", 1)[1]: value for key, value in counters("retrieval_cache.").items()}
+    return {"hits": 0, "misses": 0, "evictions": 0, **stats, "size": size}
+
+
+def clear_result_cache() -> None:
+    with _LOCK:
+        _CACHE.clear()
+    reset_counters("retrieval_cache.")
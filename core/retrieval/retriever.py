@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 
-from core.retrieval.embedder import EmbeddingSettings, embed_texts
-from core.retrieval.vector_store import VectorStore
+from core.retrieval.embedder import EmbeddingSettings
+from core.retrieval.hydrate import canonical_chunk_ids, hydrate_chunks
+from core.retrieval.query_cache import embed_queries
+from core.retrieval.vector_store import VectorBackend
 
 
 @dataclass
@@ -19,42 +21,142 @@ class Hit:
     file_type: str | None = None
 
 
-def retrieve(
-    *,
-    query: str,
-    embed_settings: EmbeddingSettings,
-    store: VectorStore,
-    top_k: int = 8,
-    doc_ids: list[str] | None = None,
-    doc_types: list[str] | None = None,
-) -> list[Hit]:
-    embedding = embed_texts([query], embed_settings)[0]
-    where = None
-    if doc_ids and doc_types:
-        where = {"$and": [{"doc_id": {"$in": doc_ids}}, {"doc_type": {"$in": doc_types}}]}
-    elif doc_ids:
-        where = {"doc_id": {"$in": doc_ids}}
-    elif doc_types:
-        where = {"doc_type": {"$in": doc_types}}
-    result = store.query(embedding=embedding, top_k=top_k, where=where)
-    metadatas = result.get("metadatas", [[]])[0]
-    documents = result.get("documents", [[]])[0]
-    distances = result.get("distances", [[]])[0]
+def _where(
+    doc_ids: list[str] | None,
+    doc_types: list[str] | None,
+    scope_tag: str | None = None,
+) -> dict | None:
+    clauses = []
+    if scope_tag:
+        clauses.append({scope_tag: True})
+    if doc_ids:
+        clauses.append({"doc_id": {"$in": doc_ids}})
+    if doc_types:
+        clauses.append({"doc_type": {"$in": doc_types}})
+    if len(clauses) > 1:
+        return {"$and": clauses}
+    return clauses[0] if clauses else None
+
+
+def _hits_from_result(result: dict, position: int) -> list[Hit]:
+    """Id-only hits; text and display fields are filled in by ``hydrate_hits``."""
+    metadatas = (result.get("metadatas") or [[]])[position]
+    distances = (result.get("distances") or [[]])[position]
 
     hits: list[Hit] = []
-    for metadata, doc_text, distance in zip(metadatas, documents, distances):
+    for metadata, distance in zip(metadatas, distances):
         similarity = 1.0 / (1.0 + float(distance))
         hits.append(
             Hit(
                 chunk_id=metadata["chunk_id"],
                 doc_id=metadata["doc_id"],
                 workspace_id=metadata["workspace_id"],
-                filename=metadata["filename"],
-                file_type=metadata.get("file_type"),
-                page_start=int(metadata["page_start"]),
-                page_end=int(metadata["page_end"]),
-                text=doc_text,
+                filename="",
+                page_start=0,
+                page_end=0,
+                text="",
                 score=similarity,
             )
         )
     return hits
+
+
+def hydrate_hits(batches: list[list[Hit]]) -> list[list[Hit]]:
+    """Fill in text, filename, pages and file type from SQLite in one batched lookup.
+
+    Hits whose chunk no longer exists are dropped.
+    """
+    chunks = hydrate_chunks([hit.chunk_id for hits in batches for hit in hits])
+    hydrated: list[list[Hit]] = []
+    for hits in batches:
+        filled = []
+        for hit in hits:
+            chunk = chunks.get(hit.chunk_id)
+            if chunk is None:
+                continue
+            filled.append(
+                replace(
+                    hit,
+                    doc_id=chunk["doc_id"],
+                    workspace_id=chunk["workspace_id"],
+                    filename=chunk["filename"],
+                    file_type=chunk.get("file_type"),
+                    page_start=int(chunk["page_start"]),
+                    page_end=int(chunk["page_end"]),
+                    text=chunk["text"],
+                )
+            )
+        hydrated.append(filled)
+    return hydrated
+
+
+def collapse_duplicates(batches: list[list[Hit]]) -> list[list[Hit]]:
+    """Keep only the best-ranked hit of each near-duplicate group, in one lookup."""
+    canonical = canonical_chunk_ids([hit.chunk_id for hits in batches for hit in hits])
+    collapsed: list[list[Hit]] = []
+    for hits in batches:
+        seen: set[str] = set()
+        kept = []
+        for hit in hits:
+            group = canonical.get(hit.chunk_id, hit.chunk_id)
+            if group in seen:
+                continue
+            seen.add(group)
+            kept.append(hit)
+        collapsed.append(kept)
+    return collapsed
+
+
+def retrieve(
+    *,
+    query: str,
+    embed_settings: EmbeddingSettings,
+    store: VectorBackend,
+    top_k: int = 8,
+    doc_ids: list[str] | None = None,
+    doc_types: list[str] | None = None,
+) -> list[Hit]:
+    return retrieve_many(
+        queries=[query],
+        embed_settings=embed_settings,
+        store=store,
+        top_k=top_k,
+        scopes=[doc_ids],
+        doc_types=doc_types,
+    )[0]
+
+
+def retrieve_many(
+    *,
+    queries: list[str],
+    embed_settings: EmbeddingSettings,
+    store: VectorBackend,
+    top_k: int = 8,
+    scopes: list[list[str] | None],
+    doc_types: list[str] | None = None,
+    hydrate: bool = True,
+    scope_tag: str | None = None,
+) -> list[list[Hit]]:
+    """Vector hits for several queries: one encoder batch, one store query per distinct scope.
+
+    ``scope_tag`` (e.g. ``course:<id>``) is resolved by the store from the tags
+    written at index time. With ``hydrate=False`` hits carry only ids, doc ids
+    and scores.
+    """
+    texts = list(dict.fromkeys(queries))
+    vectors = dict(zip(texts, embed_queries(texts, embed_settings)))
+    groups: dict[tuple, list[int]] = {}
+    for position, scope in enumerate(scopes):
+        groups.setdefault(tuple(scope) if scope else (), []).append(position)
+
+    results: list[list[Hit]] = [[] for _ in queries]
+    for scope, positions in groups.items():
+        group_texts = list(dict.fromkeys(queries[position] for position in positions))
+        result = store.query_many(
+            embeddings=[vectors[text] for text in group_texts],
+            top_k=top_k,
+            where=_where(list(scope) or None, doc_types, scope_tag),
+        )
+        for position in positions:
+            results[position] = _hits_from_result(result, group_texts.index(queries[position]))
+    return hydrate_hits(results) if hydrate else results
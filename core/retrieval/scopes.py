@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+from infra.db import get_connection
+
+SCOPE_KINDS = ("course", "project")
+# Stay well under SQLITE_MAX_VARIABLE_NUMBER (999 on older builds).
+_IN_CHUNK = 500
+
+# Course membership matches course_docs_for_qa: linked documents plus lecture materials.
+_COURSE_MEMBERS = """
+    SELECT course_documents.doc_id as doc_id, course_documents.course_id as scope_id
+    FROM course_documents
+    UNION
+    SELECT lecture_material.doc_id as doc_id, lecture.course_id as scope_id
+    FROM lecture_material
+    JOIN lecture ON lecture.id = lecture_material.lecture_id
+"""
+_PROJECT_MEMBERS = """
+    SELECT papers.doc_id as doc_id, papers.project_id as scope_id
+    FROM papers
+    WHERE papers.project_id IS NOT NULL
+"""
+
+
+def course_scope(course_id: str) -> str:
+    return f"course:{course_id}"
+
+
+def project_scope(project_id: str) -> str:
+    return f"project:{project_id}"
+
+
+def is_scope_key(key: str) -> bool:
+    kind, sep, _ = key.partition(":")
+    return bool(sep) and kind in SCOPE_KINDS
+
+
+def _split(scope_tag: str) -> tuple[str, str]:
+    kind, _, scope_id = scope_tag.partition(":")
+    if kind not in SCOPE_KINDS or not scope_id:
+        raise ValueError(f"Unknown retrieval scope: {scope_tag}")
+    return kind, scope_id
+
+
+def _members(kind: str) -> str:
+    return _COURSE_MEMBERS if kind == "course" else _PROJECT_MEMBERS
+
+
+def scope_doc_ids_sql(scope_tag: str) -> tuple[str, tuple]:
+    """Subquery selecting the doc ids in ``scope_tag``, for ``doc_id IN (...)`` clauses."""
+    kind, scope_id = _split(scope_tag)
+    return f"SELECT doc_id FROM ({_members(kind)}) WHERE scope_id = ?", (scope_id,)
+
+
+def scope_doc_ids(scope_tag: str) -> list[str]:
+    query, params = scope_doc_ids_sql(scope_tag)
+    with get_connection() as connection:
+        rows = connection.execute(query, params).fetchall()
+    return [row["doc_id"] for row in rows]
+
+
+def doc_scope_tags(doc_ids: list[str]) -> dict[str, dict[str, bool]]:
+    """Scope tags (``{"course:<id>": True, ...}``) for each of ``doc_ids``."""
+    unique = list(dict.fromkeys(doc_ids))
+    tags: dict[str, dict[str, bool]] = {doc_id: {} for doc_id in unique}
+    with get_connection() as connection:
+        for start in range(0, len(unique), _IN_CHUNK):
+            part = unique[start : start + _IN_CHUNK]
+            placeholders = ",".join(["?"] * len(part))
+            for kind in SCOPE_KINDS:
+                rows = connection.execute(
+                    f"""
+                    SELECT doc_id, scope_id FROM ({_members(kind)})
+                    WHERE doc_id IN ({placeholders})
+                    """,
+                    tuple(part),
+                ).fetchall()
+                for row in rows:
+                    tags[row["doc_id"]][f"{kind}:{row['scope_id']}"] = True
+    return tags
+
+
+def vector_tags(doc_ids: list[str]) -> dict[str, dict]:
+    """``doc_type`` plus scope tags for each of ``doc_ids``, as stored on their vectors."""
+    tags = doc_scope_tags(doc_ids)
+    unique = list(tags)
+    with get_connection() as connection:
+        for start in range(0, len(unique), _IN_CHUNK):
+            part = unique[start : start + _IN_CHUNK]
+            rows = connection.execute(
+                f"SELECT id, doc_type FROM documents WHERE id IN ({','.join(['?'] * len(part))})",
+                tuple(part),
+            ).fetchall()
+            for row in rows:
+                tags[row["id"]]["doc_type"] = row["doc_type"] or "other"
+    return {doc_id: {"doc_type": "other", **item} for doc_id, item in tags.items()}
+
+
+def scoped_doc_ids(workspace_id: str) -> list[str]:
+    """Documents of the workspace that belong to at least one course or project."""
+    with get_connection() as connection:
+        rows = connection.execute(
+            f"""
+            SELECT DISTINCT members.doc_id as doc_id
+            FROM ({_COURSE_MEMBERS} UNION {_PROJECT_MEMBERS}) AS members
+            JOIN documents ON documents.id = members.doc_id
+            WHERE documents.workspace_id = ?
+            """,
+            (workspace_id,),
+        ).fetchall()
+    return [row["doc_id"] for row in rows]
+
+
+def take_retag_queue(workspace_id: str) -> list[str]:
+    """Pop the workspace's documents whose scope membership or doc_type changed.
+
+    The queue is filled by SQLite triggers (see ``infra.models``), so every
+    write path is covered.
+    """
+    with get_connection() as connection:
+        rows = connection.execute(
+            """
+            SELECT scope_retag_queue.doc_id as doc_id, documents.workspace_id as workspace_id
+            FROM scope_retag_queue
+            LEFT JOIN documents ON documents.id = scope_retag_queue.doc_id
+            """
+        ).fetchall()
+        # Entries of deleted documents are dropped along with this workspace's.
+        taken = [row["doc_id"] for row in rows if row["workspace_id"] in (workspace_id, None)]
+        for start in range(0, len(taken), _IN_CHUNK):
+            part = taken[start : start + _IN_CHUNK]
+            connection.execute(
+                f"DELETE FROM scope_retag_queue WHERE doc_id IN ({','.join(['?'] * len(part))})",
+                tuple(part),
+            )
+        if taken:
+            connection.commit()
+    return [row["doc_id"] for row in rows if row["workspace_id"] == workspace_id]
+
+
+def retag_pending(workspace_id: str) -> bool:
+    """Whether documents of the workspace wait in the re-tag queue (read-only)."""
+    with get_connection() as connection:
+        row = connection.execute(
+            """
+            SELECT 1 FROM scope_retag_queue
+            JOIN documents ON documents.id = scope_retag_queue.doc_id
+            WHERE documents.workspace_id = ?
+            LIMIT 1
+            """,
+            (workspace_id,),
+        ).fetchone()
+    return row is not None
+
+
+def requeue_retags(doc_ids: list[str]) -> None:
+    with get_connection() as connection:
+        connection.executemany(
+            "INSERT OR IGNORE INTO scope_retag_queue(doc_id) VALUES (?)",
+            [(doc_id,) for doc_id in doc_ids],
+        )
+        connection.commit()
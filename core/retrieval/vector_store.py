@@ -1,15 +1,65 @@
 from __future__ import annotations
 
+import os
+import threading
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Protocol
 
 import chromadb
+from chromadb.errors import NotFoundError
+
+from core.retrieval.numpy_store import NumpyVectorStore
+from core.retrieval.scopes import is_scope_key
+from core.ui_state.storage import get_setting
+from infra.db import get_workspaces_dir
+
+VECTOR_BACKENDS = ("chroma", "numpy")
 
 
 @dataclass
 class VectorStoreSettings:
     persist_directory: Path
     collection_name: str
+    backend: str = "chroma"
+
+
+class VectorBackend(Protocol):
+    def count(self) -> int: ...
+
+    def is_empty(self) -> bool: ...
+
+    def upsert(
+        self,
+        *,
+        ids: list[str],
+        embeddings: list[list[float]],
+        metadatas: list[dict],
+    ) -> None: ...
+
+    def delete(self, *, where: dict | None = None, ids: list[str] | None = None) -> None: ...
+
+    def set_tags(self, *, doc_id: str, tags: dict) -> None: ...
+
+    def fingerprints(self, *, where: dict | None = None) -> dict[str, str | None]: ...
+
+    def query(
+        self,
+        *,
+        embedding: list[float],
+        top_k: int,
+        where: dict | None = None,
+    ) -> dict: ...
+
+    def query_many(
+        self,
+        *,
+        embeddings: list[list[float]],
+        top_k: int,
+        where: dict | None = None,
+    ) -> dict: ...
+
+    def reset(self) -> None: ...
 
 
 class VectorStore:
@@ -22,21 +72,79 @@ class VectorStore:
         self.collection = self.client.get_or_create_collection(
             name=self.settings.collection_name
         )
+        self._lock = threading.RLock()
+        self._non_empty = False
+
+    def _refresh_collection(self) -> None:
+        self.collection = self.client.get_or_create_collection(
+            name=self.settings.collection_name
+        )
+
+    def _call(self, method: str, **kwargs):
+        # Another process may have reset the collection under a pooled handle.
+        try:
+            return getattr(self.collection, method)(**kwargs)
+        except NotFoundError:
+            with self._lock:
+                self._refresh_collection()
+            return getattr(self.collection, method)(**kwargs)
 
     def count(self) -> int:
-        return self.collection.count()
+        return self._call("count")
+
+    def is_empty(self) -> bool:
+        if self._non_empty:
+            return False
+        empty = self.count() == 0
+        self._non_empty = not empty
+        return empty
 
     def upsert(
         self,
         *,
         ids: list[str],
         embeddings: list[list[float]],
-        documents: list[str],
         metadatas: list[dict],
     ) -> None:
-        self.collection.upsert(
-            ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas
-        )
+        with self._lock:
+            self._non_empty = False
+            self._call(
+                "upsert",
+                ids=ids,
+                embeddings=embeddings,
+                metadatas=metadatas,
+            )
+
+    def delete(self, *, where: dict | None = None, ids: list[str] | None = None) -> None:
+        if ids is not None and not ids:
+            return
+        with self._lock:
+            self._non_empty = False
+            self._call("delete", ids=ids, where=where)
+
+    def set_tags(self, *, doc_id: str, tags: dict) -> None:
+        """Set ``tags`` on every vector of ``doc_id``, dropping scope flags not in ``tags``."""
+        with self._lock:
+            result = self._call("get", where={"doc_id": doc_id}, include=["metadatas"])
+            if not result["ids"]:
+                return
+            # Chroma merges metadata on update; a None value drops the key.
+            metadatas = [
+                {
+                    **{key: None for key in (meta or {}) if is_scope_key(key) and key not in tags},
+                    **tags,
+                }
+                for meta in result["metadatas"]
+            ]
+            self._call("update", ids=result["ids"], metadatas=metadatas)
+
+    def fingerprints(self, *, where: dict | None = None) -> dict[str, str | None]:
+        """Map every stored id to its ``text_hash`` metadata (None if missing)."""
+        result = self._call("get", where=where, include=["metadatas"])
+        return {
+            item: (meta or {}).get("text_hash")
+            for item, meta in zip(result["ids"], result["metadatas"])
+        }
 
     def query(
         self,
@@ -45,15 +153,83 @@ class VectorStore:
         top_k: int,
         where: dict | None = None,
     ) -> dict:
-        return self.collection.query(
-            query_embeddings=[embedding],
+        return self.query_many(embeddings=[embedding], top_k=top_k, where=where)
+
+    def query_many(
+        self,
+        *,
+        embeddings: list[list[float]],
+        top_k: int,
+        where: dict | None = None,
+    ) -> dict:
+        return self._call(
+            "query",
+            query_embeddings=embeddings,
             n_results=top_k,
-            include=["documents", "metadatas", "distances"],
+            include=["metadatas", "distances"],
             where=where,
         )
 
     def reset(self) -> None:
-        self.client.delete_collection(name=self.settings.collection_name)
-        self.collection = self.client.get_or_create_collection(
-            name=self.settings.collection_name
-        )
+        with self._lock:
+            self._non_empty = False
+            try:
+                self.client.delete_collection(name=self.settings.collection_name)
+            except NotFoundError:
+                pass
+            self._refresh_collection()
+
+
+_STORES: dict[tuple[str, str, str], VectorBackend] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def resolve_vector_backend(workspace_id: str | None) -> str:
+    value = (
+        get_setting(workspace_id, "vector_backend")
+        or get_setting(None, "vector_backend")
+        or os.getenv("STUDYFLOW_VECTOR_BACKEND", "chroma")
+    )
+    value = value.strip().lower()
+    return value if value in VECTOR_BACKENDS else "chroma"
+
+
+def workspace_store_settings(workspace_id: str) -> VectorStoreSettings:
+    backend = resolve_vector_backend(workspace_id)
+    return VectorStoreSettings(
+        persist_directory=get_workspaces_dir()
+        / workspace_id
+        / "index"
+        / ("chroma" if backend == "chroma" else "vectors"),
+        collection_name=f"workspace_{workspace_id}",
+        backend=backend,
+    )
+
+
+def get_vector_store(settings: VectorStoreSettings) -> VectorBackend:
+    """Return the process-wide store for a collection, opening it on first use."""
+    key = (
+        str(settings.persist_directory.resolve()),
+        settings.collection_name,
+        settings.backend,
+    )
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            if settings.backend == "numpy":
+                store = NumpyVectorStore(settings)
+            else:
+                store = VectorStore(settings)
+            _STORES[key] = store
+        return store
+
+
+def release_vector_stores(persist_directory: Path | None = None) -> None:
+    """Drop pooled stores, e.g. before a workspace's index directory is removed."""
+    with _STORES_LOCK:
+        if persist_directory is None:
+            _STORES.clear()
+            return
+        root = persist_directory.resolve()
+        for key in [key for key in _STORES if Path(key[0]).is_relative_to(root)]:
+            _STORES.pop(key, None)
@@ -3,6 +3,7 @@ from __future__ import annotations
 import threading
 from concurrent.futures import Future, ThreadPoolExecutor
 
+from core.retrieval.embed_pool import shutdown_embed_pool
 from core.tasks.runner import run_task
 
 _EXECUTOR: ThreadPoolExecutor | None = None
@@ -38,3 +39,4 @@ def shutdown_executor(wait: bool = True, cancel_futures: bool = False) -> None:
             executor.shutdown(wait=wait, cancel_futures=cancel_futures)
         except Exception:
             pass
+    shutdown_embed_pool(wait=wait)
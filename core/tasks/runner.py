@@ -93,6 +93,11 @@ def _run_index(task_id: str, payload: dict) -> dict:
     workspace_id = payload["workspace_id"]
     doc_ids = payload.get("doc_ids")
     batch_size = payload.get("batch_size", 32)
+
+    def _checkpoint(state: dict) -> None:
+        payload["checkpoint"] = state
+        update_payload(task_id, payload)
+
     result = build_or_refresh_index(
         workspace_id=workspace_id,
         reset=payload.get("reset", True),
@@ -100,10 +105,16 @@ def _run_index(task_id: str, payload: dict) -> dict:
         doc_ids=doc_ids,
         progress_cb=_progress_cb(task_id),
         stop_check=_stop_check(task_id),
+        incremental=payload.get("incremental", True),
+        checkpoint=payload.get("checkpoint"),
+        checkpoint_cb=_checkpoint,
     )
+    if payload.pop("checkpoint", None) is not None:
+        update_payload(task_id, payload)
     build_bm25_index(workspace_id)
     return {
         "indexed_count": result.indexed_count,
+        "removed_count": result.removed_count,
         "chunk_count": result.chunk_count,
         "doc_count": result.doc_count,
     }
@@ -348,13 +359,21 @@ def enqueue_task(*, workspace_id: str, type: str, payload: dict) -> str:
 
 
 def retry_task(task_id: str) -> dict:
+    """Run the task again from the start, discarding any saved checkpoint."""
+    task = get_task(task_id)
+    if task:
+        payload = _parse_payload(task.payload_json)
+        if payload.pop("checkpoint", None) is not None:
+            update_payload(task_id, payload)
     update_status(task_id, "queued")
     update_progress(task_id, 0)
     return run_task(task_id)
 
 
 def resume_task(task_id: str) -> dict:
-    return retry_task(task_id)
+    """Run the task again, continuing from its checkpoint when it saved one."""
+    update_status(task_id, "queued")
+    return run_task(task_id)
 
 
 def cancel_task(task_id: str) -> None:
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import threading
+from collections import Counter
+
+_LOCK = threading.Lock()
+_COUNTERS: Counter[str] = Counter()
+
+
+def incr(name: str, amount: int = 1) -> None:
+    if amount:
+        with _LOCK:
+            _COUNTERS[name] += amount
+
+
+def counters(prefix: str = "") -> dict[str, int]:
+    with _LOCK:
+        return {key: value for key, value in sorted(_COUNTERS.items()) if key.startswith(prefix)}
+
+
+def reset_counters(prefix: str = "") -> None:
+    with _LOCK:
+        for key in [key for key in _COUNTERS if key.startswith(prefix)]:
+            del _COUNTERS[key]
@@ -7,6 +7,7 @@ from dataclasses import dataclass
 from pathlib import Path
 
 from core.retrieval.retriever import Hit
+from core.telemetry.metrics import counters
 from infra.db import get_workspaces_dir
 
 
@@ -29,6 +30,8 @@ class RunLog:
     latency_ms: int
     citation_incomplete: bool | None = None
     errors: str | None = None
+    cache_counters: dict | None = None
+    retrieval_timings: dict | None = None
 
 
 def _run_dir(workspace_id: str) -> Path:
@@ -56,6 +59,7 @@ def log_run(
     latency_ms: int,
     citation_incomplete: bool | None = None,
     errors: str | None = None,
+    retrieval_timings: dict | None = None,
 ) -> str:
     run_id = str(uuid.uuid4())
     payload = RunLog(
@@ -85,6 +89,8 @@ def log_run(
         latency_ms=latency_ms,
         citation_incomplete=citation_incomplete,
         errors=errors,
+        cache_counters=counters(),
+        retrieval_timings=retrieval_timings,
     )
     try:
         run_dir = _run_dir(workspace_id)
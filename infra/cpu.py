@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+
+def physical_cores() -> int:
+    """Physical core count (Linux /proc/cpuinfo), falling back to logical CPUs."""
+    try:
+        logical = len(os.sched_getaffinity(0))
+    except AttributeError:
+        logical = os.cpu_count() or 1
+    try:
+        cores: set[tuple[str, str]] = set()
+        physical_id = core_id = None
+        for line in Path("/proc/cpuinfo").read_text().splitlines():
+            key, _, value = line.partition(":")
+            key = key.strip()
+            if key == "physical id":
+                physical_id = value.strip()
+            elif key == "core id":
+                core_id = value.strip()
+            elif not key and physical_id is not None and core_id is not None:
+                cores.add((physical_id, core_id))
+                physical_id = core_id = None
+        if physical_id is not None and core_id is not None:
+            cores.add((physical_id, core_id))
+        if cores:
+            return max(min(len(cores), logical), 1)
+    except OSError:
+        pass
+    return max(logical, 1)
+
+
+def process_count(name: str) -> int:
+    """Worker processes from env ``name``: a count (0 = in-process) or auto.
+
+    auto, and any value that does not parse, means one per physical core.
+    """
+    value = os.getenv(name, "auto").strip().lower()
+    try:
+        return max(int(value or 0), 0)
+    except ValueError:
+        return physical_cores()
@@ -1,3 +1,5 @@
+import sqlite3
+
 from infra.db import get_connection
 
 
@@ -10,6 +12,160 @@ def _ensure_column(table: str, column: str, column_def: str) -> None:
             connection.commit()
 
 
+def _ensure_chunks_fts() -> None:
+    """Create the FTS5 mirror of chunks.text, kept in sync by triggers."""
+    with get_connection() as connection:
+        exists = connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chunks_fts'"
+        ).fetchone()
+        if exists:
+            return
+        try:
+            connection.execute(
+                """
+                CREATE VIRTUAL TABLE chunks_fts USING fts5(
+                    text, content='chunks', content_rowid='rowid', tokenize='unicode61'
+                )
+                """
+            )
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5; the lexical fallback stays on the BM25 index.
+            return
+        connection.executescript(
+            """
+            CREATE TRIGGER IF NOT EXISTS chunks_fts_ai AFTER INSERT ON chunks BEGIN
+                INSERT INTO chunks_fts(rowid, text) VALUES (new.rowid, new.text);
+            END;
+            CREATE TRIGGER IF NOT EXISTS chunks_fts_ad AFTER DELETE ON chunks BEGIN
+                INSERT INTO chunks_fts(chunks_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+            END;
+            CREATE TRIGGER IF NOT EXISTS chunks_fts_au AFTER UPDATE OF text ON chunks BEGIN
+                INSERT INTO chunks_fts(chunks_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+                INSERT INTO chunks_fts(rowid, text) VALUES (new.rowid, new.text);
+            END;
+            """
+        )
+        connection.execute("INSERT INTO chunks_fts(chunks_fts) VALUES ('rebuild')")
+        connection.commit()
+
+
+def _ensure_scope_retag_queue() -> None:
+    """Queue documents whose course/project membership or doc_type changes.
+
+    Vectors carry these as filter tags; vector queries and index builds
+    re-tag queued documents, whichever code path made the change.
+    """
+    with get_connection() as connection:
+        connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS scope_retag_queue (doc_id TEXT PRIMARY KEY) WITHOUT ROWID;
+            CREATE TRIGGER IF NOT EXISTS scope_retag_course_ai AFTER INSERT ON course_documents BEGIN
+                INSERT OR IGNORE INTO scope_retag_queue(doc_id) VALUES (new.doc_id);
+            END;
+            CREATE TRIGGER IF NOT EXISTS scope_retag_course_ad AFTER DELETE ON course_documents BEGIN
+                INSERT OR IGNORE INTO scope_retag_queue(doc_id) VALUES (old.doc_id);
+            END;
+            CREATE TRIGGER IF NOT EXISTS scope_retag_material_ai AFTER INSERT ON lecture_material BEGIN
+                INSERT OR IGNORE INTO scope_retag_queue(doc_id) VALUES (new.doc_id);
+            END;
+            CREATE TRIGGER IF NOT EXISTS scope_retag_material_ad AFTER DELETE ON lecture_material BEGIN
+                INSERT OR IGNORE INTO scope_retag_queue(doc_id) VALUES (old.doc_id);
+            END;
+            CREATE TRIGGER IF NOT EXISTS scope_retag_lecture_au AFTER UPDATE OF course_id ON lecture BEGIN
+                INSERT OR IGNORE INTO scope_retag_queue(doc_id)
+                SELECT doc_id FROM lecture_material WHERE lecture_id = new.id;
+            END;
+            CREATE TRIGGER IF NOT EXISTS scope_retag_lecture_ad AFTER DELETE ON lecture BEGIN
+                INSERT OR IGNORE INTO scope_retag_queue(doc_id)
+                SELECT doc_id FROM lecture_material WHERE lecture_id = old.id;
+            END;
+            CREATE TRIGGER IF NOT EXISTS scope_retag_papers_ai AFTER INSERT ON papers BEGIN
+                INSERT OR IGNORE INTO scope_retag_queue(doc_id) VALUES (new.doc_id);
+            END;
+            CREATE TRIGGER IF NOT EXISTS scope_retag_papers_ad AFTER DELETE ON papers BEGIN
+                INSERT OR IGNORE INTO scope_retag_queue(doc_id) VALUES (old.doc_id);
+            END;
+            CREATE TRIGGER IF NOT EXISTS scope_retag_papers_au AFTER UPDATE OF project_id, doc_id ON papers BEGIN
+                INSERT OR IGNORE INTO scope_retag_queue(doc_id) VALUES (old.doc_id);
+                INSERT OR IGNORE INTO scope_retag_queue(doc_id) VALUES (new.doc_id);
+            END;
+            CREATE TRIGGER IF NOT EXISTS scope_retag_doc_type_au AFTER UPDATE OF doc_type ON documents
+            WHEN old.doc_type IS NOT new.doc_type BEGIN
+                INSERT OR IGNORE INTO scope_retag_queue(doc_id) VALUES (new.id);
+            END;
+            """
+        )
+        connection.commit()
+
+
+# LSH banding of chunk MinHash signatures; must match core.ingest.dedup.
+_LSH_BANDS = 16
+_LSH_BAND_BYTES = 16
+
+
+def _lsh_band_rows(chunk: str) -> str:
+    """SELECT producing the ``chunk_lsh`` rows of ``chunk`` (a chunks row alias)."""
+    bands = " UNION ALL ".join(f"SELECT {band} AS band" for band in range(_LSH_BANDS))
+    return f"""
+        SELECT {chunk}.workspace_id, bands.band,
+               substr({chunk}.minhash, bands.band * {_LSH_BAND_BYTES} + 1, {_LSH_BAND_BYTES}),
+               {chunk}.id
+        FROM ({bands}) AS bands
+    """
+
+
+def _ensure_chunk_dedup() -> None:
+    """Near-duplicate bookkeeping on chunks.
+
+    ``chunk_lsh`` holds the LSH band keys of canonical chunks so ingest looks
+    up only the bands of new chunks. When a canonical chunk is deleted, the
+    lowest remaining chunk id of its group is promoted and the rest point at
+    it; the promoted chunk's band keys are added. Both happen in triggers,
+    whichever code path deleted the chunk.
+    """
+    with get_connection() as connection:
+        created = connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chunk_lsh'"
+        ).fetchone() is None
+        connection.executescript(
+            f"""
+            CREATE INDEX IF NOT EXISTS idx_chunks_dup_of ON chunks (dup_of) WHERE dup_of IS NOT NULL;
+            CREATE TRIGGER IF NOT EXISTS chunks_dup_promote_ad AFTER DELETE ON chunks
+            WHEN old.dup_of IS NULL BEGIN
+                UPDATE chunks SET dup_of = (SELECT MIN(id) FROM chunks WHERE dup_of = old.id)
+                WHERE dup_of = old.id AND id > (SELECT MIN(id) FROM chunks WHERE dup_of = old.id);
+                UPDATE chunks SET dup_of = NULL WHERE dup_of = old.id;
+            END;
+            CREATE TABLE IF NOT EXISTS chunk_lsh (
+                workspace_id TEXT NOT NULL,
+                band INTEGER NOT NULL,
+                key BLOB NOT NULL,
+                chunk_id TEXT NOT NULL,
+                PRIMARY KEY (workspace_id, band, key, chunk_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_chunk_lsh_chunk ON chunk_lsh (chunk_id);
+            CREATE TRIGGER IF NOT EXISTS chunks_lsh_ad AFTER DELETE ON chunks BEGIN
+                DELETE FROM chunk_lsh WHERE chunk_id = old.id;
+            END;
+            CREATE TRIGGER IF NOT EXISTS chunks_lsh_promote_au AFTER UPDATE OF dup_of ON chunks
+            WHEN old.dup_of IS NOT NULL AND new.dup_of IS NULL AND new.minhash IS NOT NULL BEGIN
+                INSERT OR IGNORE INTO chunk_lsh (workspace_id, band, key, chunk_id)
+                {_lsh_band_rows("new")};
+            END;
+            """
+        )
+        if created:
+            # Databases deduplicated before chunk_lsh existed.
+            connection.execute(
+                f"""
+                INSERT OR IGNORE INTO chunk_lsh (workspace_id, band, key, chunk_id)
+                {_lsh_band_rows("chunks")}
+                JOIN chunks ON chunks.dup_of IS NULL AND chunks.minhash IS NOT NULL
+                """
+            )
+        connection.commit()
+
+
 def init_db() -> None:
     with get_connection() as connection:
         cursor = connection.cursor()
@@ -650,6 +806,8 @@ def init_db() -> None:
     _ensure_column("assets", "active_version_id", "TEXT")
     _ensure_column("chunks", "text_source", "TEXT")
     _ensure_column("chunks", "metadata_json", "TEXT")
+    _ensure_column("chunks", "minhash", "BLOB")
+    _ensure_column("chunks", "dup_of", "TEXT")
     _ensure_column("asset_versions", "provider", "TEXT")
     _ensure_column("asset_versions", "temperature", "REAL")
     _ensure_column("asset_versions", "max_tokens", "INTEGER")
@@ -660,6 +818,12 @@ def init_db() -> None:
     _ensure_column("coach_sessions", "name", "TEXT")
 
     with get_connection() as connection:
+        connection.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_chunks_workspace_order
+            ON chunks (workspace_id, doc_id, chunk_index, id)
+            """
+        )
         connection.execute(
             "UPDATE documents SET doc_type = 'other' WHERE doc_type IS NULL OR doc_type = ''"
         )
@@ -679,3 +843,7 @@ def init_db() -> None:
             """
         )
         connection.commit()
+
+    _ensure_chunks_fts()
+    _ensure_scope_retag_queue()
+    _ensure_chunk_dedup()
@@ -0,0 +1,67 @@
+import json
+import random
+import sys
+import time
+from dataclasses import replace
+
+import numpy as np
+
+from core.retrieval.embedder import build_embedding_settings, embed_texts
+
+_WORDS = (
+    "gradient descent attention transformer convolution regularization entropy "
+    "posterior likelihood variance kernel embedding retrieval latency throughput "
+    "benchmark dataset ablation baseline optimizer momentum dropout encoder decoder"
+).split()
+
+
+def _corpus(slides: int, paragraphs: int, seed: int = 0) -> list[str]:
+    """Short slide bullets interleaved with paper-length paragraphs."""
+    rng = random.Random(seed)
+    texts = [" ".join(rng.choices(_WORDS, k=rng.randint(3, 10))) for _ in range(slides)]
+    texts += [" ".join(rng.choices(_WORDS, k=rng.randint(90, 160))) for _ in range(paragraphs)]
+    rng.shuffle(texts)
+    return texts
+
+
+def _run(texts: list[str], settings) -> tuple[float, list[list[float]]]:
+    start = time.perf_counter()
+    vectors = embed_texts(texts, settings)
+    return time.perf_counter() - start, vectors
+
+
+def main() -> None:
+    slides = int(sys.argv[1]) if len(sys.argv) > 1 else 1500
+    paragraphs = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    model = sys.argv[3] if len(sys.argv) > 3 else None
+    texts = _corpus(slides, paragraphs)
+    base = build_embedding_settings(model=model)
+    fixed = replace(base, token_budget=0)
+    bucketed = replace(base, token_budget=base.token_budget or 8192)
+
+    embed_texts(texts[:64], fixed)  # load the model outside the timings
+    results: dict = {
+        "model": base.model,
+        "texts": len(texts),
+        "slides": slides,
+        "paragraphs": paragraphs,
+        "batch_size": base.batch_size,
+        "token_budget": bucketed.token_budget,
+    }
+    outputs = {}
+    for name, settings in (("fixed", fixed), ("bucketed", bucketed)):
+        elapsed, vectors = _run(texts, settings)
+        outputs[name] = np.asarray(vectors)
+        results[name] = {
+            "seconds": round(elapsed, 3),
+            "chunks_per_sec": round(len(texts) / elapsed, 1),
+        }
+    results["speedup"] = round(
+        results["bucketed"]["chunks_per_sec"] / results["fixed"]["chunks_per_sec"], 2
+    )
+    results["max_abs_diff"] = float(np.abs(outputs["fixed"] - outputs["bucketed"]).max())
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
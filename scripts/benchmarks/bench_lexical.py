@@ -0,0 +1,68 @@
+import json
+import statistics
+import sys
+import time
+
+from core.retrieval.bm25_index import query_bm25
+from core.retrieval.fts_index import query_fts
+from infra.db import get_workspaces_dir
+from service.retrieval_service import ensure_bm25_index
+
+QUERIES = [
+    "gradient descent",
+    "attention mechanism",
+    "definition",
+    "formula",
+    "results",
+    "related work",
+]
+
+
+def _run(fn, workspace_id: str, query: str, top_k: int, rounds: int) -> tuple[list[str], list[float]]:
+    timings = []
+    hits: list[dict] = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        hits = fn(workspace_id=workspace_id, query=query, top_k=top_k)
+        timings.append((time.perf_counter() - start) * 1000)
+    return [hit["chunk_id"] for hit in hits], timings
+
+
+def main() -> None:
+    if len(sys.argv) < 2:
+        print("usage: python scripts/benchmarks/bench_lexical.py <workspace_id> [top_k] [rounds]")
+        raise SystemExit(1)
+    workspace_id = sys.argv[1]
+    top_k = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    rounds = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+
+    start = time.perf_counter()
+    ensure_bm25_index(workspace_id)
+    bm25_load_ms = (time.perf_counter() - start) * 1000
+
+    results = {"workspace_id": workspace_id, "top_k": top_k, "bm25_load_ms": round(bm25_load_ms, 2), "queries": {}}
+    bm25_all: list[float] = []
+    fts_all: list[float] = []
+    for query in QUERIES:
+        bm25_ids, bm25_ms = _run(query_bm25, workspace_id, query, top_k, rounds)
+        fts_ids, fts_ms = _run(query_fts, workspace_id, query, top_k, rounds)
+        bm25_all.extend(bm25_ms)
+        fts_all.extend(fts_ms)
+        overlap = len(set(bm25_ids) & set(fts_ids)) / max(len(bm25_ids), 1)
+        results["queries"][query] = {
+            "bm25_p50_ms": round(statistics.median(bm25_ms), 2),
+            "fts5_p50_ms": round(statistics.median(fts_ms), 2),
+            "overlap_at_k": round(overlap, 3),
+        }
+    results["bm25_p50_ms"] = round(statistics.median(bm25_all), 2)
+    results["fts5_p50_ms"] = round(statistics.median(fts_all), 2)
+
+    output_dir = get_workspaces_dir() / workspace_id / "outputs" / "benchmarks"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = output_dir / f"bench_lexical_{int(time.time())}.json"
+    output_path.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(str(output_path))
+
+
+if __name__ == "__main__":
+    main()
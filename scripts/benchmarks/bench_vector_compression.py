@@ -0,0 +1,110 @@
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from core.retrieval.numpy_store import NumpyVectorStore
+from core.retrieval.vector_store import VectorStoreSettings
+
+_MODES = {
+    "float32": {},
+    "int8": {"STUDYFLOW_VECTOR_DTYPE": "int8"},
+    "pca": {"STUDYFLOW_VECTOR_REDUCE": "pca"},
+    "pca_int8": {"STUDYFLOW_VECTOR_REDUCE": "pca", "STUDYFLOW_VECTOR_DTYPE": "int8"},
+    "truncate_int8": {"STUDYFLOW_VECTOR_REDUCE": "truncate", "STUDYFLOW_VECTOR_DTYPE": "int8"},
+}
+_KNOBS = (
+    "STUDYFLOW_VECTOR_REDUCE",
+    "STUDYFLOW_VECTOR_DTYPE",
+    "STUDYFLOW_VECTOR_DIMS",
+    "STUDYFLOW_VECTOR_COMPRESS_MIN_ROWS",
+    "STUDYFLOW_VECTOR_RESCORE",
+    "STUDYFLOW_VECTOR_IVF_MIN_ROWS",
+)
+
+
+def _corpus(rows: int, dim: int, seed: int = 0) -> np.ndarray:
+    """Clustered vectors with a decaying spectrum, like sentence embeddings."""
+    rng = np.random.default_rng(seed)
+    spectrum = (1.0 / np.sqrt(np.arange(1, dim + 1))).astype(np.float32)
+    centers = rng.normal(size=(max(rows // 200, 8), dim)) * spectrum
+    vectors = centers[rng.integers(0, len(centers), rows)] + 0.4 * rng.normal(size=(rows, dim)) * spectrum
+    vectors = vectors.astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _disk_bytes(path: Path, name: str) -> int:
+    return sum(item.stat().st_size for item in path.rglob(name) if item.is_file())
+
+
+def _measure(store, queries: np.ndarray, truth: list[set[str]], top_k: int) -> dict:
+    timings = []
+    recalls = []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = store.query(embedding=query.tolist(), top_k=top_k)
+        timings.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(set(result["ids"][0]) & expected) / top_k)
+    return {
+        "p50_ms": round(statistics.median(timings), 3),
+        "recall_at_k": round(float(np.mean(recalls)), 4),
+    }
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    dim = int(sys.argv[2]) if len(sys.argv) > 2 else 384
+    dims = int(sys.argv[3]) if len(sys.argv) > 3 else 128
+    top_k = int(sys.argv[4]) if len(sys.argv) > 4 else 10
+    vectors = _corpus(rows, dim)
+    queries = _corpus(50, dim, seed=1)
+    truth = [{f"c{row}" for row in np.argsort(-scores)[:top_k]} for scores in queries @ vectors.T]
+
+    previous = {name: os.environ.get(name) for name in _KNOBS}
+    results: dict = {"rows": rows, "dim": dim, "dims": dims, "top_k": top_k}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for mode, env in _MODES.items():
+                for name in _KNOBS:
+                    os.environ.pop(name, None)
+                os.environ.update(env)
+                os.environ["STUDYFLOW_VECTOR_DIMS"] = str(dims)
+                os.environ["STUDYFLOW_VECTOR_COMPRESS_MIN_ROWS"] = "1"
+                os.environ["STUDYFLOW_VECTOR_IVF_MIN_ROWS"] = "0"
+                root = Path(tmp) / mode
+                store = NumpyVectorStore(VectorStoreSettings(root, "bench", "numpy"))
+                start = time.perf_counter()
+                store.upsert(
+                    ids=[f"c{i}" for i in range(rows)],
+                    embeddings=vectors.tolist(),
+                    metadatas=[{"chunk_id": f"c{i}", "doc_id": f"d{i // 50}"} for i in range(rows)],
+                )
+                entry = {
+                    "fill_ms": round((time.perf_counter() - start) * 1000, 1),
+                    "vectors_bytes": _disk_bytes(root, "vectors.bin"),
+                    "full_bytes": _disk_bytes(root, "full.bin"),
+                }
+                if env:
+                    for factor in ("0", "4"):
+                        os.environ["STUDYFLOW_VECTOR_RESCORE"] = factor
+                        entry[f"rescore_{factor}"] = _measure(store, queries, truth, top_k)
+                else:
+                    entry.update(_measure(store, queries, truth, top_k))
+                results[mode] = entry
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
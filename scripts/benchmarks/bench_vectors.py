@@ -0,0 +1,103 @@
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from core.retrieval.numpy_store import NumpyVectorStore
+from core.retrieval.vector_store import VectorStore, VectorStoreSettings
+
+
+def _corpus(rows: int, dim: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(rows // 200, 8), dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), rows)] + 0.6 * rng.normal(size=(rows, dim))
+    vectors = vectors.astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _disk_bytes(path: Path) -> int:
+    return sum(item.stat().st_size for item in path.rglob("*") if item.is_file())
+
+
+def _fill(store, vectors: np.ndarray, batch: int = 1000) -> float:
+    start = time.perf_counter()
+    for offset in range(0, len(vectors), batch):
+        block = vectors[offset : offset + batch]
+        ids = [f"c{offset + i}" for i in range(len(block))]
+        store.upsert(
+            ids=ids,
+            embeddings=block.tolist(),
+            metadatas=[
+                {"chunk_id": item, "doc_id": f"d{(offset + i) // 50}"}
+                for i, item in enumerate(ids)
+            ],
+        )
+    return (time.perf_counter() - start) * 1000
+
+
+def _measure(store, queries: np.ndarray, truth: list[set[str]], top_k: int) -> dict:
+    timings = []
+    recalls = []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = store.query(embedding=query.tolist(), top_k=top_k)
+        timings.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(set(result["ids"][0]) & expected) / top_k)
+    return {
+        "p50_ms": round(statistics.median(timings), 3),
+        "recall_at_k": round(float(np.mean(recalls)), 4),
+    }
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    dim = int(sys.argv[2]) if len(sys.argv) > 2 else 384
+    top_k = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    vectors = _corpus(rows, dim)
+    queries = _corpus(50, dim, seed=1)
+    exact = queries @ vectors.T
+    truth = [{f"c{row}" for row in np.argsort(-scores)[:top_k]} for scores in exact]
+
+    results: dict = {"rows": rows, "dim": dim, "top_k": top_k}
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        engines = {
+            "chroma": lambda: VectorStore(VectorStoreSettings(root / "chroma", "bench")),
+            "numpy": lambda: NumpyVectorStore(VectorStoreSettings(root / "numpy", "bench", "numpy")),
+        }
+        previous_min_rows = os.environ.get("STUDYFLOW_VECTOR_IVF_MIN_ROWS")
+        os.environ["STUDYFLOW_VECTOR_IVF_MIN_ROWS"] = "0"
+        try:
+            for name, factory in engines.items():
+                store = factory()
+                fill_ms = _fill(store, vectors)
+                start = time.perf_counter()
+                store = factory()
+                store.count()
+                open_ms = (time.perf_counter() - start) * 1000
+                results[name] = {
+                    "fill_ms": round(fill_ms, 1),
+                    "open_ms": round(open_ms, 2),
+                    "disk_bytes": _disk_bytes(root / name),
+                    **_measure(store, queries, truth, top_k),
+                }
+            os.environ["STUDYFLOW_VECTOR_IVF_MIN_ROWS"] = "1"
+            ivf = NumpyVectorStore(VectorStoreSettings(root / "ivf", "bench", "numpy"))
+            _fill(ivf, vectors, batch=len(vectors))
+            results["numpy_ivf"] = _measure(ivf, queries, truth, top_k)
+        finally:
+            if previous_min_rows is None:
+                os.environ.pop("STUDYFLOW_VECTOR_IVF_MIN_ROWS", None)
+            else:
+                os.environ["STUDYFLOW_VECTOR_IVF_MIN_ROWS"] = previous_min_rows
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ from datetime import datetime, timezone
 
 from core.agents.course_agent import AgentOutput, CourseAgent
 from core.quality.citations_check import check_citations
+from core.retrieval.scopes import course_scope, scope_doc_ids
 from core.telemetry.run_logger import log_run
 from infra.db import get_connection
 from service.asset_service import (
@@ -80,17 +81,8 @@ def list_course_documents(course_id: str) -> list[dict]:
 
 
 def list_course_doc_ids(course_id: str) -> list[str]:
-    with get_connection() as connection:
-        rows = connection.execute(
-            """
-            SELECT course_documents.doc_id as doc_id
-            FROM course_documents
-            JOIN documents ON documents.id = course_documents.doc_id
-            WHERE course_documents.course_id = ? AND documents.doc_type = 'course'
-            """,
-            (course_id,),
-        ).fetchall()
-    return [row["doc_id"] for row in rows]
+    """Documents in the course's retrieval scope: linked documents plus lecture materials."""
+    return scope_doc_ids(course_scope(course_id))
 
 
 def generate_overview(
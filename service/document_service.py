@@ -8,7 +8,7 @@ from infra.db import get_connection, get_workspaces_dir
 
 DOC_TYPES = {"course", "paper", "other"}
 from core.indexing.sync import delete_document, delete_document_vectors
-from core.retrieval.bm25_index import build_bm25_index
+from core.retrieval.bm25_index import remove_document_from_bm25_index
 
 
 def _now_iso() -> str:
@@ -233,12 +233,15 @@ def set_document_source(
 
 
 def delete_document_by_id(workspace_id: str, doc_id: str) -> None:
+    from service.retrieval_service import reembed_documents
+
     delete_document_vectors(workspace_id, doc_id)
-    delete_document(workspace_id, doc_id)
+    promoted = delete_document(workspace_id, doc_id)
     try:
-        build_bm25_index(workspace_id)
+        remove_document_from_bm25_index(workspace_id, doc_id)
     except Exception:
         pass
+    reembed_documents(workspace_id, promoted)
 
 
 def add_document_tags(doc_id: str, tags: list[str]) -> None:
@@ -9,6 +9,7 @@ from pathlib import Path
 from core.indexing.planner import plan_document
 from core.indexing.sync import delete_document, delete_document_vectors
 from core.ingest.chunker import Chunk, chunk_pages
+from core.ingest.dedup import lsh_rows, mark_near_duplicates
 from core.ingest.document_reader import (
     DocumentReadError,
     read_docx,
@@ -19,9 +20,14 @@ from core.ingest.document_reader import (
 )
 from core.ingest.ocr import OCRSettings
 from core.ingest.pdf_reader import PDFReadError, read_pdf
-from core.retrieval.bm25_index import build_bm25_index
+from core.retrieval.bm25_index import (
+    add_document_to_bm25_index,
+    remove_document_from_bm25_index,
+)
+from core.retrieval.result_cache import bump_index_generation
 from infra.db import get_connection
 from service.document_service import normalize_doc_type
+from service.retrieval_service import reembed_documents
 
 
 class IngestError(RuntimeError):
@@ -46,6 +52,9 @@ class IngestResult:
     image_pages_count: int = 0
     ocr_mode: str = "off"
     warnings: list[str] | None = None
+    duplicate_chunks: int = 0
+    dedup_ratio: float = 0.0
+    ocr_pages_per_sec: float = 0.0
 
 
 def _now_iso() -> str:
@@ -82,6 +91,19 @@ def _count_chunks(doc_id: str) -> int:
     return int(row["count"]) if row else 0
 
 
+def _count_duplicates(doc_id: str) -> int:
+    with get_connection() as connection:
+        row = connection.execute(
+            "SELECT COUNT(*) as count FROM chunks WHERE doc_id = ? AND dup_of IS NOT NULL",
+            (doc_id,),
+        ).fetchone()
+    return int(row["count"]) if row else 0
+
+
+def _dedup_ratio(duplicates: int, chunk_count: int) -> float:
+    return round(duplicates / chunk_count, 4) if chunk_count else 0.0
+
+
 def _insert_document(
     *,
     workspace_id: str,
@@ -147,9 +169,9 @@ def _insert_chunks(
             """
             INSERT INTO chunks (
                 id, doc_id, workspace_id, chunk_index, page_start, page_end,
-                text, text_source, metadata_json, created_at
+                text, text_source, metadata_json, minhash, dup_of, created_at
             )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
             [
                 (
@@ -162,11 +184,17 @@ def _insert_chunks(
                     chunk.text,
                     chunk.text_source,
                     chunk.metadata_json,
+                    chunk.minhash,
+                    chunk.dup_of,
                     _now_iso(),
                 )
                 for chunk in chunks
             ],
         )
+        connection.executemany(
+            "INSERT OR IGNORE INTO chunk_lsh (workspace_id, band, key, chunk_id) VALUES (?, ?, ?, ?)",
+            lsh_rows(workspace_id, doc_id, chunks),
+        )
         connection.commit()
 
 
@@ -239,6 +267,7 @@ def ingest_pdf(
         existing = _get_existing_document(workspace_id, sha256)
         if existing:
             chunk_count = _count_chunks(existing["id"])
+            duplicates = _count_duplicates(existing["id"])
             return IngestResult(
                 doc_id=existing["id"],
                 workspace_id=workspace_id,
@@ -256,11 +285,18 @@ def ingest_pdf(
                 image_pages_count=existing.get("image_pages_count") or 0,
                 ocr_mode=existing.get("ocr_mode") or "off",
                 warnings=[],
+                duplicate_chunks=duplicates,
+                dedup_ratio=_dedup_ratio(duplicates, chunk_count),
             )
 
     if plan.action == "update" and plan.doc_id:
         delete_document_vectors(workspace_id, plan.doc_id)
-        delete_document(workspace_id, plan.doc_id)
+        promoted = delete_document(workspace_id, plan.doc_id)
+        try:
+            remove_document_from_bm25_index(workspace_id, plan.doc_id)
+        except Exception:
+            pass
+        reembed_documents(workspace_id, promoted)
 
     try:
         parse_result = read_pdf(
@@ -294,6 +330,7 @@ def ingest_pdf(
         ocr_pages_count=ocr_pages_count,
         image_pages_count=image_pages_count,
     )
+    duplicates = mark_near_duplicates(workspace_id, doc_id, chunks)
     _insert_chunks(doc_id=doc_id, workspace_id=workspace_id, chunks=chunks)
     _insert_document_pages(
         doc_id=doc_id,
@@ -301,9 +338,10 @@ def ingest_pdf(
         pages=parse_result.pages,
     )
     try:
-        build_bm25_index(workspace_id)
+        add_document_to_bm25_index(workspace_id, doc_id)
     except Exception:
         pass
+    bump_index_generation(workspace_id)
 
     return IngestResult(
         doc_id=doc_id,
@@ -322,6 +360,9 @@ def ingest_pdf(
         image_pages_count=image_pages_count,
         ocr_mode=ocr_mode,
         warnings=parse_result.warnings,
+        duplicate_chunks=duplicates,
+        dedup_ratio=_dedup_ratio(duplicates, len(chunks)),
+        ocr_pages_per_sec=parse_result.ocr_pages_per_sec,
     )
 
 
@@ -374,6 +415,7 @@ def ingest_document(
         existing = _get_existing_document(workspace_id, sha256)
         if existing:
             chunk_count = _count_chunks(existing["id"])
+            duplicates = _count_duplicates(existing["id"])
             return IngestResult(
                 doc_id=existing["id"],
                 workspace_id=workspace_id,
@@ -391,11 +433,18 @@ def ingest_document(
                 image_pages_count=existing.get("image_pages_count") or 0,
                 ocr_mode=existing.get("ocr_mode") or "off",
                 warnings=[],
+                duplicate_chunks=duplicates,
+                dedup_ratio=_dedup_ratio(duplicates, chunk_count),
             )
 
     if plan.action == "update" and plan.doc_id:
         delete_document_vectors(workspace_id, plan.doc_id)
-        delete_document(workspace_id, plan.doc_id)
+        promoted = delete_document(workspace_id, plan.doc_id)
+        try:
+            remove_document_from_bm25_index(workspace_id, plan.doc_id)
+        except Exception:
+            pass
+        reembed_documents(workspace_id, promoted)
 
     try:
         if extension in [".txt", ".md"]:
@@ -437,6 +486,7 @@ def ingest_document(
         ocr_pages_count=ocr_pages_count,
         image_pages_count=image_pages_count,
     )
+    duplicates = mark_near_duplicates(workspace_id, doc_id, chunks)
     _insert_chunks(doc_id=doc_id, workspace_id=workspace_id, chunks=chunks)
     _insert_document_pages(
         doc_id=doc_id,
@@ -444,9 +494,10 @@ def ingest_document(
         pages=parse_result.pages,
     )
     try:
-        build_bm25_index(workspace_id)
+        add_document_to_bm25_index(workspace_id, doc_id)
     except Exception:
         pass
+    bump_index_generation(workspace_id)
 
     return IngestResult(
         doc_id=doc_id,
@@ -465,6 +516,8 @@ def ingest_document(
         image_pages_count=image_pages_count,
         ocr_mode=ocr_mode,
         warnings=parse_result.warnings,
+        duplicate_chunks=duplicates,
+        dedup_ratio=_dedup_ratio(duplicates, len(chunks)),
     )
 
 
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from core.rag import classify_query, map_reduce_course_query, map_reduce_project_query
+from core.retrieval.scopes import course_scope, project_scope
 from core.ui_state.storage import get_setting
 from service.retrieval_service import answer_with_retrieval
 
@@ -16,7 +17,7 @@ def course_query(
     workspace_id: str,
     course_id: str,
     query: str,
-    doc_ids: list[str],
+    doc_ids: list[str] | None = None,
 ) -> dict:
     query_type = classify_query(query)
     if query_type == "global":
@@ -36,7 +37,13 @@ def course_query(
         }
     mode = get_setting(workspace_id, "retrieval_mode") or "hybrid"
     answer, hits, citations, run_id = answer_with_retrieval(
-        workspace_id=workspace_id, query=query, mode=mode, top_k=8, doc_ids=doc_ids
+        workspace_id=workspace_id,
+        query=query,
+        mode=mode,
+        top_k=8,
+        doc_ids=doc_ids,
+        # Without explicit doc_ids the indexes resolve the course membership.
+        scope_tag=course_scope(course_id) if doc_ids is None else None,
     )
     return {
         "answer": answer,
@@ -52,7 +59,7 @@ def project_query(
     workspace_id: str,
     project_id: str,
     query: str,
-    doc_ids: list[str],
+    doc_ids: list[str] | None = None,
 ) -> dict:
     query_type = classify_query(query)
     if query_type == "global":
@@ -72,7 +79,12 @@ def project_query(
         }
     mode = get_setting(workspace_id, "retrieval_mode") or "hybrid"
     answer, hits, citations, run_id = answer_with_retrieval(
-        workspace_id=workspace_id, query=query, mode=mode, top_k=8, doc_ids=doc_ids
+        workspace_id=workspace_id,
+        query=query,
+        mode=mode,
+        top_k=8,
+        doc_ids=doc_ids,
+        scope_tag=project_scope(project_id) if doc_ids is None else None,
     )
     return {
         "answer": answer,
@@ -2,7 +2,12 @@ from __future__ import annotations
 
 import hashlib
 import os
+import queue
+import threading
 import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -15,19 +20,49 @@ from core.prompts.instructions import (
     rag_balance_instruction,
 )
 from core.quality.citations_check import check_citations
-from core.retrieval.bm25_index import build_bm25_index, load_bm25_index, query_bm25
+from core.retrieval.bm25_index import (
+    bm25_index_exists,
+    build_bm25_index,
+    load_bm25_index,
+    query_bm25_batch,
+)
 from core.retrieval.embedder import (
     EmbeddingError,
+    EmbeddingSettings,
     build_embedding_settings,
     embed_texts,
 )
-from core.retrieval.embedding_cache import CacheEntry, get_cached_embeddings, put_cached_embeddings
+from core.retrieval.embedding_cache import EmbeddingStore, content_hash, get_embedding_store
+from core.retrieval.fts_index import query_fts, rebuild_fts_index, resolve_lexical_backend
 from core.retrieval.hybrid import fuse_scores
-from core.retrieval.retriever import Hit, retrieve
-from core.retrieval.vector_store import VectorStore, VectorStoreSettings
+from core.retrieval.query_cache import normalize_query
+from core.retrieval.result_cache import (
+    bump_index_generation,
+    get_cached_result,
+    index_generation,
+    put_cached_result,
+    result_cache_stats,
+)
+from core.retrieval.retriever import Hit, collapse_duplicates, hydrate_hits, retrieve_many
+from core.retrieval.scopes import (
+    doc_scope_tags,
+    requeue_retags,
+    retag_pending,
+    scope_doc_ids,
+    scoped_doc_ids,
+    take_retag_queue,
+    vector_tags,
+)
+from core.retrieval.vector_store import (
+    VectorBackend,
+    get_vector_store,
+    resolve_vector_backend,
+    workspace_store_settings,
+)
+from core.telemetry.metrics import incr
 from core.telemetry.run_logger import log_run
-from core.ui_state.storage import get_setting
-from infra.db import get_connection, get_workspaces_dir
+from core.ui_state.storage import get_setting, set_setting
+from infra.db import get_connection
 from service.chat_service import ChatConfigError, chat
 from service.document_service import filter_doc_ids_by_types
 from service.metadata_service import llm_metadata
@@ -37,74 +72,70 @@ class RetrievalError(RuntimeError):
     pass
 
 
+_LEG_EXECUTOR: ThreadPoolExecutor | None = None
+_LEG_LOCK = threading.Lock()
+_LEG_WORKERS = 4
+_LEG_INFLIGHT = 0
+
+
 @dataclass
 class IndexResult:
     doc_count: int
     chunk_count: int
     indexed_count: int
+    removed_count: int = 0
 
 
-def _index_dir(workspace_id: str) -> Path:
-    return get_workspaces_dir() / workspace_id / "index" / "chroma"
-
+_CHUNK_COLUMNS = """
+    chunks.id as chunk_id,
+    chunks.doc_id as doc_id,
+    chunks.workspace_id as workspace_id,
+    chunks.chunk_index as chunk_index,
+    COALESCE(canonical.text, chunks.text) as embed_text,
+    documents.doc_type as doc_type
+"""
 
-def _bm25_index_dir(workspace_id: str) -> Path:
-    return get_workspaces_dir() / workspace_id / "index" / "bm25"
 
-
-def _collection_name(workspace_id: str) -> str:
-    return f"workspace_{workspace_id}"
-
-
-def _chunk_query(doc_ids: list[str] | None = None) -> tuple[str, tuple]:
+def _iter_chunk_batches(
+    workspace_id: str,
+    doc_ids: list[str] | None,
+    batch_size: int,
+    after: tuple | None = None,
+) -> Iterator[list[dict]]:
+    """Yield chunks in (doc_id, chunk_index, id) order using keyset pagination."""
+    scope = ""
+    scope_params: tuple = ()
     if doc_ids:
-        placeholders = ",".join(["?"] * len(doc_ids))
-        query = f"""
-            SELECT chunks.id as chunk_id,
-                   chunks.doc_id as doc_id,
-                   chunks.workspace_id as workspace_id,
-                   chunks.chunk_index as chunk_index,
-                   chunks.page_start as page_start,
-                   chunks.page_end as page_end,
-                   chunks.text as text,
-                   documents.filename as filename,
-                   documents.doc_type as doc_type,
-                   documents.file_type as file_type
-            FROM chunks
-            JOIN documents ON documents.id = chunks.doc_id
-            WHERE chunks.workspace_id = ? AND chunks.doc_id IN ({placeholders})
-            ORDER BY chunks.doc_id, chunks.chunk_index
-            LIMIT ? OFFSET ?
-            """
-        return query, tuple(doc_ids)
-    query = """
-        SELECT chunks.id as chunk_id,
-               chunks.doc_id as doc_id,
-               chunks.workspace_id as workspace_id,
-               chunks.chunk_index as chunk_index,
-               chunks.page_start as page_start,
-               chunks.page_end as page_end,
-               chunks.text as text,
-               documents.filename as filename,
-               documents.doc_type as doc_type,
-               documents.file_type as file_type
-        FROM chunks
-        JOIN documents ON documents.id = chunks.doc_id
-        WHERE chunks.workspace_id = ?
-        ORDER BY chunks.doc_id, chunks.chunk_index
-        LIMIT ? OFFSET ?
-        """
-    return query, tuple()
-
-
-def _fetch_chunk_batch(
-    workspace_id: str, doc_ids: list[str] | None, limit: int, offset: int
-) -> list[dict]:
-    query, doc_params = _chunk_query(doc_ids)
-    params = (workspace_id, *doc_params, limit, offset)
-    with get_connection() as connection:
-        rows = connection.execute(query, params).fetchall()
-    return [dict(row) for row in rows]
+        scope = f" AND chunks.doc_id IN ({','.join(['?'] * len(doc_ids))})"
+        scope_params = tuple(doc_ids)
+    last = tuple(after) if after else None
+    while True:
+        after = ""
+        after_params: tuple = ()
+        if last is not None:
+            after = " AND (chunks.doc_id, chunks.chunk_index, chunks.id) > (?, ?, ?)"
+            after_params = last
+        with get_connection() as connection:
+            rows = connection.execute(
+                f"""
+                SELECT {_CHUNK_COLUMNS}
+                FROM chunks
+                JOIN documents ON documents.id = chunks.doc_id
+                LEFT JOIN chunks AS canonical ON canonical.id = chunks.dup_of
+                WHERE chunks.workspace_id = ?{scope}{after}
+                ORDER BY chunks.doc_id, chunks.chunk_index, chunks.id
+                LIMIT ?
+                """,
+                (workspace_id, *scope_params, *after_params, batch_size),
+            ).fetchall()
+        if not rows:
+            return
+        batch = [dict(row) for row in rows]
+        yield batch
+        if len(batch) < batch_size:
+            return
+        tail = batch[-1]
+        last = (tail["doc_id"], tail["chunk_index"], tail["chunk_id"])
 
 
 def _count_chunks(workspace_id: str, doc_ids: list[str] | None = None) -> int:
@@ -155,12 +186,83 @@ def _fetch_doc_count(workspace_id: str) -> int:
     return int(row["count"]) if row else 0
 
 
-def _build_store(workspace_id: str) -> VectorStore:
-    settings = VectorStoreSettings(
-        persist_directory=_index_dir(workspace_id),
-        collection_name=_collection_name(workspace_id),
-    )
-    return VectorStore(settings)
+def _build_store(workspace_id: str) -> VectorBackend:
+    return get_vector_store(workspace_store_settings(workspace_id))
+
+
+_PIPELINE_DEPTH = 2
+_DONE = object()
+
+
+def _offer(target: queue.Queue, item, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            target.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _pipeline_stage(source, func, target: queue.Queue, stop: threading.Event) -> None:
+    try:
+        for item in source:
+            if stop.is_set():
+                return
+            if not _offer(target, func(item) if func else item, stop):
+                return
+    except BaseException as exc:
+        _offer(target, exc, stop)
+    finally:
+        _offer(target, _DONE, stop)
+
+
+def _drain(source: queue.Queue, stop: threading.Event) -> Iterator:
+    while True:
+        try:
+            item = source.get(timeout=0.1)
+        except queue.Empty:
+            if stop.is_set():
+                return
+            continue
+        if item is _DONE:
+            return
+        if isinstance(item, BaseException):
+            raise item
+        yield item
+
+
+def _text_hash(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}:{text}".encode()).hexdigest()
+
+
+def _embed_chunk_batch(
+    texts: list[str],
+    embed_settings: EmbeddingSettings,
+    cache: EmbeddingStore | None,
+) -> list[list[float]]:
+    if not texts:
+        return []
+    try:
+        if cache is None:
+            unique = list(dict.fromkeys(texts))
+            vectors = dict(zip(unique, embed_texts(unique, embed_settings)))
+            return [vectors[text] for text in texts]
+        hashes = [content_hash(text) for text in texts]
+        found = cache.get(embed_settings.model, hashes)
+        missing = list(
+            dict.fromkeys(text for text, key in zip(texts, hashes) if key not in found)
+        )
+        if missing:
+            fresh = {
+                content_hash(text): vector
+                for text, vector in zip(missing, embed_texts(missing, embed_settings))
+            }
+            cache.put(embed_settings.model, fresh)
+            found.update(fresh)
+    except EmbeddingError as exc:
+        raise RetrievalError(str(exc)) from exc
+    return [found[key] for key in hashes]
 
 
 def build_or_refresh_index(
@@ -171,121 +273,289 @@ def build_or_refresh_index(
     doc_ids: list[str] | None = None,
     progress_cb: callable | None = None,
     stop_check: callable | None = None,
+    incremental: bool = False,
+    checkpoint: dict | None = None,
+    checkpoint_cb: callable | None = None,
 ) -> IndexResult:
+    """Embed workspace chunks into the vector store.
+
+    With ``incremental`` the store is diffed against SQLite by chunk id and
+    text hash: only new or changed chunks are embedded, vectors whose chunk is
+    gone are deleted, and ``reset`` is ignored.
+
+    ``checkpoint_cb`` receives a checkpoint dict after every committed batch;
+    passing it back as ``checkpoint`` resumes after that batch (without a
+    reset) as long as the embedding model is unchanged.
+    """
     total = _count_chunks(workspace_id, doc_ids)
     if total == 0:
         raise RetrievalError("No chunks available. Please ingest a PDF first.")
 
     try:
-        embed_settings = build_embedding_settings()
+        embed_settings = build_embedding_settings(bulk=True)
     except EmbeddingError as exc:
         raise RetrievalError(str(exc)) from exc
     store = _build_store(workspace_id)
-    if reset:
+    if checkpoint and checkpoint.get("model") != embed_settings.model:
+        checkpoint = None
+    known: dict[str, str | None] | None = None
+    if incremental:
+        known = store.fingerprints(where={"doc_id": {"$in": doc_ids}} if doc_ids else None)
+    elif reset and not checkpoint:
         store.reset()
+    fresh = not incremental and reset and not checkpoint
 
-    indexed_count = 0
-    cache_enabled = os.getenv("STUDYFLOW_EMBED_CACHE", "off").lower() in (
-        "1",
-        "true",
-        "on",
-        "yes",
-    )
-    cache_path = (
-        get_workspaces_dir() / workspace_id / "cache" / "embeddings.sqlite"
-        if cache_enabled
-        else None
-    )
-    for start in range(0, total, batch_size):
-        if stop_check and stop_check():
-            raise RetrievalError("Indexing stopped by user.")
-        batch = _fetch_chunk_batch(workspace_id, doc_ids, batch_size, start)
-        texts = [item["text"] for item in batch]
-        embeddings: list[list[float]] = []
-        cache_entries: list[CacheEntry] = []
-        if cache_path:
-            keys = [
-                hashlib.sha256(
-                    f"{embed_settings.model}:{text}".encode()
-                ).hexdigest()
-                for text in texts
+    cache = get_embedding_store()
+    # A process pool needs several encoder batches in flight to keep every
+    # worker busy, and length bucketing needs a few batches' worth to sort.
+    fetch_size = batch_size * max(embed_settings.processes, 1)
+    if embed_settings.token_budget:
+        fetch_size *= 4
+
+    # Near-duplicate chunks (see core.ingest.dedup) are embedded from their
+    # canonical chunk's text, so each group shares one embedding.
+    def _prepare(batch: list[dict]) -> tuple[int, dict, list[dict], list[str], list[list[float]]]:
+        keys = [_text_hash(embed_settings.model, item["embed_text"]) for item in batch]
+        if known is not None:
+            pending = [
+                (item, key)
+                for item, key in zip(batch, keys)
+                if known.get(item["chunk_id"]) != key
             ]
-            cached = get_cached_embeddings(cache_path, keys)
-            missing_texts: list[str] = []
-            missing_keys: list[str] = []
-            missing_positions: list[int] = []
-            embeddings = [None] * len(texts)
-            for index, (key, text) in enumerate(zip(keys, texts)):
-                if key in cached:
-                    embeddings[index] = cached[key]
-                else:
-                    missing_keys.append(key)
-                    missing_texts.append(text)
-                    missing_positions.append(index)
-            if missing_texts:
-                try:
-                    computed = embed_texts(missing_texts, embed_settings)
-                except EmbeddingError as exc:
-                    raise RetrievalError(str(exc)) from exc
-                for key, vector, position in zip(
-                    missing_keys, computed, missing_positions
-                ):
-                    embeddings[position] = vector
-                    cache_entries.append(
-                        CacheEntry(
-                            key=key,
-                            vector=vector,
-                            model=embed_settings.model,
-                            created_at=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-                        )
-                    )
-                put_cached_embeddings(cache_path, cache_entries)
-            embeddings = [item for item in embeddings if item is not None]
+            changed = [item for item, _ in pending]
+            keys = [key for _, key in pending]
         else:
-            try:
-                embeddings = embed_texts(texts, embed_settings)
-            except EmbeddingError as exc:
-                raise RetrievalError(str(exc)) from exc
-        store.upsert(
-            ids=[item["chunk_id"] for item in batch],
-            embeddings=embeddings,
-            documents=texts,
-            metadatas=[
-                {
-                    "chunk_id": item["chunk_id"],
-                    "doc_id": item["doc_id"],
-                    "workspace_id": item["workspace_id"],
-                    "filename": item["filename"],
-                    "doc_type": item.get("doc_type") or "other",
-                    "file_type": item.get("file_type"),
-                    "page_start": item["page_start"],
-                    "page_end": item["page_end"],
-                }
-                for item in batch
-            ],
-        )
-        indexed_count += len(batch)
-        if progress_cb:
-            progress_cb(indexed_count, total)
+            changed = batch
+        texts = [item["embed_text"] for item in changed]
+        embeddings = _embed_chunk_batch(texts, embed_settings, cache)
+        return len(batch), batch[-1], changed, keys, embeddings
+
+    # fetch -> embed -> upsert run as a bounded pipeline: SQLite reads and
+    # encoder batches happen in worker threads while this thread writes the
+    # previous batch to the vector store and reports progress.
+    stop = threading.Event()
+    fetched: queue.Queue = queue.Queue(maxsize=_PIPELINE_DEPTH)
+    embedded: queue.Queue = queue.Queue(maxsize=_PIPELINE_DEPTH)
+    stages = [
+        threading.Thread(
+            target=_pipeline_stage,
+            args=(
+                _iter_chunk_batches(
+                    workspace_id, doc_ids, fetch_size, (checkpoint or {}).get("after")
+                ),
+                None,
+                fetched,
+                stop,
+            ),
+            name="sf-index-fetch",
+            daemon=True,
+        ),
+        threading.Thread(
+            target=_pipeline_stage,
+            args=(
+                _drain(fetched, stop),
+                _prepare,
+                embedded,
+                stop,
+            ),
+            name="sf-index-embed",
+            daemon=True,
+        ),
+    ]
+    for stage in stages:
+        stage.start()
+    scanned = (checkpoint or {}).get("scanned", 0)
+    indexed_count = (checkpoint or {}).get("indexed", 0)
+    try:
+        for batch_len, tail, batch, keys, embeddings in _drain(embedded, stop):
+            if stop_check and stop_check():
+                raise RetrievalError("Indexing stopped by user.")
+            if batch:
+                tags = doc_scope_tags([item["doc_id"] for item in batch])
+                store.upsert(
+                    ids=[item["chunk_id"] for item in batch],
+                    embeddings=embeddings,
+                    # Ids and filter fields only; text lives in SQLite (see hydrate_hits).
+                    metadatas=[
+                        {
+                            "chunk_id": item["chunk_id"],
+                            "doc_id": item["doc_id"],
+                            "workspace_id": item["workspace_id"],
+                            "doc_type": item.get("doc_type") or "other",
+                            "text_hash": key,
+                            **tags[item["doc_id"]],
+                        }
+                        for item, key in zip(batch, keys)
+                    ],
+                )
+            indexed_count += len(batch)
+            scanned += batch_len
+            if checkpoint_cb:
+                checkpoint_cb(
+                    {
+                        "model": embed_settings.model,
+                        "after": [tail["doc_id"], tail["chunk_index"], tail["chunk_id"]],
+                        "scanned": scanned,
+                        "indexed": indexed_count,
+                    }
+                )
+            if progress_cb:
+                progress_cb(scanned, total)
+    finally:
+        stop.set()
+        for stage in stages:
+            stage.join()
 
+    removed_count = 0
+    if known is not None:
+        with get_connection() as connection:
+            if doc_ids:
+                placeholders = ",".join(["?"] * len(doc_ids))
+                rows = connection.execute(
+                    f"SELECT id FROM chunks WHERE workspace_id = ? AND doc_id IN ({placeholders})",
+                    (workspace_id, *doc_ids),
+                ).fetchall()
+            else:
+                rows = connection.execute(
+                    "SELECT id FROM chunks WHERE workspace_id = ?", (workspace_id,)
+                ).fetchall()
+        seen = {row["id"] for row in rows}
+        orphans = [item for item in known if item not in seen]
+        store.delete(ids=orphans)
+        removed_count = len(orphans)
+
+    if fresh:
+        set_setting(workspace_id, _scope_tags_setting(workspace_id), "1")
+    else:
+        sync_scope_tags(workspace_id)
+    bump_index_generation(workspace_id)
     return IndexResult(
         doc_count=_fetch_doc_count(workspace_id),
         chunk_count=total,
         indexed_count=indexed_count,
+        removed_count=removed_count,
     )
 
 
+def _scope_tags_setting(workspace_id: str) -> str:
+    return f"vector_scope_tags_{resolve_vector_backend(workspace_id)}"
+
+
+def sync_scope_tags(workspace_id: str) -> int:
+    """Re-tag vectors of documents whose course/project membership or doc_type changed.
+
+    Indexes built before scope tags existed are tagged in full the first time.
+    Returns the number of documents re-tagged.
+    """
+    setting = _scope_tags_setting(workspace_id)
+    doc_ids = take_retag_queue(workspace_id)
+    tagged = get_setting(workspace_id, setting) == "1"
+    if not tagged:
+        doc_ids = list(dict.fromkeys(doc_ids + scoped_doc_ids(workspace_id)))
+    if doc_ids:
+        try:
+            store = _build_store(workspace_id)
+            for doc_id, tags in vector_tags(doc_ids).items():
+                store.set_tags(doc_id=doc_id, tags=tags)
+        except Exception:
+            requeue_retags(doc_ids)
+            raise
+        bump_index_generation(workspace_id)
+    if not tagged:
+        set_setting(workspace_id, setting, "1")
+    return len(doc_ids)
+
+
+def reembed_documents(workspace_id: str, doc_ids: list[str]) -> int:
+    """Re-embed chunks of ``doc_ids`` whose embedding text changed.
+
+    Used for near-duplicates promoted when their canonical chunk is deleted.
+    Skipped while there is no vector index; on failure the next incremental
+    build picks the chunks up by text hash. Returns the number re-embedded.
+    """
+    if not doc_ids or _build_store(workspace_id).is_empty():
+        return 0
+    try:
+        result = build_or_refresh_index(workspace_id=workspace_id, doc_ids=doc_ids, incremental=True)
+    except RetrievalError:
+        return 0
+    return result.indexed_count
+
+
+def _retag_for_query(workspace_id: str) -> bool:
+    """``sync_scope_tags`` ahead of a vector query; False if the store could not be re-tagged.
+
+    The failed documents stay queued for the next vector query or index build.
+    """
+    try:
+        sync_scope_tags(workspace_id)
+    except Exception:
+        incr("retrieval.scope_retag_failures")
+        return False
+    return True
+
+
 def ensure_index(workspace_id: str) -> None:
-    store = _build_store(workspace_id)
-    if store.count() == 0:
+    if _build_store(workspace_id).is_empty():
         build_or_refresh_index(workspace_id=workspace_id, reset=True)
 
 
-def ensure_bm25_index(workspace_id: str) -> Path:
+def ensure_bm25_index(workspace_id: str) -> Path | None:
     index = load_bm25_index(workspace_id)
     if index is None:
         return build_bm25_index(workspace_id)
-    return _bm25_index_dir(workspace_id) / "index.pkl"
+    return index.base.directory if index.base is not None else None
+
+
+def query_lexical_batch(
+    *,
+    workspace_id: str,
+    queries: list[str],
+    top_k: int = 20,
+    scopes: list[list[str] | None],
+    doc_types: list[str] | None = None,
+    hydrate: bool = True,
+    scope_tag: str | None = None,
+) -> list[list[dict]]:
+    if resolve_lexical_backend(workspace_id) == "fts5":
+        return [
+            query_fts(
+                workspace_id=workspace_id,
+                query=query,
+                top_k=top_k,
+                doc_ids=scope,
+                doc_types=doc_types,
+                scope_tag=scope_tag,
+            )
+            for query, scope in zip(queries, scopes)
+        ]
+    ensure_bm25_index(workspace_id)
+    return query_bm25_batch(
+        workspace_id=workspace_id,
+        queries=queries,
+        top_k=top_k,
+        scopes=scopes,
+        doc_types=doc_types,
+        hydrate=hydrate,
+        scope_tag=scope_tag,
+    )
+
+
+def query_lexical(
+    *,
+    workspace_id: str,
+    query: str,
+    top_k: int = 20,
+    doc_ids: list[str] | None = None,
+    doc_types: list[str] | None = None,
+) -> list[dict]:
+    return query_lexical_batch(
+        workspace_id=workspace_id,
+        queries=[query],
+        top_k=top_k,
+        scopes=[doc_ids],
+        doc_types=doc_types,
+    )[0]
 
 
 def index_status(workspace_id: str) -> dict:
@@ -298,14 +568,16 @@ def index_status(workspace_id: str) -> dict:
         vector_count = store.count()
     except Exception:
         vector_count = -1
-    bm25_path = _bm25_index_dir(workspace_id) / "index.pkl"
     return {
         "workspace_id": workspace_id,
         "doc_count": doc_count,
         "chunk_count": chunk_count,
         "orphan_chunks": orphan_chunks,
         "vector_count": vector_count,
-        "bm25_exists": bm25_path.exists(),
+        "bm25_exists": bm25_index_exists(workspace_id),
+        "lexical_backend": resolve_lexical_backend(workspace_id),
+        "vector_backend": resolve_vector_backend(workspace_id),
+        "retrieval_cache": result_cache_stats(),
     }
 
 
@@ -338,214 +610,472 @@ def vacuum_index(workspace_id: str) -> dict:
             """
         )
         connection.commit()
+    bump_index_generation(workspace_id)
     status = index_status(workspace_id)
     if status["chunk_count"] == 0:
         return status
     if status["vector_count"] != status["chunk_count"]:
-        build_or_refresh_index(workspace_id=workspace_id, reset=True)
+        build_or_refresh_index(workspace_id=workspace_id, incremental=True)
     build_bm25_index(workspace_id)
+    rebuild_fts_index()
     return index_status(workspace_id)
 
 
-def retrieve_hits(
-    *,
+def _vector_hits(
     workspace_id: str,
-    query: str,
-    top_k: int = 8,
-    doc_ids: list[str] | None = None,
-    doc_types: list[str] | None = None,
-) -> list[Hit]:
-    if doc_ids and doc_types:
-        doc_ids = filter_doc_ids_by_types(doc_ids, doc_types)
-        doc_types = None
+    queries: list[str],
+    scopes: list[list[str] | None],
+    doc_types: list[str] | None,
+    top_k: int,
+    hydrate: bool = True,
+    scope_tag: str | None = None,
+) -> list[list[Hit]]:
     ensure_index(workspace_id)
+    results: list[list[Hit]] = [[] for _ in queries]
+    positions = list(range(len(queries)))
+    if not _retag_for_query(workspace_id) and scope_tag:
+        # Stale vector tags: filter by the scope's current members instead.
+        members = scope_doc_ids(scope_tag)
+        allowed = set(members)
+        scopes = [[item for item in scope if item in allowed] if scope else members for scope in scopes]
+        scope_tag = None
+        # An empty member list would mean "unscoped" to the store.
+        positions = [position for position in positions if scopes[position]]
+        if not positions:
+            return results
     try:
         embed_settings = build_embedding_settings()
     except EmbeddingError as exc:
         raise RetrievalError(str(exc)) from exc
     store = _build_store(workspace_id)
     try:
-        return retrieve(
-            query=query,
+        hits = retrieve_many(
+            queries=[queries[position] for position in positions],
             embed_settings=embed_settings,
             store=store,
             top_k=top_k,
-            doc_ids=doc_ids,
-        doc_types=doc_types,
+            scopes=[scopes[position] for position in positions],
+            doc_types=doc_types,
+            hydrate=hydrate,
+            scope_tag=scope_tag,
         )
     except EmbeddingError as exc:
         raise RetrievalError(str(exc)) from exc
+    for position, found in zip(positions, hits):
+        results[position] = found
+    return results
 
 
-def retrieve_hits_mode(
+def retrieve_hits(
     *,
     workspace_id: str,
     query: str,
-    mode: str,
     top_k: int = 8,
     doc_ids: list[str] | None = None,
     doc_types: list[str] | None = None,
-    max_per_doc: int | None = None,
-    min_docs: int | None = None,
-) -> tuple[list[Hit], str]:
+) -> list[Hit]:
     if doc_ids and doc_types:
         doc_ids = filter_doc_ids_by_types(doc_ids, doc_types)
         doc_types = None
-    def _apply_doc_diversity(hits: list[Hit]) -> list[Hit]:
-        if not hits or not max_per_doc:
-            return hits
-        doc_counts: dict[str, int] = {}
-        seen_chunks: set[str] = set()
-        balanced: list[Hit] = []
-
-        if min_docs:
-            for hit in hits:
-                if hit.chunk_id in seen_chunks:
-                    continue
-                if hit.doc_id in doc_counts:
-                    continue
-                balanced.append(hit)
-                seen_chunks.add(hit.chunk_id)
-                doc_counts[hit.doc_id] = 1
-                if len(doc_counts) >= min_docs:
-                    break
+    return _vector_hits(workspace_id, [query], [doc_ids], doc_types, top_k)[0]
+
+
+def _apply_doc_diversity(
+    hits: list[Hit], top_k: int, max_per_doc: int | None, min_docs: int | None
+) -> list[Hit]:
+    if not hits or not max_per_doc:
+        return hits
+    doc_counts: dict[str, int] = {}
+    seen_chunks: set[str] = set()
+    balanced: list[Hit] = []
 
+    if min_docs:
         for hit in hits:
             if hit.chunk_id in seen_chunks:
                 continue
-            count = doc_counts.get(hit.doc_id, 0)
-            if count >= max_per_doc:
+            if hit.doc_id in doc_counts:
                 continue
             balanced.append(hit)
             seen_chunks.add(hit.chunk_id)
-            doc_counts[hit.doc_id] = count + 1
-            if len(balanced) >= top_k:
+            doc_counts[hit.doc_id] = 1
+            if len(doc_counts) >= min_docs:
                 break
 
-        return balanced
+    for hit in hits:
+        if hit.chunk_id in seen_chunks:
+            continue
+        count = doc_counts.get(hit.doc_id, 0)
+        if count >= max_per_doc:
+            continue
+        balanced.append(hit)
+        seen_chunks.add(hit.chunk_id)
+        doc_counts[hit.doc_id] = count + 1
+        if len(balanced) >= top_k:
+            break
+
+    return balanced
+
+
+def _lexical_hits(results: list[dict]) -> list[Hit]:
+    return [
+        Hit(
+            chunk_id=item["chunk_id"],
+            doc_id=item["doc_id"],
+            workspace_id=item["workspace_id"],
+            filename=item["filename"],
+            file_type=item.get("file_type"),
+            page_start=item["page_start"],
+            page_end=item["page_end"],
+            text=item["text"],
+            score=item["score"],
+        )
+        for item in results
+    ]
+
+
+def _leg_executor() -> ThreadPoolExecutor:
+    global _LEG_EXECUTOR
+    with _LEG_LOCK:
+        if _LEG_EXECUTOR is None:
+            _LEG_EXECUTOR = ThreadPoolExecutor(
+                max_workers=_LEG_WORKERS, thread_name_prefix="sf-hybrid"
+            )
+        return _LEG_EXECUTOR
+
 
+def _leg_done(_future) -> None:
+    global _LEG_INFLIGHT
+    with _LEG_LOCK:
+        _LEG_INFLIGHT -= 1
+
+
+def _submit_leg(func, *args):
+    """Run ``func`` on the leg executor, or return None when every worker is busy.
+
+    A leg abandoned at its deadline keeps its worker until it finishes;
+    queueing behind it would only make the next query miss its budget too.
+    """
+    global _LEG_INFLIGHT
+    with _LEG_LOCK:
+        if _LEG_INFLIGHT >= _LEG_WORKERS:
+            return None
+        _LEG_INFLIGHT += 1
+    future = _leg_executor().submit(_timed_leg, func, *args)
+    future.add_done_callback(_leg_done)
+    return future
+
+
+def _vector_budget_s() -> float:
+    return max(float(os.getenv("STUDYFLOW_HYBRID_VECTOR_BUDGET_MS", "3000")), 0.0) / 1000
+
+
+def _timed_leg(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def _retrieve_group(
+    *,
+    workspace_id: str,
+    queries: list[str],
+    scopes: list[list[str] | None],
+    doc_types: list[str] | None,
+    mode: str,
+    top_k: int,
+    max_per_doc: int | None,
+    min_docs: int | None,
+    timings: dict | None = None,
+    scope_tag: str | None = None,
+) -> list[tuple[list[Hit], str]]:
+    diverse = [
+        bool(max_per_doc and ((scope and len(scope) > 1) or (scope_tag and not scope)))
+        for scope in scopes
+    ]
+
+    def _finish(hits: list[Hit], spread: bool) -> list[Hit]:
+        if spread:
+            hits = _apply_doc_diversity(hits, top_k, max_per_doc, min_docs)
+        return hits[:top_k]
+
+    # Candidates are over-fetched so near-duplicate chunks, collapsed to the
+    # best-ranked member of their group, do not eat into top_k.
     if mode == "vector":
-        candidate_k = top_k
-        if max_per_doc and doc_ids and len(doc_ids) > 1:
-            candidate_k = max(top_k * 3, 20)
-        hits = retrieve_hits(
-            workspace_id=workspace_id,
-            query=query,
-            top_k=candidate_k,
-            doc_ids=doc_ids,
-            doc_types=doc_types,
+        candidate_ks = [max(top_k * 3, 20) if spread else top_k * 2 for spread in diverse]
+        batches = _vector_hits(
+            workspace_id,
+            queries,
+            scopes,
+            doc_types,
+            max(candidate_ks),
+            hydrate=False,
+            scope_tag=scope_tag,
         )
-        if max_per_doc and doc_ids and len(doc_ids) > 1:
-            hits = _apply_doc_diversity(hits)
-        hits = hits[:top_k]
-        return hits, "vector"
+        batches = collapse_duplicates(
+            [hits[:candidate_k] for hits, candidate_k in zip(batches, candidate_ks)]
+        )
+        return [(_finish(hits, spread), "vector") for hits, spread in zip(batches, diverse)]
     if mode == "bm25":
-        ensure_bm25_index(workspace_id)
-        candidate_k = 20
-        if max_per_doc and doc_ids and len(doc_ids) > 1:
-            candidate_k = max(top_k * 3, 20)
-        results = query_bm25(
+        candidate_ks = [max(top_k * 3, 20) if spread else 20 for spread in diverse]
+        batches = query_lexical_batch(
             workspace_id=workspace_id,
-            query=query,
-            top_k=candidate_k,
-            doc_ids=doc_ids,
+            queries=queries,
+            top_k=max(candidate_ks),
+            scopes=scopes,
             doc_types=doc_types,
+            hydrate=False,
+            scope_tag=scope_tag,
+        )
+        batches = collapse_duplicates(
+            [_lexical_hits(results[:candidate_k]) for results, candidate_k in zip(batches, candidate_ks)]
+        )
+        return [(_finish(hits, spread), "bm25") for hits, spread in zip(batches, diverse)]
+
+    candidate_ks = [max(top_k * 3, 20) if spread else 20 for spread in diverse]
+    # Building a missing vector index is not part of the query budget, and
+    # must not be started again by a leg that timed out.
+    vector_leg = None
+    fallback = None
+    try:
+        ensure_index(workspace_id)
+        vector_leg = _submit_leg(
+            _vector_hits,
+            workspace_id,
+            queries,
+            scopes,
+            doc_types,
+            max(candidate_ks),
+            False,
+            scope_tag,
+        )
+        if vector_leg is None:
+            fallback = "saturated"
+            incr("hybrid.vector_saturated")
+    except RetrievalError:
+        fallback = "error"
+    started = time.perf_counter()
+    bm25_batches = query_lexical_batch(
+        workspace_id=workspace_id,
+        queries=queries,
+        top_k=20,
+        scopes=scopes,
+        doc_types=doc_types,
+        hydrate=False,
+        scope_tag=scope_tag,
+    )
+    bm25_ms = (time.perf_counter() - started) * 1000
+    vector_ms = None
+    budget = _vector_budget_s()
+    if vector_leg is not None:
+        try:
+            vector_batches, vector_ms = vector_leg.result(
+                timeout=max(budget - bm25_ms / 1000, 0) if budget else None
+            )
+        except FutureTimeoutError:
+            # Only a leg still queued can be cancelled; a running one is left
+            # to finish and counts against the in-flight limit until then.
+            vector_leg.cancel()
+            fallback = "timeout"
+            incr("hybrid.vector_timeouts")
+        except RetrievalError:
+            fallback = "error"
+    if timings is not None:
+        timings["bm25_ms"] = timings.get("bm25_ms", 0.0) + round(bm25_ms, 2)
+        if vector_ms is not None:
+            timings["vector_ms"] = timings.get("vector_ms", 0.0) + round(vector_ms, 2)
+        if fallback:
+            timings["vector_fallback"] = fallback
+    if fallback:
+        # fallback to BM25 if vector fails or misses its deadline
+        batches = collapse_duplicates([_lexical_hits(results) for results in bm25_batches])
+        return [(_finish(hits, spread), "bm25") for hits, spread in zip(batches, diverse)]
+    fused_batches: list[list[Hit]] = []
+    for vector_hits, bm25_results, candidate_k in zip(
+        vector_batches, bm25_batches, candidate_ks
+    ):
+        vec_dicts = [
+            {
+                "chunk_id": hit.chunk_id,
+                "doc_id": hit.doc_id,
+                "workspace_id": hit.workspace_id,
+                "filename": hit.filename,
+                "file_type": hit.file_type,
+                "page_start": hit.page_start,
+                "page_end": hit.page_end,
+                "text": hit.text,
+                "score": hit.score,
+            }
+            for hit in vector_hits[:candidate_k]
+        ]
+        fused = fuse_scores(
+            vector_hits=vec_dicts, bm25_hits=bm25_results, top_k=candidate_k
         )
         hits = [
             Hit(
-                chunk_id=item["chunk_id"],
-                doc_id=item["doc_id"],
-                workspace_id=item["workspace_id"],
-                filename=item["filename"],
-                file_type=item.get("file_type"),
-                page_start=item["page_start"],
-                page_end=item["page_end"],
-                text=item["text"],
-                score=item["score"],
+                chunk_id=item.chunk_id,
+                doc_id=item.doc_id,
+                workspace_id=item.workspace_id,
+                filename=item.filename,
+                file_type=item.file_type,
+                page_start=item.page_start,
+                page_end=item.page_end,
+                text=item.text,
+                score=item.score,
             )
-            for item in results[:candidate_k]
+            for item in fused
         ]
-        if max_per_doc and doc_ids and len(doc_ids) > 1:
-            hits = _apply_doc_diversity(hits)
-        hits = hits[:top_k]
-        return hits, "bm25"
+        fused_batches.append(hits)
+    return [
+        (_finish(hits, spread), "hybrid")
+        for hits, spread in zip(collapse_duplicates(fused_batches), diverse)
+    ]
+
+
+def retrieve_hits_batch(
+    *,
+    workspace_id: str,
+    queries: list[str],
+    mode: str,
+    top_k: int = 8,
+    doc_ids: list[str] | None = None,
+    doc_types: list[str] | None = None,
+    max_per_doc: int | None = None,
+    min_docs: int | None = None,
+    scopes: list[list[str] | None] | None = None,
+    timings: dict | None = None,
+    scope_tag: str | None = None,
+) -> list[tuple[list[Hit], str]]:
+    """``retrieve_hits_mode`` for several queries at once.
+
+    All queries are embedded in one encoder batch, vector search issues one
+    multi-embedding query per distinct scope, and lexical scoring shares a
+    single index load. ``scopes`` gives per-query doc_ids and overrides
+    ``doc_ids``. Returns one ``(hits, used_mode)`` pair per query, in order.
+
+    In hybrid mode the BM25 and vector legs run concurrently; the vector leg
+    gets ``STUDYFLOW_HYBRID_VECTOR_BUDGET_MS`` and falls back to BM25 when it
+    runs over. While every hybrid worker is still busy with earlier legs, the
+    vector leg is skipped and the result falls back to BM25 as well. Pass a
+    dict as ``timings`` to receive per-leg milliseconds.
 
-    if mode == "hybrid":
-        bm25_results = query_bm25(
+    The legs rank chunk ids only; text, filename, pages and file type are
+    read from SQLite for the final hits in one batched lookup.
+
+    ``scope_tag`` (``course_scope(id)`` / ``project_scope(id)``) restricts
+    every query to a course or project; the indexes resolve it, so callers
+    need not list the member doc_ids.
+    """
+    if mode not in ("vector", "bm25", "hybrid"):
+        raise RetrievalError("Unknown retrieval mode.")
+    if not queries:
+        return []
+    if scopes is None:
+        scopes = [doc_ids] * len(queries)
+    filtered: dict[tuple, list[str]] = {}
+    plans: list[tuple[list[str] | None, list[str] | None]] = []
+    for scope in scopes:
+        if scope and doc_types:
+            key = tuple(scope)
+            if key not in filtered:
+                filtered[key] = filter_doc_ids_by_types(scope, doc_types)
+            plans.append((filtered[key], None))
+        else:
+            plans.append((scope, doc_types))
+
+    # Vector legs re-tag queued documents themselves; until then scoped results
+    # may change without a generation bump, so they are not cached.
+    cacheable = not retag_pending(workspace_id)
+    generation = index_generation(workspace_id)
+    keys = [
+        (
+            workspace_id,
+            generation,
+            mode,
+            scope_tag,
+            normalize_query(query),
+            tuple(scope or ()),
+            tuple(types or ()),
+            top_k,
+            max_per_doc,
+            min_docs,
+        )
+        for query, (scope, types) in zip(queries, plans)
+    ]
+    outcomes: list[tuple[list[Hit], str]] = [([], mode)] * len(queries)
+    groups: dict[tuple, list[int]] = {}
+    for position, (_, types) in enumerate(plans):
+        cached = get_cached_result(keys[position]) if cacheable else None
+        if cached is not None:
+            outcomes[position] = (list(cached[0]), cached[1])
+            continue
+        groups.setdefault(tuple(types or ()), []).append(position)
+    fresh: dict[int, tuple[list[Hit], str]] = {}
+    for types, positions in groups.items():
+        results = _retrieve_group(
             workspace_id=workspace_id,
-            query=query,
-            top_k=20,
-            doc_ids=doc_ids,
-            doc_types=doc_types,
+            queries=[queries[position] for position in positions],
+            scopes=[plans[position][0] for position in positions],
+            doc_types=list(types) or None,
+            mode=mode,
+            top_k=top_k,
+            max_per_doc=max_per_doc,
+            min_docs=min_docs,
+            timings=timings,
+            scope_tag=scope_tag,
         )
-        try:
-            candidate_k = 20
-            if max_per_doc and doc_ids and len(doc_ids) > 1:
-                candidate_k = max(top_k * 3, 20)
-            vector_hits = retrieve_hits(
-                workspace_id=workspace_id,
-                query=query,
-                top_k=candidate_k,
-                doc_ids=doc_ids,
-                doc_types=doc_types,
-            )
-            vec_dicts = [
-                {
-                    "chunk_id": hit.chunk_id,
-                    "doc_id": hit.doc_id,
-                    "workspace_id": hit.workspace_id,
-                    "filename": hit.filename,
-                    "file_type": hit.file_type,
-                    "page_start": hit.page_start,
-                    "page_end": hit.page_end,
-                    "text": hit.text,
-                    "score": hit.score,
-                }
-                for hit in vector_hits
-            ]
-            fused = fuse_scores(
-                vector_hits=vec_dicts, bm25_hits=bm25_results, top_k=candidate_k
-            )
-            hits = [
-                Hit(
-                    chunk_id=item.chunk_id,
-                    doc_id=item.doc_id,
-                    workspace_id=item.workspace_id,
-                    filename=item.filename,
-                    file_type=item.file_type,
-                    page_start=item.page_start,
-                    page_end=item.page_end,
-                    text=item.text,
-                    score=item.score,
-                )
-                for item in fused
-            ]
-            if max_per_doc and doc_ids and len(doc_ids) > 1:
-                hits = _apply_doc_diversity(hits)
-            hits = hits[:top_k]
-            return hits, "hybrid"
-        except RetrievalError:
-            # fallback to BM25 if vector fails
-            hits = [
-                Hit(
-                    chunk_id=item["chunk_id"],
-                    doc_id=item["doc_id"],
-                    workspace_id=item["workspace_id"],
-                    filename=item["filename"],
-                    file_type=item.get("file_type"),
-                    page_start=item["page_start"],
-                    page_end=item["page_end"],
-                    text=item["text"],
-                    score=item["score"],
-                )
-                for item in bm25_results[:top_k]
-            ]
-            if max_per_doc and doc_ids and len(doc_ids) > 1:
-                hits = _apply_doc_diversity(hits)
-            hits = hits[:top_k]
-            return hits, "bm25"
+        fresh.update(zip(positions, results))
+    hydrated = hydrate_hits([hits for hits, _ in fresh.values()])
+    for (position, (_, used_mode)), hits in zip(fresh.items(), hydrated):
+        outcomes[position] = (hits, used_mode)
+        if used_mode == mode and cacheable:
+            put_cached_result(keys[position], (tuple(hits), used_mode))
+    return outcomes
 
-    raise RetrievalError("Unknown retrieval mode.")
+
+def retrieve_hits_mode(
+    *,
+    workspace_id: str,
+    query: str,
+    mode: str,
+    top_k: int = 8,
+    doc_ids: list[str] | None = None,
+    doc_types: list[str] | None = None,
+    max_per_doc: int | None = None,
+    min_docs: int | None = None,
+    timings: dict | None = None,
+    scope_tag: str | None = None,
+) -> tuple[list[Hit], str]:
+    return retrieve_hits_batch(
+        workspace_id=workspace_id,
+        queries=[query],
+        mode=mode,
+        top_k=top_k,
+        doc_ids=doc_ids,
+        doc_types=doc_types,
+        max_per_doc=max_per_doc,
+        min_docs=min_docs,
+        timings=timings,
+        scope_tag=scope_tag,
+    )[0]
+
+
+def collect_hit_batches(
+    outcomes: list[tuple[list[Hit], str]],
+    mode: str,
+    progress_cb: callable | None = None,
+) -> tuple[list[list[Hit]], str]:
+    """Non-empty hit lists from ``retrieve_hits_batch`` and the mode last used.
+
+    ``mode`` is returned when there are no outcomes; ``progress_cb(done, total)``
+    is called once per query.
+    """
+    batches: list[list[Hit]] = []
+    for done, (hits, _used_mode) in enumerate(outcomes, start=1):
+        if hits:
+            batches.append(hits)
+        if progress_cb:
+            progress_cb(done, len(outcomes))
+    return batches, outcomes[-1][1] if outcomes else mode
 
 
 def _build_context(hits: list[Hit], max_chars: int = 3500) -> str:
@@ -570,10 +1100,18 @@ def answer_with_retrieval(
     mode: str = "vector",
     top_k: int = 8,
     doc_ids: list[str] | None = None,
+    scope_tag: str | None = None,
 ) -> tuple[str, list[Hit], list[str], str]:
     start = time.time()
+    timings: dict = {}
     hits, used_mode = retrieve_hits_mode(
-        workspace_id=workspace_id, query=query, mode=mode, top_k=top_k, doc_ids=doc_ids
+        workspace_id=workspace_id,
+        query=query,
+        mode=mode,
+        top_k=top_k,
+        doc_ids=doc_ids,
+        timings=timings,
+        scope_tag=scope_tag,
     )
     if not hits:
         raise RetrievalError("No retrieval hits found. Try another query.")
@@ -630,6 +1168,7 @@ def answer_with_retrieval(
         latency_ms=latency_ms,
         citation_incomplete=not citation_ok,
         errors=citation_error,
+        retrieval_timings=timings or None,
     )
 
     return answer, hits, citations, run_id
@@ -65,6 +65,7 @@ def enqueue_index_task(
     reset: bool = True,
     doc_ids: list[str] | None = None,
     batch_size: int = 32,
+    incremental: bool = True,
 ) -> str:
     return enqueue_task(
         workspace_id=workspace_id,
@@ -74,6 +75,7 @@ def enqueue_index_task(
             "reset": reset,
             "doc_ids": doc_ids,
             "batch_size": batch_size,
+            "incremental": incremental,
         },
     )
 
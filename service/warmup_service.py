@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+
+from core.agents.course_agent import CHEATSHEET_SECTIONS, OVERVIEW_TOPICS
+from core.agents.paper_agent import PAPER_CARD_QUERIES
+from core.agents.paper_aggregator import AGGREGATE_QUERIES
+from core.agents.slides_agent import SLIDES_QUERIES
+from core.concepts.builder import CONCEPT_QUERIES
+from core.ingest.ocr import OCRSettings, preload_ocr
+from core.related.manager import RELATED_QUERIES
+from core.retrieval.embedder import EmbeddingError, build_embedding_settings, embed_texts
+from core.retrieval.query_cache import warm_query_cache
+
+_STARTED = False
+_LOCK = threading.Lock()
+_STATUS: dict[str, dict] = {}
+
+
+def builtin_queries() -> list[str]:
+    """Fixed retrieval queries issued by the built-in agents."""
+    return list(
+        dict.fromkeys(
+            [
+                *OVERVIEW_TOPICS,
+                *CHEATSHEET_SECTIONS,
+                *PAPER_CARD_QUERIES,
+                *AGGREGATE_QUERIES,
+                *SLIDES_QUERIES,
+                *CONCEPT_QUERIES,
+                *RELATED_QUERIES,
+            ]
+        )
+    )
+
+
+def _enabled(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() not in ("0", "false", "off", "no")
+
+
+def _set_status(component: str, state: str, **details) -> None:
+    with _LOCK:
+        _STATUS[component] = {"state": state, **details}
+
+
+def _run_component(component: str, func) -> None:
+    _set_status(component, "loading")
+    start = time.perf_counter()
+    try:
+        details = func() or {}
+    except Exception as exc:
+        _set_status(component, "failed", error=str(exc))
+        return
+    _set_status(component, "ready", seconds=round(time.perf_counter() - start, 3), **details)
+
+
+def warm_up_embedding_model() -> dict:
+    """Load the embedding model and run inference until latency is steady."""
+    settings = build_embedding_settings()
+    start = time.perf_counter()
+    embed_texts(["warm up"], settings)
+    first_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    embed_texts(["warm up the encoder once more"], settings)
+    steady_ms = (time.perf_counter() - start) * 1000
+    return {
+        "model": settings.model,
+        "first_ms": round(first_ms, 1),
+        "steady_ms": round(steady_ms, 1),
+    }
+
+
+def warm_up_query_embeddings() -> int:
+    try:
+        return warm_query_cache(builtin_queries(), build_embedding_settings())
+    except EmbeddingError:
+        return 0
+
+
+def warm_up_ocr() -> dict:
+    engine = preload_ocr(OCRSettings())
+    return {"engine": engine}
+
+
+def _components() -> list[str]:
+    enabled = {
+        "embedding": _enabled("STUDYFLOW_MODEL_WARMUP", "on"),
+        "query_cache": _enabled("STUDYFLOW_QUERY_WARMUP", "on"),
+        "ocr": _enabled("STUDYFLOW_OCR_WARMUP", "off"),
+    }
+    return [name for name, on in enabled.items() if on]
+
+
+def run_warmup() -> dict:
+    """Warm every enabled component in turn; returns ``warmup_status()``."""
+    components = _components()
+    if "embedding" in components:
+        _run_component("embedding", warm_up_embedding_model)
+    if "query_cache" in components:
+        if _STATUS.get("embedding", {}).get("state", "ready") == "ready":
+            _run_component("query_cache", lambda: {"queries": warm_up_query_embeddings()})
+        else:
+            _set_status("query_cache", "skipped")
+    if "ocr" in components:
+        _run_component("ocr", warm_up_ocr)
+    return warmup_status()
+
+
+def warmup_status() -> dict:
+    with _LOCK:
+        components = {name: dict(details) for name, details in _STATUS.items()}
+    if not components:
+        state = "idle"
+    elif any(item["state"] in ("pending", "loading") for item in components.values()):
+        state = "warming"
+    elif all(item["state"] in ("ready", "skipped") for item in components.values()):
+        state = "ready"
+    else:
+        state = "degraded"
+    return {"state": state, "ready": state == "ready", "components": components}
+
+
+def start_warmup() -> bool:
+    """Warm the enabled components once per process in a background thread."""
+    global _STARTED
+    components = _components()
+    if not components:
+        return False
+    with _LOCK:
+        if _STARTED:
+            return False
+        _STARTED = True
+        for name in components:
+            _STATUS[name] = {"state": "pending"}
+    threading.Thread(target=run_warmup, name="sf-warmup", daemon=True).start()
+    return True
@@ -0,0 +1,97 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from core.ingest.dedup import minhash, similarity
+from core.retrieval.embedder import EmbeddingSettings
+from core.retrieval.retriever import Hit, collapse_duplicates
+from core.ui_state.storage import set_setting
+from infra.db import get_connection, get_workspaces_dir
+from infra.models import init_db
+from service import retrieval_service
+from service.document_service import delete_document_by_id
+from service.ingest_service import ingest_document
+from service.retrieval_service import build_or_refresh_index
+from service.workspace_service import create_workspace
+
+_BOILERPLATE = (
+    "This lecture is part of the Machine Learning course taught in the winter term. "
+    "Slides are released under a Creative Commons license and may be shared for "
+    "teaching purposes. Please report errors to the course staff during office hours, "
+    "which take place every Tuesday afternoon in the main building, room 2017."
+)
+
+
+@pytest.fixture()
+def workspace(tmp_path: Path) -> str:
+    os.environ["STUDYFLOW_WORKSPACES_DIR"] = str(tmp_path / "workspaces")
+    init_db()
+    return create_workspace("dedup")
+
+
+def _ingest(ws_id: str, name: str, text: str):
+    return ingest_document(
+        workspace_id=ws_id,
+        filename=name,
+        data=text.encode(),
+        save_dir=get_workspaces_dir() / ws_id / "uploads",
+    )
+
+
+def _hit(chunk_id: str) -> Hit:
+    return Hit(chunk_id, chunk_id.split(":")[0], "ws", "", 0, 0, "", 1.0)
+
+
+def test_minhash_separates_near_duplicates():
+    edited = _BOILERPLATE.replace("winter", "summer")
+    assert similarity(minhash(_BOILERPLATE), minhash(edited)) >= 0.7
+    assert similarity(minhash(_BOILERPLATE), minhash("Gradient descent converges for convex losses.")) < 0.2
+    assert minhash("  ") is None
+
+
+def test_near_duplicates_share_embedding_and_collapse(workspace: str, monkeypatch):
+    first = _ingest(workspace, "a.txt", _BOILERPLATE)
+    second = _ingest(workspace, "b.txt", _BOILERPLATE.replace("winter", "summer"))
+    other = _ingest(workspace, "c.txt", "Backpropagation computes gradients layer by layer.")
+    assert (first.duplicate_chunks, first.dedup_ratio) == (0, 0.0)
+    assert (second.duplicate_chunks, second.dedup_ratio) == (1, 1.0)
+    assert other.duplicate_chunks == 0
+
+    canonical, duplicate = f"{first.doc_id}:0", f"{second.doc_id}:0"
+    collapsed = collapse_duplicates([[_hit(duplicate), _hit(f"{other.doc_id}:0"), _hit(canonical)]])
+    assert [hit.chunk_id for hit in collapsed[0]] == [duplicate, f"{other.doc_id}:0"]
+
+    embedded: list[str] = []
+    monkeypatch.setenv("STUDYFLOW_EMBED_CACHE", "off")
+    set_setting(workspace, "vector_backend", "numpy")
+    monkeypatch.setattr(
+        retrieval_service, "build_embedding_settings", lambda **_: EmbeddingSettings(model="fake")
+    )
+
+    def fake_embed(texts, settings):
+        embedded.extend(texts)
+        return [[float(len(text)), 1.0, 0.5] for text in texts]
+
+    monkeypatch.setattr(retrieval_service, "embed_texts", fake_embed)
+    result = build_or_refresh_index(workspace_id=workspace)
+    assert result.indexed_count == 3
+    assert sorted(embedded) == sorted([_BOILERPLATE, "Backpropagation computes gradients layer by layer."])
+
+    # Deleting the canonical chunk promotes its duplicate, which is re-embedded
+    # from its own text and takes over the canonical's LSH band keys.
+    embedded.clear()
+    delete_document_by_id(workspace, first.doc_id)
+    with get_connection() as connection:
+        row = connection.execute("SELECT dup_of FROM chunks WHERE id = ?", (duplicate,)).fetchone()
+        bands = connection.execute(
+            "SELECT COUNT(*) FROM chunk_lsh WHERE chunk_id IN (?, ?)", (canonical, duplicate)
+        ).fetchone()[0]
+    assert row["dup_of"] is None
+    assert embedded == [_BOILERPLATE.replace("winter", "summer")]
+    assert bands == 16
+
+    again = _ingest(workspace, "d.txt", _BOILERPLATE.replace("winter", "spring"))
+    with get_connection() as connection:
+        row = connection.execute("SELECT dup_of FROM chunks WHERE id = ?", (f"{again.doc_id}:0",)).fetchone()
+    assert (again.duplicate_chunks, row["dup_of"]) == (1, duplicate)
@@ -0,0 +1,35 @@
+from pathlib import Path
+
+from sentence_transformers import SentenceTransformer
+from sentence_transformers.models import BoW
+
+from core.retrieval import embed_pool
+from core.retrieval.embedder import EmbeddingSettings, embed_texts, plan_batches
+from infra.cpu import physical_cores
+
+
+def test_plan_batches_buckets_by_length_under_a_token_budget() -> None:
+    texts = ["x" * 40, "y" * 2000, "z" * 44, "w" * 1600, "v" * 48, "u" * 400]
+    assert plan_batches(texts, 2, 0) == [[0, 1], [2, 3], [4, 5]]
+
+    # Estimated tokens: 10, 500, 11, 400, 12, 100; padded cost stays within 1000.
+    assert plan_batches(texts, 2, 1000) == [[1, 3], [5, 4, 2, 0]]
+
+
+def test_process_pool_matches_in_process_encoding(tmp_path: Path) -> None:
+    model_dir = tmp_path / "bow"
+    SentenceTransformer(modules=[BoW(vocab=["alpha", "beta", "gamma", "delta"])]).save(str(model_dir))
+    texts = ["alpha beta", "gamma", "delta delta alpha", "beta", "gamma alpha", "delta"]
+
+    expected = embed_texts(texts, EmbeddingSettings(model=str(model_dir), batch_size=2))
+    pooled = embed_texts(
+        texts,
+        EmbeddingSettings(model=str(model_dir), batch_size=2, processes=2, token_budget=8),
+    )
+    try:
+        assert pooled == expected
+        assert embed_pool._POOL is not None
+    finally:
+        embed_pool.shutdown_embed_pool()
+    assert embed_pool._POOL is None
+    assert physical_cores() >= 1
@@ -0,0 +1,75 @@
+import json
+import threading
+from dataclasses import replace
+from pathlib import Path
+
+import requests
+from sentence_transformers import SentenceTransformer
+from sentence_transformers.models import BoW
+
+from core.retrieval import embed_server
+from core.retrieval.embedder import EmbeddingSettings, embed_texts
+
+
+def test_embed_server_micro_batches_and_falls_back(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("STUDYFLOW_EMBED_SERVER_WAIT_MS", "200")
+    model_dir = tmp_path / "bow"
+    SentenceTransformer(modules=[BoW(vocab=["alpha", "beta", "gamma"])]).save(str(model_dir))
+    local = EmbeddingSettings(model=str(model_dir))
+    server = embed_server.create_server("127.0.0.1", 0, local)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    remote = replace(local, server_url=url)
+
+    queries = [["alpha"], ["beta gamma", "gamma"], ["alpha beta"], ["beta"]]
+    results: dict[int, list] = {}
+
+    def call(position: int) -> None:
+        results[position] = embed_texts(queries[position], remote)
+
+    callers = [threading.Thread(target=call, args=(i,)) for i in range(len(queries))]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join()
+    try:
+        for position, texts in enumerate(queries):
+            assert results[position] == embed_texts(texts, local)
+        health = requests.get(f"{url}/health", timeout=5).json()
+        assert health["requests"] == 4 and health["batches"] < 4
+        other = requests.post(
+            f"{url}/embed", json={"model": "sentence-transformers/other", "texts": ["alpha"]}, timeout=5
+        )
+        assert other.status_code == 400
+        assert embed_server.remote_embed(["alpha"], "sentence-transformers/other", url) is None
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    monkeypatch.setattr(embed_server, "_unavailable_until", 0.0)
+    assert embed_server.remote_embed(["alpha"], str(model_dir), url) is None
+    assert embed_texts(["alpha"], remote) == embed_texts(["alpha"], local)
+
+
+class _Response:
+    def __init__(self, status_code: int, body: str) -> None:
+        self.status_code = status_code
+        self.text = body
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def test_remote_embed_falls_back_on_malformed_responses(tmp_path: Path, monkeypatch) -> None:
+    model_dir = tmp_path / "bow"
+    SentenceTransformer(modules=[BoW(vocab=["alpha", "beta"])]).save(str(model_dir))
+    local = EmbeddingSettings(model=str(model_dir))
+    remote = replace(local, server_url="http://127.0.0.1:9")
+    monkeypatch.setattr(embed_server, "_unavailable_until", 0.0)
+    replies = [(200, "<html>busy</html>"), (200, '{"error": "oom"}'), (200, '{"vectors": []}'), (500, "")]
+    responses = iter(_Response(status, body) for status, body in replies for _ in range(2))
+    monkeypatch.setattr(embed_server.requests, "post", lambda *args, **kwargs: next(responses))
+    for _ in replies:
+        assert embed_server.remote_embed(["alpha"], str(model_dir), remote.server_url) is None
+        assert embed_texts(["alpha"], remote) == embed_texts(["alpha"], local)
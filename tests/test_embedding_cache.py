@@ -0,0 +1,51 @@
+from pathlib import Path
+
+import numpy as np
+
+from core.retrieval.embedding_cache import EmbeddingStore, content_hash
+
+
+def test_embedding_store_roundtrip_and_lru_eviction(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("STUDYFLOW_EMBED_CACHE_DTYPE", "float16")
+    store = EmbeddingStore(tmp_path / "embeddings.sqlite")
+    hashes = [content_hash(f"text {i}") for i in range(1200)]
+    store.put("model-a", {key: [float(i), 0.5, -1.0] for i, key in enumerate(hashes)})
+
+    found = store.get("model-a", hashes)
+    assert len(found) == 1200
+    assert found[hashes[7]] == [7.0, 0.5, -1.0]
+    assert store.get("model-b", hashes[:3]) == {}
+    assert store.stats()["bytes"] == 1200 * 3 * np.dtype("float16").itemsize
+
+    # Keep the first hundred warm, then shrink the budget below the current size.
+    store.get("model-a", hashes[:100])
+    monkeypatch.setenv("STUDYFLOW_EMBED_CACHE_MAX_MB", str(4000 / 1024 / 1024))
+    store.put("model-a", {content_hash("newest"): [1.0, 2.0, 3.0]})
+    stats = store.stats()
+    assert stats["bytes"] <= 4000
+    survivors = store.get("model-a", hashes[:100] + [content_hash("newest")])
+    assert len(survivors) == 101
+
+    reopened = EmbeddingStore(tmp_path / "embeddings.sqlite")
+    assert reopened.stats() == {**stats, "path": str(tmp_path / "embeddings.sqlite")}
+
+
+def test_embedding_store_size_is_shared_and_hits_do_not_write(tmp_path: Path, monkeypatch) -> None:
+    path = tmp_path / "embeddings.sqlite"
+    first, second = EmbeddingStore(path), EmbeddingStore(path)
+    old = [content_hash(f"old {i}") for i in range(100)]
+    first.put("model-a", {key: [1.0, 2.0, 3.0] for key in old})
+    second.put("model-a", {content_hash(f"other {i}"): [1.0, 2.0, 3.0] for i in range(100)})
+    assert first.stats()["bytes"] == second.stats()["bytes"] == 200 * 12
+
+    changes = first._connection.total_changes
+    assert len(first.get("model-a", old[:10])) == 10
+    assert first._connection.total_changes == changes
+
+    # Eviction in the second process accounts for the first one's rows and
+    # sees its pending hits once they are flushed.
+    first.close()
+    monkeypatch.setenv("STUDYFLOW_EMBED_CACHE_MAX_MB", str(1200 / 1024 / 1024))
+    second.put("model-a", {content_hash("newest"): [1.0, 2.0, 3.0]})
+    assert second.stats()["bytes"] <= 1200
+    assert len(second.get("model-a", old[:10])) == 10
@@ -0,0 +1,344 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from core.retrieval.embedder import EmbeddingSettings
+from core.ui_state.storage import set_setting
+from infra.db import get_connection
+from infra.models import init_db
+from service import retrieval_service
+from service.retrieval_service import RetrievalError, build_or_refresh_index
+from service.workspace_service import create_workspace
+
+
+def _insert_doc(ws_id: str, doc_id: str, count: int) -> None:
+    with get_connection() as connection:
+        connection.execute(
+            """
+            INSERT INTO documents (id, workspace_id, filename, path, created_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (doc_id, ws_id, f"{doc_id}.pdf", f"/tmp/{doc_id}.pdf", "2024-01-01T00:00:00Z"),
+        )
+        connection.executemany(
+            """
+            INSERT INTO chunks (id, doc_id, workspace_id, chunk_index, page_start, page_end, text, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (f"{doc_id}:{idx}", doc_id, ws_id, idx, 1, 1, f"{doc_id} chunk {idx}", "2024-01-01T00:00:00Z")
+                for idx in range(count)
+            ],
+        )
+        connection.commit()
+
+
+@pytest.fixture()
+def workspace(tmp_path: Path, monkeypatch) -> str:
+    os.environ["STUDYFLOW_WORKSPACES_DIR"] = str(tmp_path / "workspaces")
+    init_db()
+    ws_id = create_workspace("pipeline")
+    set_setting(ws_id, "vector_backend", "numpy")
+    monkeypatch.setattr(
+        retrieval_service, "build_embedding_settings", lambda **_: EmbeddingSettings(model="fake")
+    )
+    monkeypatch.setattr(
+        retrieval_service,
+        "embed_texts",
+        lambda texts, settings: [[float(len(text)), 1.0, float(text[-1])] for text in texts],
+    )
+    return ws_id
+
+
+def test_pipelined_index_build_covers_every_chunk(workspace: str) -> None:
+    _insert_doc(workspace, "doc1", 5)
+    _insert_doc(workspace, "doc2", 12)
+    _insert_doc(workspace, "doc3", 1)
+    progress: list[tuple[int, int]] = []
+
+    result = build_or_refresh_index(
+        workspace_id=workspace, batch_size=4, progress_cb=lambda done, total: progress.append((done, total))
+    )
+    assert result.indexed_count == result.chunk_count == 18
+    assert progress == [(4, 18), (8, 18), (12, 18), (16, 18), (18, 18)]
+    assert retrieval_service._build_store(workspace).count() == 18
+
+    batches = list(retrieval_service._iter_chunk_batches(workspace, ["doc2", "doc3"], 5))
+    ids = [item["chunk_id"] for batch in batches for item in batch]
+    assert ids == [f"doc2:{idx}" for idx in range(12)] + ["doc3:0"]
+
+
+def test_pipelined_index_build_stops_and_surfaces_errors(workspace: str, monkeypatch) -> None:
+    _insert_doc(workspace, "doc1", 10)
+    calls = {"count": 0}
+
+    def stop_after_two() -> bool:
+        calls["count"] += 1
+        return calls["count"] > 2
+
+    with pytest.raises(RetrievalError, match="stopped"):
+        build_or_refresh_index(workspace_id=workspace, batch_size=2, stop_check=stop_after_two)
+    assert retrieval_service._build_store(workspace).count() == 4
+
+    def broken(texts, settings):
+        raise retrieval_service.EmbeddingError("encoder offline")
+
+    monkeypatch.setattr(retrieval_service, "embed_texts", broken)
+    monkeypatch.setenv("STUDYFLOW_EMBED_CACHE", "off")
+    with pytest.raises(RetrievalError, match="encoder offline"):
+        build_or_refresh_index(workspace_id=workspace, batch_size=2)
+
+
+def test_incremental_index_embeds_only_changed_chunks(workspace: str, monkeypatch) -> None:
+    _insert_doc(workspace, "doc1", 3)
+    _insert_doc(workspace, "doc2", 2)
+    build_or_refresh_index(workspace_id=workspace, batch_size=2)
+    encoded: list[str] = []
+    original = retrieval_service.embed_texts
+
+    def counting(texts, settings):
+        encoded.extend(texts)
+        return original(texts, settings)
+
+    monkeypatch.setattr(retrieval_service, "embed_texts", counting)
+    result = build_or_refresh_index(workspace_id=workspace, incremental=True)
+    assert (result.indexed_count, result.removed_count, encoded) == (0, 0, [])
+
+    with get_connection() as connection:
+        connection.execute("UPDATE chunks SET text = 'rewritten 1' WHERE id = 'doc1:1'")
+        connection.execute("DELETE FROM chunks WHERE doc_id = 'doc2'")
+        connection.execute("DELETE FROM documents WHERE id = 'doc2'")
+        connection.commit()
+    _insert_doc(workspace, "doc3", 1)
+    result = build_or_refresh_index(workspace_id=workspace, incremental=True)
+    assert encoded == ["rewritten 1", "doc3 chunk 0"]
+    assert (result.indexed_count, result.removed_count) == (2, 2)
+    store = retrieval_service._build_store(workspace)
+    assert sorted(store.fingerprints()) == ["doc1:0", "doc1:1", "doc1:2", "doc3:0"]
+
+
+def test_index_task_resumes_from_checkpoint(workspace: str, monkeypatch) -> None:
+    from core.tasks.store import get_task
+    from service.tasks_service import enqueue_index_task, resume_task_by_id, run_task_by_id
+
+    _insert_doc(workspace, "doc1", 6)
+    _insert_doc(workspace, "doc2", 4)
+    encoded: list[str] = []
+    crash = {"enabled": True}
+    original = retrieval_service.embed_texts
+
+    def crash_on_doc2(texts, settings):
+        if crash["enabled"] and any(text.startswith("doc2") for text in texts):
+            raise retrieval_service.EmbeddingError("worker died")
+        encoded.extend(texts)
+        return original(texts, settings)
+
+    monkeypatch.setattr(retrieval_service, "embed_texts", crash_on_doc2)
+    task_id = enqueue_index_task(
+        workspace_id=workspace, reset=True, batch_size=2, incremental=False
+    )
+    with pytest.raises(RetrievalError):
+        run_task_by_id(task_id)
+    saved = get_task(task_id)
+    assert saved.status == "failed"
+    assert '"after": ["doc1", 5, "doc1:5"]' in saved.payload_json
+
+    crash["enabled"] = False
+    result = resume_task_by_id(task_id)
+    assert encoded[6:] == ["doc2 chunk 0", "doc2 chunk 1", "doc2 chunk 2", "doc2 chunk 3"]
+    assert len(encoded) == 10
+    assert result["indexed_count"] == 10
+    assert retrieval_service._build_store(workspace).count() == 10
+    assert "checkpoint" not in get_task(task_id).payload_json
+
+
+def test_finished_index_build_clears_its_checkpoint(workspace: str, monkeypatch) -> None:
+    from core.tasks import runner
+    from core.tasks.store import get_task
+    from service.tasks_service import enqueue_index_task, run_task_by_id
+
+    _insert_doc(workspace, "doc1", 4)
+
+    def lexical_fails(workspace_id):
+        raise RuntimeError("bm25 build failed")
+
+    monkeypatch.setattr(runner, "build_bm25_index", lexical_fails)
+    task_id = enqueue_index_task(
+        workspace_id=workspace, reset=True, batch_size=2, incremental=False
+    )
+    with pytest.raises(RuntimeError):
+        run_task_by_id(task_id)
+    # A later resume must rebuild rather than continue past the last batch.
+    assert "checkpoint" not in get_task(task_id).payload_json
+
+
+def test_embedding_cache_is_shared_across_workspaces(workspace: str, monkeypatch) -> None:
+    _insert_doc(workspace, "doc1", 3)
+    build_or_refresh_index(workspace_id=workspace)
+    encoded: list[str] = []
+    original = retrieval_service.embed_texts
+
+    def counting(texts, settings):
+        encoded.extend(texts)
+        return original(texts, settings)
+
+    monkeypatch.setattr(retrieval_service, "embed_texts", counting)
+    other = create_workspace("same textbook")
+    set_setting(other, "vector_backend", "numpy")
+    with get_connection() as connection:
+        connection.execute(
+            """
+            INSERT INTO documents (id, workspace_id, filename, path, created_at)
+            VALUES ('copy1', ?, 'copy1.pdf', '/tmp/copy1.pdf', '2024-01-01T00:00:00Z')
+            """,
+            (other,),
+        )
+        connection.executemany(
+            """
+            INSERT INTO chunks (id, doc_id, workspace_id, chunk_index, page_start, page_end, text, created_at)
+            VALUES (?, 'copy1', ?, ?, 1, 1, ?, '2024-01-01T00:00:00Z')
+            """,
+            [(f"copy1:{idx}", other, idx, f"doc1 chunk {idx}") for idx in range(4)],
+        )
+        connection.commit()
+    result = build_or_refresh_index(workspace_id=other)
+    assert result.indexed_count == 4
+    assert encoded == ["doc1 chunk 3"]
+
+
+def test_vector_index_holds_ids_and_hits_are_hydrated(workspace: str, monkeypatch) -> None:
+    _insert_doc(workspace, "doc1", 3)
+    build_or_refresh_index(workspace_id=workspace)
+    store = retrieval_service._build_store(workspace)
+    rows = (store._current().directory / "rows.jsonl").read_text(encoding="utf-8")
+    assert "doc1 chunk" not in rows and "doc1.pdf" not in rows
+
+    monkeypatch.setattr(
+        "core.retrieval.query_cache.embed_texts",
+        lambda texts, settings: [[12.0, 1.0, 2.0] for _ in texts],
+    )
+    hits, used_mode = retrieval_service.retrieve_hits_mode(
+        workspace_id=workspace, query="chunk two", mode="vector", top_k=2
+    )
+    assert used_mode == "vector"
+    assert hits[0].chunk_id == "doc1:2"
+    assert (hits[0].filename, hits[0].text, hits[0].page_start) == ("doc1.pdf", "doc1 chunk 2", 1)
+    assert hits == retrieval_service.retrieve_hits(workspace_id=workspace, query="chunk two", top_k=2)
+
+
+def test_course_scope_is_resolved_from_vector_tags(workspace: str, monkeypatch) -> None:
+    from core.retrieval.scopes import course_scope
+    from service.course_service import create_course, link_document
+
+    for doc_id in ("doc1", "doc2", "doc3"):
+        _insert_doc(workspace, doc_id, 2)
+    with get_connection() as connection:
+        connection.execute("UPDATE documents SET doc_type = 'course'")
+        connection.commit()
+    course_id = create_course(workspace, "ML")
+    link_document(course_id, "doc1")
+    build_or_refresh_index(workspace_id=workspace)
+    store = retrieval_service._build_store(workspace)
+    assert store.fingerprints(where={course_scope(course_id): True}).keys() == {"doc1:0", "doc1:1"}
+
+    monkeypatch.setattr(
+        "core.retrieval.query_cache.embed_texts",
+        lambda texts, settings: [[12.0, 1.0, 1.0] for _ in texts],
+    )
+
+    def scoped_docs(mode: str) -> set[str]:
+        hits, _ = retrieval_service.retrieve_hits_mode(
+            workspace_id=workspace, query="chunk", mode=mode, top_k=8, scope_tag=course_scope(course_id)
+        )
+        return {hit.doc_id for hit in hits}
+
+    assert scoped_docs("vector") == {"doc1"}
+    assert scoped_docs("bm25") == {"doc1"}
+
+    # Linking after the build queues a re-tag through the SQLite triggers.
+    link_document(course_id, "doc3")
+    assert scoped_docs("vector") == {"doc1", "doc3"}
+    assert scoped_docs("hybrid") == {"doc1", "doc3"}
+    with get_connection() as connection:
+        connection.execute("DELETE FROM course_documents WHERE doc_id = 'doc1'")
+        connection.commit()
+    assert scoped_docs("vector") == {"doc3"}
+
+    # BM25 never touches the vector store; a failing re-tag does not break
+    # vector queries, which filter by current membership until it succeeds.
+    from core.retrieval.numpy_store import NumpyVectorStore
+    from core.retrieval.scopes import retag_pending
+
+    def broken(self, **_):
+        raise RuntimeError("store is read-only")
+
+    set_tags = NumpyVectorStore.set_tags
+    monkeypatch.setattr(NumpyVectorStore, "set_tags", broken)
+    link_document(course_id, "doc2")
+    assert scoped_docs("bm25") == {"doc2", "doc3"}
+    assert scoped_docs("vector") == {"doc2", "doc3"}
+    assert retag_pending(workspace)
+    monkeypatch.setattr(NumpyVectorStore, "set_tags", set_tags)
+    assert scoped_docs("hybrid") == {"doc2", "doc3"}
+    assert not retag_pending(workspace)
+
+
+def test_course_agent_searches_linked_documents_of_any_type(workspace: str) -> None:
+    from core.agents.course_agent import CourseAgent
+    from core.retrieval.bm25_index import build_bm25_index
+    from service.course_service import create_course, link_document
+
+    for doc_id in ("doc1", "doc2", "doc3"):
+        _insert_doc(workspace, doc_id, 2)
+    with get_connection() as connection:
+        connection.execute("UPDATE documents SET doc_type = 'course'")
+        connection.commit()
+    course_id = create_course(workspace, "ML")
+    link_document(course_id, "doc1")
+    link_document(course_id, "doc2")
+    # Re-typed in the library after linking; it still belongs to the course.
+    with get_connection() as connection:
+        connection.execute("UPDATE documents SET doc_type = 'paper' WHERE id = 'doc2'")
+        connection.commit()
+    build_bm25_index(workspace)
+
+    agent = CourseAgent(workspace, course_id, ["doc1", "doc2"], "bm25")
+    hits, _ = agent._retrieve_hits("chunk")
+    assert {hit.doc_id for hit in hits} == {"doc1", "doc2"}
+
+
+def test_course_service_sizes_diversity_from_the_course_scope(workspace: str, monkeypatch) -> None:
+    from core.agents import course_agent
+    from core.domains.course import add_lecture_material, create_lecture
+    from core.retrieval.bm25_index import build_bm25_index
+    from service.course_service import create_course, generate_overview, link_document, list_course_doc_ids
+
+    for doc_id in ("doc1", "doc2", "doc3", "other"):
+        _insert_doc(workspace, doc_id, 3)
+    with get_connection() as connection:
+        connection.execute("UPDATE documents SET doc_type = 'course'")
+        connection.commit()
+    course_id = create_course(workspace, "ML")
+    link_document(course_id, "doc1")
+    link_document(course_id, "doc2")
+    with get_connection() as connection:
+        connection.execute("UPDATE documents SET doc_type = 'paper' WHERE id = 'doc2'")
+        connection.commit()
+    lecture_id = create_lecture(course_id=course_id, lecture_no=1)
+    add_lecture_material(lecture_id=lecture_id, doc_id="doc3", role="slides")
+    build_bm25_index(workspace)
+    assert sorted(list_course_doc_ids(course_id)) == ["doc1", "doc2", "doc3"]
+
+    sized: list[list[str]] = []
+    agent_init = course_agent.CourseAgent.__init__
+
+    def record(self, workspace_id, course_id, doc_ids, retrieval_mode):
+        sized.append(sorted(doc_ids))
+        agent_init(self, workspace_id, course_id, doc_ids, retrieval_mode)
+
+    monkeypatch.setattr(course_agent.CourseAgent, "__init__", record)
+    monkeypatch.setattr(course_agent, "chat", lambda prompt, temperature: "Overview [1]")
+    output = generate_overview(workspace_id=workspace, course_id=course_id, retrieval_mode="bm25")
+    assert sized == [["doc1", "doc2", "doc3"]]
+    assert {hit.doc_id for hit in output.hits} == {"doc1", "doc2", "doc3"}
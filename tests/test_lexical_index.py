@@ -0,0 +1,299 @@
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from core.retrieval.bm25_index import (
+    add_document_to_bm25_index,
+    build_bm25_index,
+    load_bm25_index,
+    query_bm25,
+    remove_document_from_bm25_index,
+)
+from core.retrieval.fts_index import fts_available, query_fts, resolve_lexical_backend
+from core.retrieval.result_cache import (
+    bump_index_generation,
+    clear_result_cache,
+    result_cache_stats,
+)
+from core.retrieval.retriever import Hit
+from core.ui_state.storage import set_setting
+from infra.db import get_connection
+from infra.models import init_db
+from service import retrieval_service
+from service.retrieval_service import (
+    index_status,
+    query_lexical,
+    retrieve_hits_batch,
+    retrieve_hits_mode,
+)
+from service.workspace_service import create_workspace
+
+
+def _insert_doc(ws_id: str, doc_id: str, texts: list[str]) -> None:
+    with get_connection() as connection:
+        connection.execute(
+            """
+            INSERT INTO documents (id, workspace_id, filename, path, created_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (doc_id, ws_id, f"{doc_id}.pdf", f"/tmp/{doc_id}.pdf", "2024-01-01T00:00:00Z"),
+        )
+        connection.executemany(
+            """
+            INSERT INTO chunks (id, doc_id, workspace_id, chunk_index, page_start, page_end, text, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (f"{doc_id}:{idx}", doc_id, ws_id, idx, 1, 1, text, "2024-01-01T00:00:00Z")
+                for idx, text in enumerate(texts)
+            ],
+        )
+        connection.commit()
+
+
+def _delete_doc(doc_id: str) -> None:
+    with get_connection() as connection:
+        connection.execute("DELETE FROM chunks WHERE doc_id = ?", (doc_id,))
+        connection.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+        connection.commit()
+
+
+def test_bm25_incremental_matches_full_build(tmp_path: Path) -> None:
+    os.environ["STUDYFLOW_WORKSPACES_DIR"] = str(tmp_path / "workspaces")
+    init_db()
+    ws_id = create_workspace("bm25")
+    _insert_doc(ws_id, "doc1", ["gradient descent converges", "attention is all you need"])
+    build_bm25_index(ws_id)
+
+    _insert_doc(ws_id, "doc2", ["stochastic gradient descent with momentum"])
+    add_document_to_bm25_index(ws_id, "doc2")
+    _insert_doc(ws_id, "doc3", ["attention heads and gradient flow"])
+    add_document_to_bm25_index(ws_id, "doc3")
+    remove_document_from_bm25_index(ws_id, "doc1")
+    _delete_doc("doc1")
+
+    incremental = query_bm25(workspace_id=ws_id, query="gradient attention", top_k=5)
+    assert {hit["doc_id"] for hit in incremental} == {"doc2", "doc3"}
+
+    build_bm25_index(ws_id)
+    full = query_bm25(workspace_id=ws_id, query="gradient attention", top_k=5)
+    assert [hit["chunk_id"] for hit in incremental] == [hit["chunk_id"] for hit in full]
+    for left, right in zip(incremental, full):
+        assert abs(left["score"] - right["score"]) < 1e-9
+
+    index = load_bm25_index(ws_id)
+    assert index is not None
+    assert index.dead_count == 0
+
+
+def test_bm25_index_cache_invalidation(tmp_path: Path) -> None:
+    os.environ["STUDYFLOW_WORKSPACES_DIR"] = str(tmp_path / "workspaces")
+    init_db()
+    ws_id = create_workspace("bm25-cache")
+    _insert_doc(ws_id, "doc1", ["cached lexical index"])
+    build_bm25_index(ws_id)
+
+    first = load_bm25_index(ws_id)
+    assert load_bm25_index(ws_id) is first
+
+    _insert_doc(ws_id, "doc2", ["another cached chunk"])
+    add_document_to_bm25_index(ws_id, "doc2")
+    refreshed = load_bm25_index(ws_id)
+    assert refreshed is not first
+    assert "doc2:0" in refreshed.chunk_ids
+
+    build_bm25_index(ws_id)
+    assert load_bm25_index(ws_id) is not refreshed
+
+
+def test_bm25_segment_is_memory_mapped(tmp_path: Path) -> None:
+    os.environ["STUDYFLOW_WORKSPACES_DIR"] = str(tmp_path / "workspaces")
+    init_db()
+    ws_id = create_workspace("bm25-segment")
+    _insert_doc(ws_id, "doc1", ["postings live on disk", "chunk text stays in sqlite", "filler"])
+    segment_dir = build_bm25_index(ws_id)
+
+    index = load_bm25_index(ws_id)
+    assert index.base.directory == segment_dir
+    assert isinstance(index.base.postings_rows, np.memmap)
+    assert not any("sqlite" in path.read_bytes().decode("utf-8", "ignore") for path in segment_dir.glob("*.npy"))
+
+    hits = query_bm25(workspace_id=ws_id, query="sqlite", top_k=1)
+    assert hits[0]["text"] == "chunk text stays in sqlite"
+    assert hits[0]["filename"] == "doc1.pdf"
+
+
+def test_bm25_scoped_top_k(tmp_path: Path) -> None:
+    os.environ["STUDYFLOW_WORKSPACES_DIR"] = str(tmp_path / "workspaces")
+    init_db()
+    ws_id = create_workspace("bm25-scope")
+    _insert_doc(ws_id, "doc1", ["kernel methods", "kernel kernel trick", "unrelated"])
+    _insert_doc(ws_id, "doc2", ["kernel density estimation"])
+    build_bm25_index(ws_id)
+    _insert_doc(ws_id, "doc3", ["kernel of a linear map"])
+    add_document_to_bm25_index(ws_id, "doc3")
+
+    scoped = query_bm25(workspace_id=ws_id, query="kernel", top_k=2, doc_ids=["doc1", "doc3"])
+    assert [hit["chunk_id"] for hit in scoped] == ["doc1:1", "doc1:0"]
+
+    padded = query_bm25(workspace_id=ws_id, query="kernel", top_k=4, doc_ids=["doc1"])
+    assert [hit["chunk_id"] for hit in padded] == ["doc1:1", "doc1:0", "doc1:2"]
+    assert padded[-1]["score"] == 0.0
+
+
+def test_fts5_backend_tracks_chunk_table(tmp_path: Path) -> None:
+    os.environ["STUDYFLOW_WORKSPACES_DIR"] = str(tmp_path / "workspaces")
+    init_db()
+    if not fts_available():
+        return
+    ws_id = create_workspace("fts5")
+    _insert_doc(ws_id, "doc1", ["kernel methods", "unrelated text"])
+    _insert_doc(ws_id, "doc2", ["kernel density estimation"])
+    set_setting(ws_id, "lexical_backend", "fts5")
+    assert resolve_lexical_backend(ws_id) == "fts5"
+
+    hits = query_lexical(workspace_id=ws_id, query="kernel", top_k=2)
+    assert {hit["chunk_id"] for hit in hits} == {"doc1:0", "doc2:0"}
+    assert all(hit["score"] > 0 for hit in hits)
+
+    scoped = query_fts(workspace_id=ws_id, query="kernel", top_k=2, doc_ids=["doc1"])
+    assert [hit["chunk_id"] for hit in scoped] == ["doc1:0", "doc1:1"]
+    assert scoped[1]["score"] == 0.0
+
+    _delete_doc("doc2")
+    hits = query_fts(workspace_id=ws_id, query="density", top_k=1)
+    assert all(hit["doc_id"] != "doc2" for hit in hits)
+
+
+def test_batched_retrieval_matches_single_queries(tmp_path: Path, monkeypatch) -> None:
+    os.environ["STUDYFLOW_WORKSPACES_DIR"] = str(tmp_path / "workspaces")
+    monkeypatch.setenv("STUDYFLOW_RETRIEVAL_CACHE_SIZE", "0")
+    init_db()
+    ws_id = create_workspace("batch")
+    _insert_doc(ws_id, "doc1", ["gradient descent converges", "related work on optimizers"])
+    _insert_doc(ws_id, "doc2", ["attention heads", "related work on transformers"])
+    _insert_doc(ws_id, "doc3", ["gradient clipping for attention"])
+    build_bm25_index(ws_id)
+
+    queries = ["gradient", "related work", "gradient", "related work"]
+    scopes = [["doc1"], ["doc1"], ["doc2", "doc3"], ["doc2", "doc3"]]
+    batched = retrieve_hits_batch(
+        workspace_id=ws_id, queries=queries, mode="bm25", top_k=3, scopes=scopes, max_per_doc=1
+    )
+    for (hits, used_mode), query, scope in zip(batched, queries, scopes):
+        single, single_mode = retrieve_hits_mode(
+            workspace_id=ws_id, query=query, mode="bm25", top_k=3, doc_ids=scope, max_per_doc=1
+        )
+        assert used_mode == single_mode == "bm25"
+        assert [(hit.chunk_id, hit.score) for hit in hits] == [
+            (hit.chunk_id, hit.score) for hit in single
+        ]
+        assert {hit.doc_id for hit in hits} <= set(scope)
+
+
+def test_retrieval_result_cache_follows_index_generation(tmp_path: Path) -> None:
+    os.environ["STUDYFLOW_WORKSPACES_DIR"] = str(tmp_path / "workspaces")
+    init_db()
+    clear_result_cache()
+    ws_id = create_workspace("cache")
+    _insert_doc(ws_id, "doc1", ["gradient descent converges", "linear algebra", "probability", "calculus"])
+    build_bm25_index(ws_id)
+
+    first, _ = retrieve_hits_mode(workspace_id=ws_id, query="gradient", mode="bm25", top_k=1)
+    again, _ = retrieve_hits_mode(workspace_id=ws_id, query=" gradient ", mode="bm25", top_k=1)
+    assert [hit.chunk_id for hit in again] == [hit.chunk_id for hit in first] == ["doc1:0"]
+    assert result_cache_stats()["hits"] == 1
+
+    _insert_doc(ws_id, "doc2", ["gradient gradient clipping"])
+    add_document_to_bm25_index(ws_id, "doc2")
+    bump_index_generation(ws_id)
+    fresh, _ = retrieve_hits_mode(workspace_id=ws_id, query="gradient", mode="bm25", top_k=1)
+    assert fresh[0].chunk_id == "doc2:0"
+    assert result_cache_stats()["misses"] == 2
+    assert index_status(ws_id)["retrieval_cache"]["size"] == 1
+
+
+def test_hybrid_vector_leg_runs_under_a_budget(tmp_path: Path, monkeypatch) -> None:
+    os.environ["STUDYFLOW_WORKSPACES_DIR"] = str(tmp_path / "workspaces")
+    monkeypatch.setenv("STUDYFLOW_RETRIEVAL_CACHE_SIZE", "0")
+    monkeypatch.setenv("STUDYFLOW_HYBRID_VECTOR_BUDGET_MS", "200")
+    init_db()
+    ws_id = create_workspace("hybrid")
+    _insert_doc(ws_id, "doc1", ["gradient descent converges", "attention heads"])
+    build_bm25_index(ws_id)
+    delay = {"seconds": 0.0}
+
+    def fake_vector_hits(workspace_id, queries, scopes, doc_types, top_k, hydrate=True, scope_tag=None):
+        time.sleep(delay["seconds"])
+        hit = Hit(
+            chunk_id="doc1:1",
+            doc_id="doc1",
+            workspace_id=workspace_id,
+            filename="doc1.pdf",
+            file_type=None,
+            page_start=1,
+            page_end=1,
+            text="attention heads",
+            score=0.9,
+        )
+        return [[hit] for _ in queries]
+
+    monkeypatch.setattr(retrieval_service, "ensure_index", lambda workspace_id: None)
+    monkeypatch.setattr(retrieval_service, "_vector_hits", fake_vector_hits)
+
+    timings: dict = {}
+    hits, used_mode = retrieve_hits_mode(
+        workspace_id=ws_id, query="gradient", mode="hybrid", top_k=3, timings=timings
+    )
+    assert used_mode == "hybrid"
+    assert {hit.chunk_id for hit in hits} == {"doc1:0", "doc1:1"}
+    assert "bm25_ms" in timings and "vector_ms" in timings
+
+    delay["seconds"] = 1.0
+    timings = {}
+    started = time.perf_counter()
+    hits, used_mode = retrieve_hits_mode(
+        workspace_id=ws_id, query="gradient", mode="hybrid", top_k=3, timings=timings
+    )
+    assert time.perf_counter() - started < 0.9
+    assert used_mode == "bm25"
+    assert hits[0].chunk_id == "doc1:0"
+    assert timings["vector_fallback"] == "timeout"
+
+    # The abandoned leg still holds the only worker: skip rather than queue.
+    monkeypatch.setattr(retrieval_service, "_LEG_WORKERS", 1)
+    timings = {}
+    started = time.perf_counter()
+    _, used_mode = retrieve_hits_mode(
+        workspace_id=ws_id, query="gradient", mode="hybrid", top_k=3, timings=timings
+    )
+    assert time.perf_counter() - started < 0.2
+    assert (used_mode, timings["vector_fallback"]) == ("bm25", "saturated")
+    time.sleep(1.0)
+    delay["seconds"] = 0.0
+    _, used_mode = retrieve_hits_mode(workspace_id=ws_id, query="gradient", mode="hybrid", top_k=3)
+    assert used_mode == "hybrid"
+
+
+def test_bm25_okapi_scores_are_pinned(tmp_path: Path) -> None:
+    os.environ["STUDYFLOW_WORKSPACES_DIR"] = str(tmp_path / "workspaces")
+    init_db()
+    ws_id = create_workspace("bm25-okapi")
+    _insert_doc(ws_id, "doc1", ["gradient descent on convex losses", "gradient clipping for recurrent networks"])
+    _insert_doc(ws_id, "doc2", ["the gradient of a gradient", "momentum accelerates descent"])
+    build_bm25_index(ws_id)
+    _insert_doc(ws_id, "doc3", ["gradient boosting with trees"])
+    add_document_to_bm25_index(ws_id, "doc3")
+
+    # Values from rank_bm25.BM25Okapi: negative IDF ("gradient") is floored at
+    # 0.25 * average IDF and a repeated query term counts twice.
+    hits = query_bm25(workspace_id=ws_id, query="gradient descent gradient", top_k=5)
+    assert [(hit["chunk_id"], round(hit["score"], 6)) for hit in hits] == [
+        ("doc1:0", 0.752559),
+        ("doc2:0", 0.63265),
+        ("doc3:0", 0.481984),
+        ("doc1:1", 0.43554),
+        ("doc2:1", 0.3927),
+    ]
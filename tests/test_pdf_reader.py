@@ -0,0 +1,140 @@
+import os
+from pathlib import Path
+
+import fitz
+import pytest
+
+from core.ingest import ocr_pool, pdf_reader
+from core.ingest.pdf_reader import PDFReadError, read_pdf, shutdown_extract_pool
+from core.ingest.pdf_render import ocr_dpi, render_page_image
+from infra.cpu import physical_cores
+
+
+def _create_pdf(path: Path, pages: int) -> None:
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Page {number + 1} discusses topic {number * 7 % 11}.")
+        page.insert_text((72, 144), "Second block of text.")
+    doc.save(path)
+    doc.close()
+
+
+def test_parallel_extraction_matches_sequential(tmp_path: Path, monkeypatch):
+    path = tmp_path / "book.pdf"
+    _create_pdf(path, 40)
+    monkeypatch.setenv("STUDYFLOW_PDF_PROCESSES", "0")
+    sequential = read_pdf(path)
+
+    monkeypatch.setenv("STUDYFLOW_PDF_PROCESSES", "2")
+    monkeypatch.setenv("STUDYFLOW_PDF_PARALLEL_MIN_PAGES", "10")
+    progress: list[tuple[int, int]] = []
+    try:
+        parallel = read_pdf(path, progress_cb=lambda done, total: progress.append((done, total)))
+        assert parallel.pages == sequential.pages
+        assert parallel.pages[17].text.startswith("Page 18")
+        assert progress == [(number, 40) for number in range(1, 41)]
+
+        calls = {"count": 0}
+
+        def stop_after_five() -> bool:
+            calls["count"] += 1
+            return calls["count"] > 5
+
+        with pytest.raises(PDFReadError, match="stopped"):
+            read_pdf(path, stop_check=stop_after_five)
+    finally:
+        shutdown_extract_pool()
+
+
+def test_ocr_renders_grayscale_at_adaptive_dpi(tmp_path: Path, monkeypatch):
+    path = tmp_path / "scan.pdf"
+    doc = fitz.open()
+    doc.new_page(width=595, height=842)
+    slide = doc.new_page(width=960, height=540)
+    slide.insert_text((72, 72), "Slide title")
+    doc.save(path)
+    doc.close()
+
+    with fitz.open(path) as document:
+        assert ocr_dpi(document.load_page(0)) == 300
+        assert ocr_dpi(document.load_page(1), text_chars=11) == 150
+    assert ocr_dpi(fitz.open().new_page(width=3000, height=2000)) == 96
+
+    seen = []
+
+    def fake_ocr(image, settings=None):
+        seen.append((image.mode, image.size))
+        return f"scanned {len(seen)}"
+
+    monkeypatch.setenv("STUDYFLOW_OCR_PROCESSES", "0")
+    monkeypatch.setattr(pdf_reader, "ocr_available", lambda settings: (True, ""))
+    monkeypatch.setattr(pdf_reader, "run_ocr", fake_ocr)
+    result = read_pdf(path, ocr_mode="auto", ocr_threshold=50)
+    assert seen == [("L", (2480, 3509)), ("L", (2000, 1125))]
+    assert [page.text_source for page in result.pages] == ["ocr", "mixed"]
+    assert result.pages[1].text == "Slide title\n\nscanned 2"
+    assert result.ocr_pages == 2 and result.ocr_pages_per_sec > 0
+
+
+def _pool_worker_ocr(path: str, page_index: int, dpi: int) -> str:
+    page = ocr_pool._worker_document(path).load_page(page_index)
+    image = render_page_image(page, zoom=dpi / 72, grayscale=True)
+    return f"scanned {page_index + 1} {image.mode} {dpi} pid {os.getpid()}"
+
+
+def test_ocr_pool_recognizes_scanned_pages_in_order(tmp_path: Path, monkeypatch):
+    path = tmp_path / "scan.pdf"
+    doc = fitz.open()
+    for _ in range(6):
+        doc.new_page(width=595, height=842)
+    doc.save(path)
+    doc.close()
+
+    monkeypatch.setattr(pdf_reader, "ocr_available", lambda settings: (True, ""))
+    monkeypatch.setattr(ocr_pool, "_worker_ocr", _pool_worker_ocr)
+    monkeypatch.setenv("STUDYFLOW_OCR_PROCESSES", "2")
+    monkeypatch.setenv("STUDYFLOW_OCR_PARALLEL_MIN_PAGES", "4")
+    progress: list[tuple[int, int]] = []
+    try:
+        result = read_pdf(
+            path, ocr_mode="auto", progress_cb=lambda done, total: progress.append((done, total))
+        )
+        assert ocr_pool._POOL is not None
+        texts = [page.ocr_text.rsplit(" pid ", 1) for page in result.pages]
+        assert [text for text, _ in texts] == [f"scanned {n} L 300" for n in range(1, 7)]
+        assert str(os.getpid()) not in {pid for _, pid in texts}
+        assert [page.text_source for page in result.pages] == ["ocr"] * 6
+        assert progress == [(number, 6) for number in range(1, 7)]
+        assert result.ocr_pages == 6
+    finally:
+        ocr_pool.shutdown_ocr_pool()
+
+    # Below the page threshold recognition stays in-process.
+    monkeypatch.setenv("STUDYFLOW_OCR_PARALLEL_MIN_PAGES", "7")
+    monkeypatch.setattr(pdf_reader, "run_ocr", lambda image, settings=None: "inline")
+    result = read_pdf(path, ocr_mode="on")
+    assert ocr_pool._POOL is None
+    assert [page.ocr_text for page in result.pages] == ["inline"] * 6
+
+
+def test_ocr_processes_falls_back_to_auto_on_bad_values(monkeypatch):
+    monkeypatch.setenv("STUDYFLOW_OCR_PROCESSES", "four")
+    assert ocr_pool.ocr_processes() == physical_cores()
+    monkeypatch.setenv("STUDYFLOW_OCR_PROCESSES", "auto")
+    assert ocr_pool.ocr_processes() == physical_cores()
+    monkeypatch.setenv("STUDYFLOW_OCR_PROCESSES", "0")
+    assert ocr_pool.ocr_processes() == 0
+    monkeypatch.setenv("STUDYFLOW_OCR_PARALLEL_MIN_PAGES", "many")
+    assert ocr_pool.ocr_parallel_min_pages() == 8
+
+
+def test_pdf_process_settings_fall_back_on_bad_values(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("STUDYFLOW_PDF_PROCESSES", "two")
+    monkeypatch.setenv("STUDYFLOW_PDF_PARALLEL_MIN_PAGES", "lots")
+    assert pdf_reader._extract_processes() == physical_cores()
+    assert pdf_reader._parallel_min_pages() == 200
+
+    path = tmp_path / "book.pdf"
+    _create_pdf(path, 3)
+    assert [page.number for page in read_pdf(path).pages] == [1, 2, 3]
@@ -0,0 +1,84 @@
+from pathlib import Path
+
+from core.retrieval import query_cache
+from core.retrieval.embedder import EmbeddingSettings
+from service.warmup_service import builtin_queries
+
+
+def test_query_cache_skips_encoder(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("STUDYFLOW_WORKSPACES_DIR", str(tmp_path / "workspaces"))
+    monkeypatch.setenv("STUDYFLOW_QUERY_EMBED_CACHE", "on")
+    monkeypatch.setenv("STUDYFLOW_QUERY_EMBED_CACHE_SIZE", "2")
+    encoded: list[str] = []
+
+    def fake_embed(texts, settings):
+        encoded.extend(texts)
+        return [[float(len(text)), 1.0] for text in texts]
+
+    monkeypatch.setattr(query_cache, "embed_texts", fake_embed)
+    query_cache.clear_query_cache()
+    settings = EmbeddingSettings(model="fake")
+
+    queries = builtin_queries()
+    assert "related work" in queries and "summary" in queries
+    assert query_cache.warm_query_cache(["summary", "methods"], settings) == 2
+    vectors = query_cache.embed_queries(["summary", "  methods ", "summary"], settings)
+    assert vectors == [[7.0, 1.0], [7.0, 1.0], [7.0, 1.0]]
+    assert encoded == ["summary", "methods"]
+
+    # Evicted from the in-memory LRU, but still served from the persistent cache.
+    query_cache.embed_queries(["results"], settings)
+    query_cache.embed_queries(["summary"], settings)
+    assert encoded == ["summary", "methods", "results"]
+
+    # A different model never reuses another model's vectors.
+    query_cache.embed_queries(["summary"], EmbeddingSettings(model="other"))
+    assert encoded[-1] == "summary"
+    stats = query_cache.query_cache_stats()
+    assert stats["size"] == 2 and stats["misses"] == 4
+
+
+def test_warmup_reports_readiness(monkeypatch, tmp_path: Path) -> None:
+    from fastapi.testclient import TestClient
+
+    from backend.api import app
+    from service import warmup_service
+
+    monkeypatch.setenv("STUDYFLOW_WORKSPACES_DIR", str(tmp_path / "workspaces"))
+
+    def fake_embed(texts, settings):
+        return [[1.0, 0.0] for _ in texts]
+
+    monkeypatch.setattr(warmup_service, "embed_texts", fake_embed)
+    monkeypatch.setattr(query_cache, "embed_texts", fake_embed)
+    monkeypatch.setattr(warmup_service, "_STATUS", {})
+    assert warmup_service.warmup_status()["state"] == "idle"
+
+    status = warmup_service.run_warmup()
+    assert status["ready"] is True
+    assert status["components"]["embedding"]["state"] == "ready"
+    assert "steady_ms" in status["components"]["embedding"]
+    assert status["components"]["query_cache"]["state"] == "ready"
+    health = TestClient(app).get("/health").json()
+    assert health["ready"] is True and health["warmup"]["state"] == "ready"
+
+    def broken(texts, settings):
+        raise RuntimeError("model missing")
+
+    monkeypatch.setattr(warmup_service, "embed_texts", broken)
+    status = warmup_service.run_warmup()
+    assert status["state"] == "degraded"
+    assert status["components"]["embedding"]["error"] == "model missing"
+    assert status["components"]["query_cache"]["state"] == "skipped"
+
+    # Query warming can be turned off without losing model readiness, and back.
+    monkeypatch.setattr(warmup_service, "embed_texts", fake_embed)
+    monkeypatch.setattr(warmup_service, "_STATUS", {})
+    monkeypatch.setenv("STUDYFLOW_QUERY_WARMUP", "off")
+    status = warmup_service.run_warmup()
+    assert list(status["components"]) == ["embedding"] and status["ready"] is True
+    monkeypatch.setenv("STUDYFLOW_QUERY_WARMUP", "on")
+    monkeypatch.setenv("STUDYFLOW_MODEL_WARMUP", "off")
+    monkeypatch.setattr(warmup_service, "_STATUS", {})
+    status = warmup_service.run_warmup()
+    assert list(status["components"]) == ["query_cache"] and status["ready"] is True
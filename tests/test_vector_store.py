@@ -0,0 +1,207 @@
+import multiprocessing
+
+import numpy as np
+
+from core.retrieval.numpy_store import NumpyVectorStore
+from core.retrieval.vector_store import (
+    VectorStore,
+    VectorStoreSettings,
+    get_vector_store,
+    release_vector_stores,
+)
+
+
+def _upsert(store: VectorStore, ids: list[str], doc_id: str) -> None:
+    store.upsert(
+        ids=ids,
+        embeddings=[[float(i), 1.0, 0.5] for i, _ in enumerate(ids)],
+        metadatas=[{"chunk_id": item, "doc_id": doc_id} for item in ids],
+    )
+
+
+def test_vector_store_pool_reuses_clients(tmp_path):
+    settings = VectorStoreSettings(
+        persist_directory=tmp_path / "ws" / "index" / "chroma",
+        collection_name="workspace_ws",
+    )
+    store = get_vector_store(settings)
+    assert get_vector_store(settings) is store
+    assert store.is_empty()
+
+    _upsert(store, ["c1", "c2"], "d1")
+    assert not store.is_empty()
+    store.delete(ids=["c1"])
+    assert store.fingerprints() == {"c2": None}
+    store.delete(where={"doc_id": "d1"})
+    assert store.is_empty()
+
+    # A reset from a separate handle (another process) must not break the pooled one.
+    _upsert(store, ["c3"], "d2")
+    VectorStore(settings).reset()
+    assert store.count() == 0
+    _upsert(store, ["c4"], "d3")
+    assert store.count() == 1
+
+    release_vector_stores(tmp_path / "ws")
+    assert get_vector_store(settings) is not store
+
+
+def test_numpy_vector_store_filters_deletes_and_reloads(tmp_path, monkeypatch):
+    monkeypatch.setenv("STUDYFLOW_VECTOR_IVF_MIN_ROWS", "0")
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(60, 8)).astype(np.float32)
+    settings = VectorStoreSettings(
+        persist_directory=tmp_path / "vectors", collection_name="ws", backend="numpy"
+    )
+    store = NumpyVectorStore(settings)
+    for start in range(0, 60, 20):
+        store.upsert(
+            ids=[f"c{i}" for i in range(start, start + 20)],
+            embeddings=vectors[start : start + 20].tolist(),
+            metadatas=[
+                {"chunk_id": f"c{i}", "doc_id": f"d{i // 20}", "doc_type": "paper" if i < 40 else "other"}
+                for i in range(start, start + 20)
+            ],
+        )
+    assert store.count() == 60
+
+    query = vectors[5] + 0.01
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = [f"c{i}" for i in np.argsort(-(unit @ (query / np.linalg.norm(query))))[:5]]
+    assert store.query(embedding=query.tolist(), top_k=5)["ids"][0] == expected
+    assert store.query(embedding=query.tolist(), top_k=5)["distances"][0][0] < 0.01
+
+    scoped = store.query(
+        embedding=query.tolist(),
+        top_k=50,
+        where={"$and": [{"doc_id": {"$in": ["d1", "d2"]}}, {"doc_type": {"$in": ["paper"]}}]},
+    )
+    assert {meta["doc_id"] for meta in scoped["metadatas"][0]} == {"d1"}
+    assert len(scoped["ids"][0]) == 20
+
+    store.delete(where={"doc_id": "d0"})
+    store.upsert(
+        ids=["c25"], embeddings=[vectors[5].tolist()],
+        metadatas=[{"chunk_id": "c25", "doc_id": "d1", "doc_type": "paper"}],
+    )
+    reopened = NumpyVectorStore(settings)
+    assert reopened.count() == 40
+    top = reopened.query(embedding=query.tolist(), top_k=1)
+    assert top["ids"][0] == ["c25"] and top["metadatas"][0][0]["doc_id"] == "d1"
+    assert not any(meta["doc_id"] == "d0" for meta in reopened.query(embedding=query.tolist(), top_k=60)["metadatas"][0])
+
+
+def test_numpy_vector_store_ivf_recall(tmp_path, monkeypatch):
+    monkeypatch.setenv("STUDYFLOW_VECTOR_IVF_MIN_ROWS", "500")
+    rng = np.random.default_rng(1)
+    centers = rng.normal(size=(20, 16))
+    vectors = (centers[rng.integers(0, 20, 2000)] + 0.3 * rng.normal(size=(2000, 16))).astype(np.float32)
+    store = NumpyVectorStore(
+        VectorStoreSettings(persist_directory=tmp_path / "vectors", collection_name="ws", backend="numpy")
+    )
+    store.upsert(
+        ids=[f"c{i}" for i in range(2000)],
+        embeddings=vectors.tolist(),
+        metadatas=[{"chunk_id": f"c{i}", "doc_id": "d"} for i in range(2000)],
+    )
+    assert store._state.centroids is not None
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    recalls = []
+    for query in vectors[:20]:
+        truth = {f"c{i}" for i in np.argsort(-(unit @ (query / np.linalg.norm(query))))[:10]}
+        hits = store.query(embedding=query.tolist(), top_k=10)["ids"][0]
+        recalls.append(len(truth & set(hits)) / 10)
+    assert np.mean(recalls) >= 0.9
+
+
+def test_numpy_vector_store_compressed_codec(tmp_path, monkeypatch):
+    monkeypatch.setenv("STUDYFLOW_VECTOR_REDUCE", "pca")
+    monkeypatch.setenv("STUDYFLOW_VECTOR_DIMS", "8")
+    monkeypatch.setenv("STUDYFLOW_VECTOR_DTYPE", "int8")
+    monkeypatch.setenv("STUDYFLOW_VECTOR_COMPRESS_MIN_ROWS", "500")
+    rng = np.random.default_rng(2)
+    basis = rng.normal(size=(8, 32))
+    vectors = (rng.normal(size=(1000, 8)) @ basis + 0.05 * rng.normal(size=(1000, 32))).astype(np.float32)
+    settings = VectorStoreSettings(persist_directory=tmp_path / "vectors", collection_name="ws", backend="numpy")
+    store = NumpyVectorStore(settings)
+    store.upsert(
+        ids=[f"c{i}" for i in range(1000)],
+        embeddings=vectors.tolist(),
+        metadatas=[{"chunk_id": f"c{i}", "doc_id": "d"} for i in range(1000)],
+    )
+    state = store._state
+    assert state.codec is not None and state.dim == 8 and state.dtype == "int8"
+    assert state.matrix.nbytes == 1000 * 8
+
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    reopened = NumpyVectorStore(settings)
+    for rescore, floor in (("4", 0.95), ("0", 0.6)):
+        monkeypatch.setenv("STUDYFLOW_VECTOR_RESCORE", rescore)
+        recalls = []
+        for query in unit[:20]:
+            truth = {f"c{i}" for i in np.argsort(-(unit @ query))[:10]}
+            hits = reopened.query(embedding=query.tolist(), top_k=10)["ids"][0]
+            recalls.append(len(truth & set(hits)) / 10)
+        assert np.mean(recalls) >= floor
+    assert reopened.query(embedding=unit[3].tolist(), top_k=1)["ids"][0] == ["c3"]
+
+    reopened.set_tags(doc_id="d", tags={"course:c1": True})
+    assert reopened.count() == 1000
+    assert reopened._current().codec.requested == ("pca", 8, True, True)
+
+
+def test_set_tags_replaces_scope_flags(tmp_path):
+    for backend in ("chroma", "numpy"):
+        settings = VectorStoreSettings(
+            persist_directory=tmp_path / backend, collection_name="workspace_ws", backend=backend
+        )
+        store = get_vector_store(settings)
+        store.upsert(
+            ids=["c1", "c2", "c3"],
+            embeddings=[[1.0, 0.0, 0.0], [0.9, 0.1, 0.0], [0.0, 1.0, 0.0]],
+            metadatas=[
+                {"chunk_id": "c1", "doc_id": "d1", "course:a": True},
+                {"chunk_id": "c2", "doc_id": "d1", "course:a": True},
+                {"chunk_id": "c3", "doc_id": "d2"},
+            ],
+        )
+        store.set_tags(doc_id="d1", tags={"doc_type": "course", "course:b": True})
+        store.set_tags(doc_id="d2", tags={"doc_type": "course", "course:a": True})
+        assert set(store.fingerprints(where={"course:a": True})) == {"c3"}
+        assert set(store.fingerprints(where={"course:b": True})) == {"c1", "c2"}
+        result = store.query(
+            embedding=[1.0, 0.0, 0.0],
+            top_k=3,
+            where={"$and": [{"course:b": True}, {"doc_type": {"$in": ["course"]}}]},
+        )
+        assert result["ids"][0] == ["c1", "c2"]
+        release_vector_stores(tmp_path / backend)
+
+
+def _write_rounds(settings: VectorStoreSettings, worker: int) -> None:
+    store = NumpyVectorStore(settings)
+    ids = [f"w{worker}-{i}" for i in range(4)]
+    for round_ in range(25):
+        store.upsert(
+            ids=ids,
+            embeddings=[[float(worker), float(round_), float(i) + 1.0] for i in range(4)],
+            metadatas=[{"chunk_id": item, "doc_id": f"d{worker}"} for item in ids],
+        )
+
+
+def test_numpy_vector_store_writers_in_two_processes(tmp_path):
+    settings = VectorStoreSettings(
+        persist_directory=tmp_path / "vectors", collection_name="ws", backend="numpy"
+    )
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=_write_rounds, args=(settings, n)) for n in range(2)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(60)
+    assert [process.exitcode for process in workers] == [0, 0]
+
+    store = NumpyVectorStore(settings)
+    assert sorted(store.fingerprints()) == sorted(f"w{n}-{i}" for n in range(2) for i in range(4))
+    hits = store.query(embedding=[1.0, 24.0, 1.0], top_k=1, where={"doc_id": "d1"})
+    assert hits["ids"] == [["w1-0"]]